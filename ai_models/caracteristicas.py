@@ -0,0 +1,42 @@
+# ai_models/caracteristicas.py
+"""
+Características de calendario para los modelos de ventas.
+
+Entrenamiento y predicción deben usar exactamente estas funciones: el modelo
+aprende el significado de cada columna, así que cualquier diferencia (por
+ejemplo el día de la semana con domingo=0 en SQL y lunes=0 en Python)
+degrada las predicciones sin dar ningún error.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNAS_CARACTERISTICAS = [
+    'mes', 'dia', 'dia_semana', 'dia_del_anio', 'semana_del_anio', 'es_fin_de_semana'
+]
+
+
+def rango_fechas(fecha_inicio, fecha_fin):
+    """Días consecutivos entre ambas fechas (incluidas)"""
+    return pd.date_range(start=fecha_inicio, end=fecha_fin, freq='D')
+
+
+def caracteristicas_calendario(fechas):
+    """
+    DataFrame con una fila por fecha y las columnas COLUMNAS_CARACTERISTICAS.
+    dia_semana va de 0 (lunes) a 6 (domingo), como en pandas y Python.
+    """
+    fechas = pd.DatetimeIndex(fechas)
+    dia_semana = fechas.dayofweek
+    return pd.DataFrame({
+        'mes': fechas.month,
+        'dia': fechas.day,
+        'dia_semana': dia_semana,
+        'dia_del_anio': fechas.dayofyear,
+        'semana_del_anio': fechas.isocalendar().week.to_numpy(dtype=np.int64),
+        'es_fin_de_semana': (dia_semana >= 5).astype(np.int64),
+    }, columns=COLUMNAS_CARACTERISTICAS)
+
+
+def serie_a_diccionario(fechas, valores):
+    """{'AAAA-MM-DD': valor} para guardar o devolver una predicción"""
+    return dict(zip(pd.DatetimeIndex(fechas).strftime('%Y-%m-%d'), np.asarray(valores, dtype=float).tolist()))
@@ -0,0 +1,255 @@
+# ai_models/entrenamiento.py
+"""
+Entrenamiento en segundo plano del modelo de ventas.
+
+La vista crea un ModeloIA en 'pendiente' y lo encola en core.tareas (o lo
+toma el comando entrenar_modelos en modo 'db'). El entrenamiento hace una
+búsqueda aleatoria acotada de hiperparámetros con validación cruzada para
+series de tiempo (cada fold valida con días posteriores a los que entrena),
+evaluando los folds en paralelo en procesos de joblib. El mejor conjunto se
+reentrena con todos los datos y solo se promueve a modelo activo si su RMSE de
+validación es menor que el del activo actual.
+
+Los procesos de joblib son MODELOS_IA_JOBS (-1 = todos los núcleos) en el
+worker de modo 'db'; encolado en los hilos del proceso web se acotan a
+MODELOS_IA_JOBS_HILOS.
+"""
+import logging
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import RandomizedSearchCV, TimeSeriesSplit
+from core.tareas import cola_tareas
+from .caracteristicas import caracteristicas_calendario
+from .models import ModeloIA
+from .pronosticos import precalcular_horizonte
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_MODELO = 'Random Forest Ventas'
+MINIMO_DIAS = 30
+
+# Valores posibles de cada hiperparámetro (la búsqueda prueba un subconjunto)
+ESPACIO_BUSQUEDA = {
+    'n_estimators': [100, 200, 400],
+    'max_depth': [6, 10, 16, None],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': [1.0, 'sqrt', 0.5],
+}
+
+
+def _entero(minimo, maximo):
+    return lambda valor: isinstance(valor, int) and not isinstance(valor, bool) and minimo <= valor <= maximo
+
+
+# Valores que la API acepta para restringir cada hiperparámetro del espacio
+VALORES_PERMITIDOS = {
+    'n_estimators': (_entero(10, 1000), 'un entero entre 10 y 1000'),
+    'max_depth': (lambda valor: valor is None or _entero(1, 64)(valor), 'null o un entero entre 1 y 64'),
+    'min_samples_leaf': (_entero(1, 100), 'un entero entre 1 y 100'),
+    'max_features': (
+        lambda valor: valor in ('sqrt', 'log2') or (isinstance(valor, float) and 0 < valor <= 1),
+        "'sqrt', 'log2' o un decimal mayor que 0 y hasta 1",
+    ),
+}
+MAXIMO_CANDIDATOS = 10
+
+METRICAS = {
+    'rmse': 'neg_root_mean_squared_error',
+    'mae': 'neg_mean_absolute_error',
+}
+
+
+class DatosInsuficientes(Exception):
+    """No hay suficientes días con ventas en el rango pedido"""
+
+
+def procesos_joblib(en_proceso_web=False):
+    """Procesos para joblib según MODELOS_IA_JOBS, acotados dentro del proceso web"""
+    procesos = getattr(settings, 'MODELOS_IA_JOBS', -1)
+    if procesos is None or procesos < 1:
+        procesos = os.cpu_count() or 1
+    if en_proceso_web:
+        procesos = min(procesos, getattr(settings, 'MODELOS_IA_JOBS_HILOS', 2))
+    return max(1, procesos)
+
+
+def encolar_entrenamiento(modelo):
+    """Programa el entrenamiento cuando se confirme la transacción"""
+    # Solo corre en los hilos de core.tareas, es decir, dentro de gunicorn
+    cola_tareas.encolar(procesar_entrenamiento, modelo.id, n_jobs=procesos_joblib(en_proceso_web=True))
+
+
+def crear_entrenamiento(fecha_inicio, fecha_fin, parametros=None):
+    """Registra un entrenamiento pendiente y lo encola"""
+    modelo = ModeloIA.objects.create(
+        nombre_modelo=NOMBRE_MODELO,
+        version=timezone.now().strftime('%Y%m%d%H%M%S'),
+        estado='pendiente',
+        parametros={
+            'fecha_inicio': str(fecha_inicio),
+            'fecha_fin': str(fecha_fin),
+            'busqueda': parametros or {},
+        },
+    )
+    encolar_entrenamiento(modelo)
+    return modelo
+
+
+def cargar_ventas_diarias(fecha_inicio, fecha_fin):
+    """Serie de ventas entregadas por día (resumen ventas_diarias)"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT fecha, SUM(monto_productos) as venta_total
+            FROM ventas_diarias
+            WHERE fecha BETWEEN %s AND %s
+            AND estado_pedido = 'entregado'
+            GROUP BY fecha
+            ORDER BY fecha
+        """, [fecha_inicio, fecha_fin])
+        filas = cursor.fetchall()
+    return pd.DataFrame(filas, columns=['fecha', 'venta_total'])
+
+
+def validar_restricciones(restricciones):
+    """
+    Errores {hiperparámetro: mensaje} de las restricciones pedidas para la
+    búsqueda; vacío si son válidas.
+    """
+    errores = {}
+    for nombre, valor in restricciones.items():
+        if nombre not in VALORES_PERMITIDOS:
+            errores[nombre] = f'Hiperparámetro desconocido; se aceptan: {", ".join(VALORES_PERMITIDOS)}'
+            continue
+        valores = valor if isinstance(valor, list) else [valor]
+        valido, descripcion = VALORES_PERMITIDOS[nombre]
+        if not valores:
+            errores[nombre] = 'La lista de candidatos no puede estar vacía'
+        elif len(valores) > MAXIMO_CANDIDATOS:
+            errores[nombre] = f'Como máximo {MAXIMO_CANDIDATOS} candidatos'
+        elif not all(valido(v) for v in valores):
+            errores[nombre] = f'Cada valor debe ser {descripcion}'
+    return errores
+
+
+def espacio_busqueda(restricciones=None):
+    """
+    Espacio de búsqueda, opcionalmente restringido por el usuario: un valor
+    fija el hiperparámetro y una lista limita los candidatos. Claves
+    desconocidas se ignoran.
+    """
+    espacio = dict(ESPACIO_BUSQUEDA)
+    for nombre, valor in (restricciones or {}).items():
+        if nombre in espacio:
+            espacio[nombre] = valor if isinstance(valor, list) and valor else [valor]
+    return espacio
+
+
+def entrenar(df, restricciones=None, iteraciones=None, n_jobs=None):
+    """
+    Busca hiperparámetros con TimeSeriesSplit y reentrena el mejor con todos
+    los datos. Devuelve (estimador, mejores_parametros, metricas).
+    """
+    if len(df) < MINIMO_DIAS:
+        raise DatosInsuficientes(f'Datos insuficientes para entrenar el modelo (mínimo {MINIMO_DIAS} días)')
+
+    iteraciones = iteraciones or getattr(settings, 'MODELOS_IA_BUSQUEDA_ITER', 10)
+    n_jobs = n_jobs or procesos_joblib()
+    X = caracteristicas_calendario(df['fecha'])
+    y = df['venta_total'].astype(float).to_numpy()
+
+    # Cada fold valida con al menos una semana posterior a su tramo de entrenamiento
+    particiones = TimeSeriesSplit(n_splits=max(2, min(5, len(df) // 7 - 1)))
+    busqueda = RandomizedSearchCV(
+        RandomForestRegressor(random_state=42, n_jobs=1),
+        espacio_busqueda(restricciones),
+        n_iter=iteraciones,
+        cv=particiones,
+        scoring=METRICAS,
+        refit=False,
+        n_jobs=n_jobs,
+        random_state=42,
+    )
+    busqueda.fit(X, y)
+
+    resultados = busqueda.cv_results_
+    mejor = int(np.argmin(resultados['rank_test_rmse']))
+    mejores_parametros = resultados['params'][mejor]
+
+    estimador = RandomForestRegressor(random_state=42, n_jobs=n_jobs, **mejores_parametros)
+    estimador.fit(X, y)
+    # En memoria el modelo predice con un solo hilo: las predicciones son pocas filas
+    estimador.set_params(n_jobs=1)
+
+    metricas = {
+        'RMSE': float(-resultados['mean_test_rmse'][mejor]),
+        'MAE': float(-resultados['mean_test_mae'][mejor]),
+        'RMSE_desviacion': float(resultados['std_test_rmse'][mejor]),
+        'folds': particiones.get_n_splits(),
+        'candidatos': len(resultados['params']),
+        'dias': len(df),
+    }
+    return estimador, mejores_parametros, metricas
+
+
+def ruta_modelo(modelo):
+    directorio = getattr(settings, 'MODELOS_IA_DIR', 'modelos')
+    os.makedirs(directorio, exist_ok=True)
+    return os.path.join(directorio, f'random_forest_ventas_{modelo.id}.joblib')
+
+
+def procesar_entrenamiento(modelo_id=None, n_jobs=None):
+    """
+    Reclama un entrenamiento pendiente (el indicado o el más antiguo) y lo
+    ejecuta con `n_jobs` procesos (por defecto procesos_joblib()). Devuelve
+    el ModeloIA procesado o None si no había ninguno.
+    """
+    modelo = ModeloIA.reclamar_pendiente(modelo_id)
+    if modelo is None:
+        return None
+
+    parametros = modelo.parametros or {}
+    try:
+        modelo.registrar_avance('cargando_datos', 5)
+        df = cargar_ventas_diarias(parametros.get('fecha_inicio'), parametros.get('fecha_fin'))
+
+        modelo.registrar_avance('busqueda_hiperparametros', 15, dias=len(df))
+        estimador, mejores_parametros, metricas = entrenar(df, parametros.get('busqueda'), n_jobs=n_jobs)
+
+        modelo.registrar_avance('guardando', 90)
+        ruta = ruta_modelo(modelo)
+        joblib.dump(estimador, ruta)
+
+        modelo.ruta_modelo = ruta
+        modelo.precision = metricas['RMSE']
+        modelo.fecha_entrenamiento = timezone.now()
+        modelo.estado = 'entrenado'
+        modelo.parametros = {
+            **parametros,
+            'hiperparametros': mejores_parametros,
+            'metricas': metricas,
+            'progreso': {'etapa': 'completado', 'porcentaje': 100},
+        }
+        modelo.save(update_fields=['ruta_modelo', 'precision', 'fecha_entrenamiento', 'estado', 'parametros'])
+
+        promovido = modelo.promover_si_mejora()
+        modelo.parametros['promovido'] = promovido
+        modelo.save(update_fields=['parametros'])
+    except Exception as e:
+        modelo.estado = 'error'
+        modelo.parametros = {**parametros, 'error': str(e), 'progreso': {'etapa': 'error', 'porcentaje': 100}}
+        modelo.save(update_fields=['estado', 'parametros'])
+        return modelo
+
+    if promovido:
+        # El dashboard pedirá este horizonte enseguida; si falla se calcula a demanda
+        try:
+            precalcular_horizonte(modelo)
+        except Exception:
+            logger.exception('No se pudo precalcular el horizonte del modelo %s', modelo.id)
+    return modelo
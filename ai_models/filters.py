@@ -0,0 +1,32 @@
+# ai_models/filters.py
+import django_filters
+from .models import PrediccionVentas, PronosticoDiario
+
+class PrediccionVentasFilter(django_filters.FilterSet):
+    # Predicciones cuyo rango se cruza con [fecha_desde, fecha_hasta]
+    fecha_desde = django_filters.DateFilter(field_name='fecha_fin', lookup_expr='gte')
+    fecha_hasta = django_filters.DateFilter(field_name='fecha_inicio', lookup_expr='lte')
+
+    class Meta:
+        model = PrediccionVentas
+        fields = ['modelo', 'categoria', 'producto', 'fecha_desde', 'fecha_hasta']
+
+class PronosticoDiarioFilter(django_filters.FilterSet):
+    fecha_desde = django_filters.DateFilter(field_name='fecha', lookup_expr='gte')
+    fecha_hasta = django_filters.DateFilter(field_name='fecha', lookup_expr='lte')
+    # Sin categoría ni producto se devuelve la serie de ventas totales
+    categoria = django_filters.NumberFilter(field_name='categoria_id')
+    producto = django_filters.NumberFilter(field_name='producto_id')
+
+    class Meta:
+        model = PronosticoDiario
+        fields = ['modelo', 'categoria', 'producto', 'fecha_desde', 'fecha_hasta']
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        datos = self.form.cleaned_data
+        if datos.get('categoria') is None:
+            queryset = queryset.filter(categoria__isnull=True)
+        if datos.get('producto') is None:
+            queryset = queryset.filter(producto__isnull=True)
+        return queryset
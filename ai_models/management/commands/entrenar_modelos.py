@@ -0,0 +1,33 @@
+# ai_models/management/commands/entrenar_modelos.py
+import time
+from django.core.management.base import BaseCommand
+from ai_models.entrenamiento import procesar_entrenamiento
+
+
+class Command(BaseCommand):
+    help = 'Worker que ejecuta los entrenamientos de modelos de IA pendientes (TAREAS_MODO=db)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=0,
+            help='Segundos entre revisiones de la cola; 0 la vacía una sola vez',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+
+        # Uno a la vez: cada entrenamiento ya usa todos los núcleos
+        while True:
+            while (modelo := procesar_entrenamiento()) is not None:
+                self.stdout.write(
+                    f'Modelo {modelo.id}: {modelo.estado} | RMSE: {modelo.precision} | '
+                    f'Promovido: {(modelo.parametros or {}).get("promovido", False)}'
+                )
+
+            if not intervalo:
+                break
+            time.sleep(intervalo)
+
+        self.stdout.write(self.style.SUCCESS('✅ Cola de entrenamientos procesada'))
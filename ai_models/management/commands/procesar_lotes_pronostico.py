@@ -0,0 +1,35 @@
+# ai_models/management/commands/procesar_lotes_pronostico.py
+import time
+from django.core.management.base import BaseCommand
+from ai_models.pronostico_lotes import procesar_lote
+
+
+class Command(BaseCommand):
+    help = 'Worker que ejecuta los pronósticos por lotes pendientes (TAREAS_MODO=db)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=0,
+            help='Segundos entre revisiones de la cola; 0 la vacía una sola vez',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+
+        # Uno a la vez: cada lote ya reparte sus series entre MODELOS_IA_JOBS procesos
+        while True:
+            while (lote := procesar_lote()) is not None:
+                resumen = lote.resumen or {}
+                self.stdout.write(
+                    f'Lote {lote.id}: {lote.estado} | Predicciones: {resumen.get("predicciones", 0)} | '
+                    f'Tiempo: {resumen.get("tiempo_total_segundos", "-")} s'
+                    + (f' | Error: {lote.error}' if lote.error else '')
+                )
+
+            if not intervalo:
+                break
+            time.sleep(intervalo)
+
+        self.stdout.write(self.style.SUCCESS('✅ Cola de pronósticos por lotes procesada'))
@@ -0,0 +1,52 @@
+# ai_models/management/commands/pronosticar_lotes.py
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ai_models.entrenamiento import NOMBRE_MODELO
+from ai_models.models import ModeloIA
+from ai_models.pronostico_lotes import pronosticar_lote
+
+
+class Command(BaseCommand):
+    help = 'Pronostica las ventas de cada categoría (y de los productos más vendidos) en un solo lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help='Primer día a pronosticar (por defecto mañana)')
+        parser.add_argument('--dias', type=int, default=30, help='Días a pronosticar')
+        parser.add_argument('--historia', type=int, default=365, help='Días de historia para entrenar')
+        parser.add_argument('--top-productos', type=int, default=0, help='Pronosticar también los N productos más vendidos')
+        parser.add_argument('--objetivo', choices=['monto', 'unidades'], default='monto')
+        parser.add_argument('--modelo', type=int, help='ModeloIA cuyos hiperparámetros se usan (por defecto el activo)')
+        parser.add_argument('--procesos', type=int, help='Procesos del pool (por defecto MODELOS_IA_JOBS)')
+
+    def handle(self, *args, **options):
+        if options['modelo']:
+            modelo = ModeloIA.objects.filter(id=options['modelo']).first()
+        else:
+            modelo = ModeloIA.obtener_activo(NOMBRE_MODELO)
+        if modelo is None:
+            raise CommandError('No hay un modelo para tomar los hiperparámetros; entrena uno o usa --modelo')
+
+        desde = options['desde'] or timezone.localdate() + timedelta(days=1)
+        hasta = desde + timedelta(days=max(1, options['dias']) - 1)
+
+        resumen = pronosticar_lote(
+            modelo,
+            desde,
+            hasta,
+            dias_historia=options['historia'],
+            top_productos=options['top_productos'],
+            objetivo=options['objetivo'],
+            procesos=options['procesos'],
+        )
+
+        for tiempo in resumen['tiempos']:
+            serie = ', '.join(f'{clave}={valor}' for clave, valor in tiempo.items())
+            self.stdout.write(f'  {serie}')
+        if resumen['omitidas']:
+            self.stdout.write(f'Series omitidas por pocos datos: {len(resumen["omitidas"])}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resumen["predicciones"]} pronósticos del {desde} al {hasta} '
+            f'en {resumen["tiempo_total_segundos"]} s con {resumen["procesos"]} procesos (lote {resumen["lote"]})'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_models', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modeloia',
+            name='activo',
+            field=models.BooleanField(default=False),
+        ),
+    ]
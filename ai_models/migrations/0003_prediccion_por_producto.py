@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_busqueda_texto_completo'),
+        ('ai_models', '0002_modelo_activo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediccionventas',
+            name='producto',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.producto'),
+        ),
+    ]
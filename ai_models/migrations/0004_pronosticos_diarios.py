@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_busqueda_texto_completo'),
+        ('ai_models', '0003_prediccion_por_producto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('valor', models.FloatField()),
+                ('fecha_calculo', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'pronosticos_diarios',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='prediccionventas',
+            index=models.Index(fields=['modelo', 'fecha_inicio', 'fecha_fin'], name='predicciones_modelo_rango_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediccionventas',
+            index=models.Index(fields=['-fecha_prediccion', '-id'], name='predicciones_fecha_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='pronosticodiario',
+            name='categoria',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.categoria'),
+        ),
+        migrations.AddField(
+            model_name='pronosticodiario',
+            name='modelo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ai_models.modeloia'),
+        ),
+        migrations.AddField(
+            model_name='pronosticodiario',
+            name='producto',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.producto'),
+        ),
+        migrations.AddIndex(
+            model_name='pronosticodiario',
+            index=models.Index(fields=['modelo', 'categoria', 'producto', 'fecha'], name='pronosticos_serie_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pronosticodiario',
+            constraint=models.UniqueConstraint(models.F('modelo'), django.db.models.functions.comparison.Coalesce(models.F('categoria_id'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('producto_id'), models.Value(0)), models.F('fecha'), name='pronosticos_diarios_unico'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_models', '0004_pronosticos_diarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LotePronostico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(default='pendiente', max_length=50)),
+                ('parametros', models.JSONField()),
+                ('resumen', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True)),
+                ('fecha_fin_proceso', models.DateTimeField(blank=True, null=True)),
+                ('modelo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ai_models.modeloia')),
+            ],
+            options={
+                'db_table': 'lotes_pronostico',
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
 # ai_models/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 class ModeloIA(models.Model):
@@ -8,8 +10,10 @@ class ModeloIA(models.Model):
     ruta_modelo = models.CharField(max_length=512, null=True, blank=True)
     fecha_entrenamiento = models.DateTimeField(null=True, blank=True)
     parametros = models.JSONField(null=True, blank=True)
-    estado = models.CharField(max_length=50, default='entrenado')  # entrenado, entrenando, error
+    estado = models.CharField(max_length=50, default='entrenado')  # pendiente, entrenando, entrenado, error
     precision = models.FloatField(null=True, blank=True)
+    # El modelo que se usa cuando una predicción no indica cuál
+    activo = models.BooleanField(default=False)
     
     def actualizar_modelo(self, nueva_ruta, nueva_version=None):
         """Actualizar versión del modelo"""
@@ -19,6 +23,54 @@ class ModeloIA(models.Model):
         self.fecha_entrenamiento = timezone.now()
         self.save()
 
+        from .registro import registro_modelos
+        registro_modelos.invalidar(self.id)
+        # Los pronósticos guardados eran del archivo anterior
+        PronosticoDiario.objects.filter(modelo=self).delete()
+    
+    @classmethod
+    def obtener_activo(cls, nombre_modelo):
+        """Modelo promovido para el nombre dado, o None"""
+        return cls.objects.filter(nombre_modelo=nombre_modelo, activo=True).order_by('-id').first()
+    
+    @classmethod
+    def reclamar_pendiente(cls, modelo_id=None):
+        """Pasa un entrenamiento de 'pendiente' a 'entrenando' (SKIP LOCKED entre workers)"""
+        with transaction.atomic():
+            pendientes = cls.objects.select_for_update(skip_locked=True).filter(estado='pendiente')
+            if modelo_id is not None:
+                pendientes = pendientes.filter(id=modelo_id)
+            modelo = pendientes.order_by('id').first()
+            if modelo is None:
+                return None
+            modelo.estado = 'entrenando'
+            modelo.save(update_fields=['estado'])
+        return modelo
+    
+    def registrar_avance(self, etapa, porcentaje, **datos):
+        """Guarda en parametros['progreso'] la etapa actual del entrenamiento"""
+        self.parametros = {**(self.parametros or {}), 'progreso': {'etapa': etapa, 'porcentaje': porcentaje, **datos}}
+        self.save(update_fields=['parametros'])
+    
+    def promover_si_mejora(self):
+        """
+        Marca este modelo como activo si su error (precision = RMSE) es menor
+        que el del modelo activo actual. Devuelve True si fue promovido.
+        """
+        with transaction.atomic():
+            activos = list(
+                ModeloIA.objects.select_for_update()
+                .filter(nombre_modelo=self.nombre_modelo, activo=True)
+                .exclude(id=self.id)
+            )
+            actual = min((m.precision for m in activos if m.precision is not None), default=None)
+            if actual is not None and (self.precision is None or self.precision >= actual):
+                return False
+            ModeloIA.objects.filter(id__in=[m.id for m in activos]).update(activo=False)
+            self.activo = True
+            self.save(update_fields=['activo'])
+        return True
+
     class Meta:
         db_table = 'modelos_ia'
 
@@ -28,8 +80,84 @@ class PrediccionVentas(models.Model):
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
     categoria = models.ForeignKey('products.Categoria', on_delete=models.CASCADE, null=True, blank=True)
+    producto = models.ForeignKey('products.Producto', on_delete=models.CASCADE, null=True, blank=True)
     resultado_prediccion = models.JSONField()  # {fecha: valor_prediccion}
     metricas = models.JSONField(null=True, blank=True)  # RMSE, MAE, etc.
     
     class Meta:
-        db_table = 'predicciones_ventas'
\ No newline at end of file
+        db_table = 'predicciones_ventas'
+        indexes = [
+            models.Index(fields=['modelo', 'fecha_inicio', 'fecha_fin'], name='predicciones_modelo_rango_idx'),
+            models.Index(fields=['-fecha_prediccion', '-id'], name='predicciones_fecha_id_idx'),
+        ]
+
+class PronosticoDiario(models.Model):
+    """
+    Valor pronosticado de un día por un modelo, para las ventas totales
+    (sin categoría ni producto), una categoría o un producto. Se calcula una
+    sola vez por versión del modelo y los rangos se arman leyendo estas filas.
+    """
+    modelo = models.ForeignKey(ModeloIA, on_delete=models.CASCADE)
+    categoria = models.ForeignKey('products.Categoria', on_delete=models.CASCADE, null=True, blank=True)
+    producto = models.ForeignKey('products.Producto', on_delete=models.CASCADE, null=True, blank=True)
+    fecha = models.DateField()
+    valor = models.FloatField()
+    fecha_calculo = models.DateTimeField(auto_now_add=True)
+    
+    @classmethod
+    def serie(cls, modelo, categoria_id=None, producto_id=None):
+        """Filas de una serie: total (sin filtros), categoría o producto"""
+        return cls.objects.filter(modelo=modelo, categoria_id=categoria_id, producto_id=producto_id)
+    
+    @classmethod
+    def obtener_rango(cls, modelo, fecha_inicio, fecha_fin, categoria_id=None, producto_id=None):
+        """{fecha: valor} de los días ya calculados del rango"""
+        return dict(
+            cls.serie(modelo, categoria_id, producto_id)
+            .filter(fecha__range=(fecha_inicio, fecha_fin))
+            .values_list('fecha', 'valor')
+        )
+
+    class Meta:
+        db_table = 'pronosticos_diarios'
+        constraints = [
+            models.UniqueConstraint(
+                F('modelo'), Coalesce(F('categoria_id'), Value(0)), Coalesce(F('producto_id'), Value(0)), F('fecha'),
+                name='pronosticos_diarios_unico',
+            ),
+        ]
+        indexes = [
+            # modelo = x AND categoria_id IS NULL AND producto_id IS NULL AND fecha BETWEEN ...
+            models.Index(fields=['modelo', 'categoria', 'producto', 'fecha'], name='pronosticos_serie_fecha_idx'),
+        ]
+
+class LotePronostico(models.Model):
+    """
+    Pronóstico por lotes solicitado desde la API. Se encola en core.tareas
+    (o lo toma el comando procesar_lotes_pronostico en modo 'db') y al
+    terminar guarda el resumen de pronosticar_lote.
+    """
+    modelo = models.ForeignKey(ModeloIA, on_delete=models.CASCADE)
+    estado = models.CharField(max_length=50, default='pendiente')  # pendiente, procesando, completado, error
+    parametros = models.JSONField()  # fecha_inicio, fecha_fin, dias_historia, top_productos, objetivo
+    resumen = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    fecha_solicitud = models.DateTimeField(auto_now_add=True)
+    fecha_fin_proceso = models.DateTimeField(null=True, blank=True)
+    
+    @classmethod
+    def reclamar_pendiente(cls, lote_id=None):
+        """Pasa un lote de 'pendiente' a 'procesando' (SKIP LOCKED entre workers)"""
+        with transaction.atomic():
+            pendientes = cls.objects.select_for_update(skip_locked=True).filter(estado='pendiente')
+            if lote_id is not None:
+                pendientes = pendientes.filter(id=lote_id)
+            lote = pendientes.order_by('id').first()
+            if lote is None:
+                return None
+            lote.estado = 'procesando'
+            lote.save(update_fields=['estado'])
+        return lote
+
+    class Meta:
+        db_table = 'lotes_pronostico'
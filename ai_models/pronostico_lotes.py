@@ -0,0 +1,238 @@
+# ai_models/pronostico_lotes.py
+"""
+Pronóstico por lotes para cada categoría (y opcionalmente los N productos
+más vendidos) en una sola ejecución.
+
+Las series salen de una consulta por dimensión (ventas_diarias para las
+categorías, detalle_pedido para los productos) y comparten la misma matriz
+de características de calendario, que se calcula una vez y se envía una vez
+a cada proceso del pool. Cada serie se entrena y predice en un proceso de
+trabajador_pronostico y los resultados se guardan con bulk_create en
+PrediccionVentas y, día por día, en PronosticoDiario.
+
+Desde la API el lote se registra como LotePronostico y se encola en
+core.tareas; dentro del proceso web el pool se acota a MODELOS_IA_JOBS_HILOS.
+"""
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+import pandas as pd
+from django.db import connection
+from django.utils import timezone
+from analytics.resumenes import inicio_del_dia
+from core.tareas import cola_tareas
+from .caracteristicas import caracteristicas_calendario, rango_fechas, serie_a_diccionario
+from .entrenamiento import procesos_joblib
+from .models import LotePronostico, PrediccionVentas
+from .pronosticos import reemplazar_series
+from . import trabajador_pronostico
+
+OBJETIVOS = {
+    'monto': 'SUM(monto_productos)',
+    'unidades': 'SUM(unidades)',
+}
+OBJETIVOS_DETALLE = {
+    'monto': 'SUM(dp.cantidad * dp.precio_unitario_en_el_momento)',
+    'unidades': 'SUM(dp.cantidad)',
+}
+HIPERPARAMETROS_POR_DEFECTO = {'n_estimators': 100, 'max_depth': 10}
+# Series con menos días de venta no se pronostican
+MINIMO_DIAS_CON_VENTAS = 7
+
+
+def _serie_ancha(filas, indice):
+    """[(clave, fecha, valor), ...] -> DataFrame fechas x claves con 0 en los días sin ventas"""
+    if not filas:
+        return pd.DataFrame(index=indice)
+    largo = pd.DataFrame(filas, columns=['clave', 'fecha', 'valor'])
+    largo['fecha'] = pd.to_datetime(largo['fecha'])
+    ancho = largo.pivot_table(index='fecha', columns='clave', values='valor', aggfunc='sum')
+    return ancho.reindex(indice, fill_value=0).fillna(0).astype(float)
+
+
+def series_por_categoria(desde, hasta, objetivo='monto'):
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT categoria_id, fecha, {OBJETIVOS[objetivo]}
+            FROM ventas_diarias
+            WHERE fecha BETWEEN %s AND %s
+            AND estado_pedido = 'entregado'
+            AND categoria_id IS NOT NULL
+            GROUP BY categoria_id, fecha
+        """, [desde, hasta])
+        filas = cursor.fetchall()
+    return _serie_ancha(filas, rango_fechas(desde, hasta))
+
+
+def series_top_productos(desde, hasta, cantidad, objetivo='monto'):
+    """Series diarias de los `cantidad` productos con más unidades entregadas en el rango"""
+    zona = timezone.get_default_timezone_name()
+    inicio, fin = inicio_del_dia(desde), inicio_del_dia(hasta + timedelta(days=1))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH ventas AS (
+                SELECT dp.producto_id, (p.fecha_pedido AT TIME ZONE %s)::date AS fecha,
+                       dp.cantidad, dp.precio_unitario_en_el_momento
+                FROM pedidos p
+                JOIN detalle_pedido dp ON dp.pedido_id = p.id
+                WHERE p.fecha_pedido >= %s AND p.fecha_pedido < %s
+                AND p.estado_pedido = 'entregado'
+            ), top AS (
+                SELECT producto_id FROM ventas
+                GROUP BY producto_id
+                ORDER BY SUM(cantidad) DESC, producto_id
+                LIMIT %s
+            )
+            SELECT dp.producto_id, dp.fecha, {OBJETIVOS_DETALLE[objetivo]}
+            FROM ventas dp
+            JOIN top USING (producto_id)
+            GROUP BY dp.producto_id, dp.fecha
+        """, [zona, inicio, fin, cantidad])
+        filas = cursor.fetchall()
+    return _serie_ancha(filas, rango_fechas(desde, hasta))
+
+
+def _procesos(cantidad_series, procesos=None):
+    return max(1, min(procesos or procesos_joblib(), cantidad_series))
+
+
+def _ejecutar(tareas, X_historia, X_horizonte, procesos):
+    """Corre trabajador_pronostico.pronosticar para cada tarea, en paralelo si procesos > 1"""
+    if procesos == 1:
+        trabajador_pronostico.inicializar(X_historia, X_horizonte)
+        return [trabajador_pronostico.pronosticar(*tarea) for tarea in tareas]
+
+    # 'spawn': los procesos no heredan conexiones ni hilos del proceso de Django
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=trabajador_pronostico.inicializar,
+        initargs=(X_historia, X_horizonte),
+    ) as pool:
+        futuros = [pool.submit(trabajador_pronostico.pronosticar, *tarea) for tarea in tareas]
+        return [futuro.result() for futuro in futuros]
+
+
+def pronosticar_lote(modelo, fecha_inicio, fecha_fin, dias_historia=365, top_productos=0,
+                     objetivo='monto', procesos=None):
+    """
+    Pronostica [fecha_inicio, fecha_fin] para cada categoría (y los
+    `top_productos` productos más vendidos) con los hiperparámetros de
+    `modelo`, entrenando con los `dias_historia` días anteriores a
+    fecha_inicio. Devuelve un resumen con los tiempos de cada serie.
+    """
+    inicio_total = time.perf_counter()
+    historia_hasta = fecha_inicio - timedelta(days=1)
+    historia_desde = fecha_inicio - timedelta(days=dias_historia)
+
+    series = {'categoria': series_por_categoria(historia_desde, historia_hasta, objetivo)}
+    if top_productos:
+        series['producto'] = series_top_productos(historia_desde, historia_hasta, top_productos, objetivo)
+
+    # Matriz de características compartida por todas las series
+    fechas_historia = rango_fechas(historia_desde, historia_hasta)
+    fechas_horizonte = rango_fechas(fecha_inicio, fecha_fin)
+    X_historia = caracteristicas_calendario(fechas_historia).to_numpy()
+    X_horizonte = caracteristicas_calendario(fechas_horizonte).to_numpy()
+
+    hiperparametros = (modelo.parametros or {}).get('hiperparametros') or HIPERPARAMETROS_POR_DEFECTO
+    dias_validacion = min(28, len(fechas_historia) // 5)
+
+    tareas, omitidas = [], []
+    for dimension, tabla in series.items():
+        for clave_id in tabla.columns:
+            y = tabla[clave_id].to_numpy()
+            if (y > 0).sum() < MINIMO_DIAS_CON_VENTAS:
+                omitidas.append({dimension: int(clave_id)})
+                continue
+            tareas.append(((dimension, int(clave_id)), y, hiperparametros, dias_validacion))
+
+    procesos = _procesos(len(tareas), procesos)
+    resultados = _ejecutar(tareas, X_historia, X_horizonte, procesos) if tareas else []
+
+    lote = uuid.uuid4().hex
+    predicciones = []
+    tiempos = []
+    por_serie = {}
+    for (dimension, clave_id), valores, metricas in resultados:
+        por_serie[(dimension, clave_id)] = serie_a_diccionario(fechas_horizonte, valores)
+        predicciones.append(PrediccionVentas(
+            modelo=modelo,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            **{f'{dimension}_id': clave_id},
+            resultado_prediccion=por_serie[(dimension, clave_id)],
+            metricas={
+                **metricas,
+                'lote': lote,
+                'objetivo': objetivo,
+                'dias_historia': dias_historia,
+                'predicciones_generadas': len(valores),
+                'rango_fechas': f'{fecha_inicio} a {fecha_fin}',
+            },
+        ))
+        tiempos.append({dimension: clave_id, **metricas})
+    PrediccionVentas.objects.bulk_create(predicciones)
+    reemplazar_series(modelo, fecha_inicio, fecha_fin, por_serie)
+
+    return {
+        'lote': lote,
+        'modelo_id': modelo.id,
+        'predicciones': len(predicciones),
+        'omitidas': omitidas,
+        'procesos': procesos,
+        'tiempos': tiempos,
+        'tiempo_total_segundos': round(time.perf_counter() - inicio_total, 3),
+    }
+
+
+# =============================================================================
+# LOTES ENCOLADOS
+# =============================================================================
+
+def crear_lote(modelo, fecha_inicio, fecha_fin, dias_historia=365, top_productos=0, objetivo='monto'):
+    """Registra un LotePronostico pendiente y lo encola al confirmar la transacción"""
+    lote = LotePronostico.objects.create(
+        modelo=modelo,
+        parametros={
+            'fecha_inicio': str(fecha_inicio),
+            'fecha_fin': str(fecha_fin),
+            'dias_historia': dias_historia,
+            'top_productos': top_productos,
+            'objetivo': objetivo,
+        },
+    )
+    # Solo corre en los hilos de core.tareas, es decir, dentro de gunicorn
+    cola_tareas.encolar(procesar_lote, lote.id, procesos=procesos_joblib(en_proceso_web=True))
+    return lote
+
+
+def procesar_lote(lote_id=None, procesos=None):
+    """
+    Reclama un lote pendiente (el indicado o el más antiguo) y lo ejecuta.
+    Devuelve el LotePronostico procesado o None si no había ninguno.
+    """
+    lote = LotePronostico.reclamar_pendiente(lote_id)
+    if lote is None:
+        return None
+
+    parametros = lote.parametros
+    try:
+        lote.resumen = pronosticar_lote(
+            lote.modelo,
+            date.fromisoformat(parametros['fecha_inicio']),
+            date.fromisoformat(parametros['fecha_fin']),
+            dias_historia=parametros['dias_historia'],
+            top_productos=parametros['top_productos'],
+            objetivo=parametros['objetivo'],
+            procesos=procesos,
+        )
+        lote.estado = 'completado'
+    except Exception as e:
+        lote.estado = 'error'
+        lote.error = str(e)
+    lote.fecha_fin_proceso = timezone.now()
+    lote.save(update_fields=['resumen', 'estado', 'error', 'fecha_fin_proceso'])
+    return lote
@@ -0,0 +1,85 @@
+# ai_models/pronosticos.py
+"""
+Pronósticos diarios guardados (PronosticoDiario).
+
+Un rango se arma leyendo los días ya calculados y solo se predicen los que
+faltan, así que pedidos repetidos o solapados del dashboard no vuelven a
+ejecutar el modelo. Al entrenarse un modelo que queda activo se precalcula
+su horizonte por defecto.
+
+Las series por categoría solo las calcula el pronóstico por lotes
+(pronostico_lotes); aquí únicamente se leen.
+"""
+from datetime import timedelta
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+from .caracteristicas import caracteristicas_calendario, rango_fechas
+from .models import PronosticoDiario
+from .registro import registro_modelos
+
+
+class SerieNoDisponible(Exception):
+    """La categoría no tiene pronóstico guardado para todo el rango pedido"""
+
+
+def pronosticar_rango(modelo, fecha_inicio, fecha_fin, categoria_id=None):
+    """
+    Pronóstico de ventas de [fecha_inicio, fecha_fin] con `modelo`: el total
+    o, con categoria_id, la serie de esa categoría.
+    Devuelve ({'AAAA-MM-DD': valor}, cantidad de días que hubo que calcular).
+    """
+    guardados = PronosticoDiario.obtener_rango(modelo, fecha_inicio, fecha_fin, categoria_id=categoria_id)
+    fechas = rango_fechas(fecha_inicio, fecha_fin)
+    faltantes = fechas[~fechas.isin(pd.DatetimeIndex(list(guardados)))]
+
+    if len(faltantes) and categoria_id is not None:
+        # El estimador del modelo predice el total; no sirve para una categoría
+        raise SerieNoDisponible(
+            f'No hay pronóstico de la categoría {categoria_id} para {len(faltantes)} días del rango; '
+            'genérelo con el pronóstico por lotes'
+        )
+
+    if len(faltantes):
+        estimador = registro_modelos.obtener(modelo)
+        valores = estimador.predict(caracteristicas_calendario(faltantes))
+        nuevos = [
+            PronosticoDiario(modelo=modelo, fecha=fecha.date(), valor=float(valor))
+            for fecha, valor in zip(faltantes, valores)
+        ]
+        # Otro proceso pudo calcular los mismos días: el primero gana
+        PronosticoDiario.objects.bulk_create(nuevos, ignore_conflicts=True)
+        guardados.update((pronostico.fecha, pronostico.valor) for pronostico in nuevos)
+
+    resultado = {fecha.strftime('%Y-%m-%d'): guardados[fecha.date()] for fecha in fechas}
+    return resultado, len(faltantes)
+
+
+def precalcular_horizonte(modelo, dias=None):
+    """Deja calculados los próximos `dias` (MODELOS_IA_HORIZONTE) del modelo"""
+    dias = dias or getattr(settings, 'MODELOS_IA_HORIZONTE', 90)
+    inicio = timezone.localdate()
+    return pronosticar_rango(modelo, inicio, inicio + timedelta(days=dias - 1))[1]
+
+
+def reemplazar_series(modelo, fecha_inicio, fecha_fin, series):
+    """
+    Guarda pronósticos por categoría o producto reemplazando los del rango.
+    `series` es {('categoria' | 'producto', id): {'AAAA-MM-DD': valor}}.
+    """
+    categorias = [clave for dimension, clave in series if dimension == 'categoria']
+    productos = [clave for dimension, clave in series if dimension == 'producto']
+    en_rango = PronosticoDiario.objects.filter(modelo=modelo, fecha__range=(fecha_inicio, fecha_fin))
+    en_rango.filter(categoria_id__in=categorias, producto__isnull=True).delete()
+    en_rango.filter(producto_id__in=productos, categoria__isnull=True).delete()
+
+    PronosticoDiario.objects.bulk_create([
+        PronosticoDiario(
+            modelo=modelo,
+            fecha=pd.Timestamp(fecha).date(),
+            valor=valor,
+            **{f'{dimension}_id': clave},
+        )
+        for (dimension, clave), valores in series.items()
+        for fecha, valor in valores.items()
+    ], ignore_conflicts=True)
@@ -0,0 +1,103 @@
+# ai_models/registro.py
+"""
+Registro de modelos de IA cargados en memoria.
+
+Cada proceso guarda los estimadores deserializados en un LRU con clave
+(id, versión, mtime del archivo): si otro worker reentrena o actualiza un
+modelo, la versión o el mtime cambian y la siguiente consulta lo recarga sin
+necesidad de avisar a los demás procesos.
+
+Para compartir memoria entre workers de gunicorn hay dos caminos:
+
+- MODELOS_IA_MMAP = 'r': joblib abre por memoria mapeada los arreglos NumPy
+  que el estimador guarda como atributos (archivos sin compresión). Los
+  árboles de scikit-learn copian sus nodos a memoria propia al deserializarse,
+  así que para RandomForest esto no ahorra nada.
+- preload_app (gunicorn.conf.py): el proceso maestro precarga los modelos
+  antes de crear los workers y estos heredan las páginas por copy-on-write.
+  Es lo que sirve para los bosques aleatorios.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+import joblib
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RegistroModelos:
+    """LRU por proceso de estimadores cargados desde ModeloIA.ruta_modelo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cargados = OrderedDict()
+
+    @property
+    def capacidad(self):
+        return max(1, getattr(settings, 'MODELOS_IA_CACHE_MAX', 4))
+
+    @staticmethod
+    def clave(modelo):
+        return (modelo.id, modelo.version, os.stat(modelo.ruta_modelo).st_mtime_ns)
+
+    def obtener(self, modelo):
+        """Devuelve el estimador del ModeloIA, cargándolo si no está en memoria"""
+        if not modelo.ruta_modelo:
+            raise FileNotFoundError(f'El modelo {modelo.id} no tiene archivo asociado')
+        clave = self.clave(modelo)
+
+        with self._lock:
+            if clave in self._cargados:
+                self._cargados.move_to_end(clave)
+                return self._cargados[clave]
+
+        # La carga se hace fuera del lock para no frenar otras predicciones
+        estimador = joblib.load(modelo.ruta_modelo, mmap_mode=getattr(settings, 'MODELOS_IA_MMAP', None))
+
+        with self._lock:
+            # Una versión anterior del mismo modelo ya no se va a usar
+            for anterior in [c for c in self._cargados if c[0] == modelo.id and c != clave]:
+                del self._cargados[anterior]
+            self._cargados[clave] = estimador
+            self._cargados.move_to_end(clave)
+            while len(self._cargados) > self.capacidad:
+                self._cargados.popitem(last=False)
+        return estimador
+
+    def invalidar(self, modelo_id=None):
+        """Descarta un modelo (o todos) de la memoria de este proceso"""
+        with self._lock:
+            if modelo_id is None:
+                self._cargados.clear()
+                return
+            for clave in [c for c in self._cargados if c[0] == modelo_id]:
+                del self._cargados[clave]
+
+    def precargar(self, cantidad=None):
+        """Carga el modelo activo y los entrenados más recientes (al iniciar un worker)"""
+        from .models import ModeloIA
+
+        cantidad = cantidad or self.capacidad
+        modelos = (
+            ModeloIA.objects.filter(estado='entrenado', ruta_modelo__isnull=False)
+            .exclude(ruta_modelo='')
+            .order_by('-activo', '-fecha_entrenamiento', '-id')[:cantidad]
+        )
+        cargados = 0
+        for modelo in reversed(list(modelos)):
+            try:
+                self.obtener(modelo)
+                cargados += 1
+            except Exception:
+                logger.warning('No se pudo precargar el modelo %s (%s)', modelo.id, modelo.ruta_modelo, exc_info=True)
+        return cargados
+
+    @property
+    def claves(self):
+        with self._lock:
+            return list(self._cargados)
+
+
+registro_modelos = RegistroModelos()
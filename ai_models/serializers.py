@@ -1,6 +1,7 @@
 # ai_models/serializers.py
 from rest_framework import serializers
-from .models import ModeloIA, PrediccionVentas
+from .entrenamiento import validar_restricciones
+from .models import ModeloIA, PrediccionVentas, PronosticoDiario, LotePronostico
 
 class ModeloIASerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,18 +11,53 @@ class ModeloIASerializer(serializers.ModelSerializer):
 class PrediccionVentasSerializer(serializers.ModelSerializer):
     modelo_nombre = serializers.CharField(source='modelo.nombre_modelo', read_only=True)
     categoria_nombre = serializers.CharField(source='categoria.nombre_categoria', read_only=True)
+    producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     
     class Meta:
         model = PrediccionVentas
         fields = '__all__'
 
+class PronosticoDiarioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PronosticoDiario
+        fields = ('id', 'modelo', 'categoria', 'producto', 'fecha', 'valor')
+
+class LotePronosticoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LotePronostico
+        fields = '__all__'
+
 class EntrenamientoSerializer(serializers.Serializer):
     fecha_inicio = serializers.DateField()
     fecha_fin = serializers.DateField()
+    # Restricciones del espacio de búsqueda: {hiperparámetro: valor o lista de valores}
     parametros = serializers.JSONField(required=False)
+    
+    def validate_parametros(self, valor):
+        if not isinstance(valor, dict):
+            raise serializers.ValidationError('Debe ser un objeto {hiperparámetro: valor o lista de valores}')
+        errores = validar_restricciones(valor)
+        if errores:
+            raise serializers.ValidationError(errores)
+        return valor
 
 class PrediccionSolicitudSerializer(serializers.Serializer):
-    modelo_id = serializers.IntegerField()
+    # Sin modelo_id se usa el modelo activo
+    modelo_id = serializers.IntegerField(required=False, allow_null=True)
     fecha_inicio = serializers.DateField()
     fecha_fin = serializers.DateField()
-    categoria_id = serializers.IntegerField(required=False, allow_null=True)
\ No newline at end of file
+    categoria_id = serializers.IntegerField(required=False, allow_null=True)
+
+class PronosticoLoteSerializer(serializers.Serializer):
+    # Sin modelo_id se usan los hiperparámetros del modelo activo
+    modelo_id = serializers.IntegerField(required=False, allow_null=True)
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    dias_historia = serializers.IntegerField(default=365, min_value=30, max_value=1825)
+    top_productos = serializers.IntegerField(default=0, min_value=0, max_value=500)
+    objetivo = serializers.ChoiceField(choices=['monto', 'unidades'], default='monto')
+    
+    def validate(self, data):
+        if data['fecha_fin'] < data['fecha_inicio']:
+            raise serializers.ValidationError('fecha_fin debe ser posterior a fecha_inicio')
+        return data
@@ -1,3 +1,161 @@
-from django.test import TestCase
+# ai_models/tests.py
+import os
+from datetime import date, timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.pruebas import crear_usuario
+from products.models import Categoria
+from .entrenamiento import (NOMBRE_MODELO, crear_entrenamiento, procesar_entrenamiento, procesos_joblib,
+                            validar_restricciones)
+from .models import LotePronostico, ModeloIA, PrediccionVentas, PronosticoDiario
+from .pronostico_lotes import procesar_lote
 
-# Create your tests here.
+
+# =============================================================================
+# ENTRENAMIENTO
+# =============================================================================
+
+@override_settings(MODELOS_IA_JOBS=-1, MODELOS_IA_JOBS_HILOS=1)
+class ProcesosEntrenamientoTests(TestCase):
+
+    def test_en_el_proceso_web_se_acotan(self):
+        self.assertEqual(procesos_joblib(en_proceso_web=True), 1)
+        self.assertEqual(procesos_joblib(), os.cpu_count() or 1)
+
+    def test_el_entrenamiento_encolado_usa_procesos_acotados(self):
+        with mock.patch('ai_models.entrenamiento.cola_tareas.encolar') as encolar:
+            modelo = crear_entrenamiento(date(2026, 1, 1), date(2026, 3, 31))
+
+        encolar.assert_called_once_with(procesar_entrenamiento, modelo.id, n_jobs=1)
+
+
+class ParametrosEntrenamientoTests(TestCase):
+
+    def setUp(self):
+        admin = crear_usuario('entrenar')
+        admin.is_staff = True
+        admin.save(update_fields=['is_staff'])
+        self.cliente = APIClient(HTTP_HOST='localhost')
+        self.cliente.force_authenticate(user=admin)
+
+    def _entrenar(self, parametros):
+        return self.cliente.post('/api/ai/modelos/entrenar-ventas/', {
+            'fecha_inicio': '2026-01-01', 'fecha_fin': '2026-03-31', 'parametros': parametros,
+        }, format='json')
+
+    def test_rechaza_parametros_invalidos(self):
+        invalidos = {
+            'n_estimator': 100,
+            'max_depth': 'profundo',
+            'n_estimators': list(range(10, 10000, 10)),
+            'max_features': [1],
+        }
+        response = self._entrenar(invalidos)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['parametros']), set(invalidos))
+        self.assertFalse(ModeloIA.objects.exists())
+
+    def test_rechaza_lo_que_no_es_un_objeto(self):
+        self.assertEqual(self._entrenar([100, 200]).status_code, 400)
+
+    def test_acepta_valores_y_listas_validas(self):
+        self.assertEqual(validar_restricciones({
+            'n_estimators': [100, 200], 'max_depth': None, 'min_samples_leaf': 2, 'max_features': ['sqrt', 0.5],
+        }), {})
+
+
+# =============================================================================
+# PREDICCIONES
+# =============================================================================
+
+class PrediccionPorCategoriaTests(TestCase):
+
+    INICIO = date(2026, 1, 1)
+    DIAS = 7
+
+    def setUp(self):
+        self.modelo = ModeloIA.objects.create(nombre_modelo=NOMBRE_MODELO, version='prueba', activo=True)
+        self.categoria = Categoria.objects.create(nombre_categoria='Pronóstico')
+        self.fin = self.INICIO + timedelta(days=self.DIAS - 1)
+        self.cliente = APIClient(HTTP_HOST='localhost')
+        self.cliente.force_authenticate(user=crear_usuario('prediccion'))
+
+    def _serie(self, categoria_id, valor):
+        PronosticoDiario.objects.bulk_create([
+            PronosticoDiario(modelo=self.modelo, categoria_id=categoria_id,
+                             fecha=self.INICIO + timedelta(days=i), valor=valor)
+            for i in range(self.DIAS)
+        ])
+
+    def _generar(self, categoria_id):
+        return self.cliente.post('/api/ai/predicciones/generar/', {
+            'fecha_inicio': self.INICIO, 'fecha_fin': self.fin, 'categoria_id': categoria_id,
+        }, format='json')
+
+    def test_usa_la_serie_de_la_categoria(self):
+        self._serie(None, 1000.0)
+        self._serie(self.categoria.id, 25.0)
+
+        response = self._generar(self.categoria.id)
+
+        self.assertEqual(response.status_code, 200)
+        prediccion = PrediccionVentas.objects.get(id=response.data['id'])
+        self.assertEqual(prediccion.categoria_id, self.categoria.id)
+        self.assertEqual(set(prediccion.resultado_prediccion.values()), {25.0})
+        self.assertEqual(len(prediccion.resultado_prediccion), self.DIAS)
+
+    def test_categoria_sin_serie_es_400(self):
+        self._serie(None, 1000.0)
+
+        response = self._generar(self.categoria.id)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('categoria_id', response.data)
+        self.assertFalse(PrediccionVentas.objects.exists())
+
+
+# =============================================================================
+# PRONÓSTICO POR LOTES
+# =============================================================================
+
+@override_settings(MODELOS_IA_JOBS=-1, MODELOS_IA_JOBS_HILOS=1)
+class PronosticoPorLotesTests(TestCase):
+
+    def setUp(self):
+        self.modelo = ModeloIA.objects.create(nombre_modelo=NOMBRE_MODELO, version='prueba', activo=True)
+        admin = crear_usuario('lotes')
+        admin.is_staff = True
+        admin.save(update_fields=['is_staff'])
+        self.cliente = APIClient(HTTP_HOST='localhost')
+        self.cliente.force_authenticate(user=admin)
+
+    def test_la_peticion_encola_y_devuelve_la_url_de_estado(self):
+        with mock.patch('ai_models.pronostico_lotes.cola_tareas.encolar') as encolar:
+            with mock.patch('ai_models.pronostico_lotes.pronosticar_lote') as pronosticar:
+                response = self.cliente.post('/api/ai/predicciones/lotes/', {
+                    'fecha_inicio': '2026-02-01', 'fecha_fin': '2026-02-07', 'dias_historia': 60,
+                }, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        pronosticar.assert_not_called()
+        lote = LotePronostico.objects.get(id=response.data['lote_id'])
+        self.assertEqual(lote.estado, 'pendiente')
+        encolar.assert_called_once_with(procesar_lote, lote.id, procesos=1)
+
+        estado = self.cliente.get(response.data['url_estado'])
+        self.assertEqual(estado.status_code, 200)
+        self.assertEqual(estado.data['estado'], 'pendiente')
+
+    def test_procesar_guarda_el_resumen(self):
+        with mock.patch('ai_models.pronostico_lotes.cola_tareas.encolar'):
+            lote_id = self.cliente.post('/api/ai/predicciones/lotes/', {
+                'fecha_inicio': '2026-02-01', 'fecha_fin': '2026-02-07', 'dias_historia': 60,
+            }, format='json').data['lote_id']
+
+        lote = procesar_lote(lote_id, procesos=1)
+
+        self.assertEqual(lote.estado, 'completado')
+        self.assertEqual(lote.resumen['predicciones'], 0)
+        self.assertIsNone(procesar_lote(lote_id))
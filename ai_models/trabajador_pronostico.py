@@ -0,0 +1,45 @@
+# ai_models/trabajador_pronostico.py
+"""
+Código que corre dentro de los procesos del pronóstico por lotes.
+
+No importa Django ni modelos: los procesos se crean con 'spawn' y solo cargan
+este módulo, NumPy y scikit-learn. La matriz de características (la misma
+para todas las series) se recibe una vez por proceso en `inicializar`; cada
+tarea solo envía su serie objetivo.
+"""
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+_caracteristicas = {}
+
+
+def inicializar(X_historia, X_horizonte):
+    _caracteristicas['historia'] = X_historia
+    _caracteristicas['horizonte'] = X_horizonte
+
+
+def _ajustar(X, y, hiperparametros):
+    return RandomForestRegressor(random_state=42, n_jobs=1, **hiperparametros).fit(X, y)
+
+
+def pronosticar(clave, y, hiperparametros, dias_validacion):
+    """
+    Entrena un bosque para la serie `y` y predice el horizonte. Si hay
+    `dias_validacion`, antes mide el RMSE sobre esos últimos días entrenando
+    solo con los anteriores. Devuelve (clave, predicciones, metricas).
+    """
+    inicio = time.perf_counter()
+    X = _caracteristicas['historia']
+    metricas = {}
+
+    if dias_validacion:
+        corte = len(y) - dias_validacion
+        estimador = _ajustar(X[:corte], y[:corte], hiperparametros)
+        error = estimador.predict(X[corte:]) - y[corte:]
+        metricas['rmse_validacion'] = float(np.sqrt(np.mean(error ** 2)))
+
+    estimador = _ajustar(X, y, hiperparametros)
+    predicciones = np.clip(estimador.predict(_caracteristicas['horizonte']), 0, None)
+    metricas['tiempo_segundos'] = round(time.perf_counter() - inicio, 4)
+    return clave, predicciones, metricas
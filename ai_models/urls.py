@@ -7,7 +7,11 @@ urlpatterns = [
     path('modelos/entrenar-ventas/', views.entrenar_modelo_ventas, name='entrenar_modelo_ventas'),
     path('predicciones/', views.PrediccionVentasListView.as_view(), name='lista_predicciones'),
     path('predicciones/generar/', views.generar_prediccion_ventas, name='generar_prediccion'),
+    path('pronosticos/', views.PronosticoDiarioListView.as_view(), name='lista_pronosticos'),
+    path('predicciones/lotes/', views.pronosticar_por_lotes, name='pronosticar_por_lotes'),
     path('metricas/ventas/', views.obtener_metricas_ventas, name='metricas_ventas'),
 
+    path('modelos/<int:modelo_id>/estado/', views.estado_modelo, name='estado_modelo'),
+    path('predicciones/lotes/<int:lote_id>/estado/', views.estado_lote_pronostico, name='estado_lote_pronostico'),
     path('modelos/<int:modelo_id>/actualizar/', views.actualizar_modelo, name='actualizar_modelo'),
 ]
\ No newline at end of file
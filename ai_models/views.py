@@ -1,19 +1,26 @@
 # ai_models/views.py
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error
-import joblib
-from datetime import datetime, timedelta
-from django.db import connection
+from datetime import datetime
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from .models import ModeloIA, PrediccionVentas
+from analytics.models import ResumenDiarioPedidos, VentaDiaria
+from .filters import PrediccionVentasFilter, PronosticoDiarioFilter
+from .models import ModeloIA, PrediccionVentas, PronosticoDiario, LotePronostico
+from .entrenamiento import MINIMO_DIAS, NOMBRE_MODELO, crear_entrenamiento
+from .pronostico_lotes import crear_lote
+from .pronosticos import SerieNoDisponible, pronosticar_rango
 from .serializers import (ModeloIASerializer, PrediccionVentasSerializer,
-                         EntrenamientoSerializer, PrediccionSolicitudSerializer)
+                         EntrenamientoSerializer, PrediccionSolicitudSerializer,
+                         PronosticoLoteSerializer, PronosticoDiarioSerializer,
+                         LotePronosticoSerializer)
 
 class ModeloIAListView(generics.ListCreateAPIView):
     queryset = ModeloIA.objects.all()
@@ -23,109 +30,70 @@ class ModeloIAListView(generics.ListCreateAPIView):
 class PrediccionVentasListView(generics.ListAPIView):
     serializer_class = PrediccionVentasSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PrediccionVentasFilter
+    ordering_cursor = ('-fecha_prediccion', '-id')
     
     def get_queryset(self):
-        return PrediccionVentas.objects.select_related('modelo', 'categoria').all()
+        return PrediccionVentas.objects.select_related('modelo', 'categoria', 'producto').order_by(*self.ordering_cursor)
+
+class PronosticoDiarioListView(generics.ListAPIView):
+    """
+    Pronóstico día por día de un modelo (por defecto el activo). Sin
+    categoria ni producto devuelve la serie de ventas totales.
+    """
+    serializer_class = PronosticoDiarioSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PronosticoDiarioFilter
+    ordering_cursor = ('fecha', 'id')
+    
+    def get_queryset(self):
+        queryset = PronosticoDiario.objects.order_by(*self.ordering_cursor)
+        if 'modelo' not in self.request.query_params:
+            activo = ModeloIA.obtener_activo(NOMBRE_MODELO)
+            queryset = queryset.filter(modelo=activo) if activo else queryset.none()
+        return queryset
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def entrenar_modelo_ventas(request):
+    """Encola el entrenamiento; el avance se consulta en modelos/<id>/estado/"""
     serializer = EntrenamientoSerializer(data=request.data)
     if serializer.is_valid():
         datos = serializer.validated_data
         
-        try:
-            # Obtener datos históricos de ventas
-            query = """
-                SELECT DATE(p.fecha_pedido) as fecha, 
-                       SUM(dp.cantidad * dp.precio_unitario_en_el_momento) as venta_total,
-                       EXTRACT(MONTH FROM p.fecha_pedido) as mes,
-                       EXTRACT(DAY FROM p.fecha_pedido) as dia,
-                       EXTRACT(DOW FROM p.fecha_pedido) as dia_semana
-                FROM pedidos p
-                JOIN detalle_pedido dp ON p.id = dp.pedido_id
-                WHERE p.fecha_pedido BETWEEN %s AND %s
-                AND p.estado_pedido = 'entregado'
-                GROUP BY DATE(p.fecha_pedido)
-                ORDER BY fecha
-            """
-            
-            with connection.cursor() as cursor:
-                cursor.execute(query, [datos['fecha_inicio'], datos['fecha_fin']])
-                resultados = cursor.fetchall()
-                columnas = [col[0] for col in cursor.description]
-            
-            if len(resultados) < 30:  # Mínimo de datos para entrenar
-                return Response(
-                    {'error': 'Datos insuficientes para entrenar el modelo (mínimo 30 días)'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Preparar datos para el modelo
-            df = pd.DataFrame(resultados, columns=columnas)
-            df['fecha'] = pd.to_datetime(df['fecha'])
-            
-            # Crear características
-            df['dia_del_anio'] = df['fecha'].dt.dayofyear
-            df['semana_del_anio'] = df['fecha'].dt.isocalendar().week
-            df['es_fin_de_semana'] = (df['dia_semana'] >= 5).astype(int)
-            
-            # Preparar características y objetivo
-            X = df[['mes', 'dia', 'dia_semana', 'dia_del_anio', 'semana_del_anio', 'es_fin_de_semana']]
-            y = df['venta_total']
-            
-            # Dividir datos
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # Entrenar modelo Random Forest
-            modelo_rf = RandomForestRegressor(
-                n_estimators=100,
-                random_state=42,
-                max_depth=10
-            )
-            modelo_rf.fit(X_train, y_train)
-            
-            # Evaluar modelo
-            y_pred = modelo_rf.predict(X_test)
-            mse = mean_squared_error(y_test, y_pred)
-            mae = mean_absolute_error(y_test, y_pred)
-            rmse = np.sqrt(mse)
-            
-            # Guardar modelo
-            modelo_ia = ModeloIA.objects.create(
-                nombre_modelo='Random Forest Ventas',
-                version='1.0',
-                fecha_entrenamiento=datetime.now(),
-                parametros={
-                    'n_estimators': 100,
-                    'max_depth': 10,
-                    'random_state': 42
-                },
-                precision=rmse,
-                estado='entrenado'
+        dias = VentaDiaria.objects.filter(
+            estado_pedido='entregado', fecha__range=(datos['fecha_inicio'], datos['fecha_fin'])
+        ).values('fecha').distinct().count()
+        if dias < MINIMO_DIAS:  # Mínimo de datos para entrenar
+            return Response(
+                {'error': f'Datos insuficientes para entrenar el modelo (mínimo {MINIMO_DIAS} días)'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            # Guardar modelo serializado
-            ruta_modelo = f'modelos/random_forest_ventas_{modelo_ia.id}.joblib'
-            joblib.dump(modelo_rf, ruta_modelo)
-            modelo_ia.ruta_modelo = ruta_modelo
-            modelo_ia.save()
-            
-            return Response({
-                'mensaje': 'Modelo entrenado exitosamente',
-                'modelo_id': modelo_ia.id,
-                'metricas': {
-                    'RMSE': rmse,
-                    'MAE': mae,
-                    'MSE': mse
-                }
-            }, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        with transaction.atomic():
+            modelo_ia = crear_entrenamiento(datos['fecha_inicio'], datos['fecha_fin'], datos.get('parametros'))
+        
+        return Response({
+            'mensaje': 'Entrenamiento en cola',
+            'modelo_id': modelo_ia.id,
+            'estado': modelo_ia.estado,
+            'url_estado': request.build_absolute_uri(reverse('estado_modelo', args=[modelo_ia.id])),
+        }, status=status.HTTP_202_ACCEPTED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def estado_modelo(request, modelo_id):
+    """Estado, avance y métricas de un entrenamiento"""
+    try:
+        modelo = ModeloIA.objects.get(id=modelo_id)
+    except ModeloIA.DoesNotExist:
+        return Response({'error': 'Modelo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ModeloIASerializer(modelo).data)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generar_prediccion_ventas(request):
@@ -134,97 +102,121 @@ def generar_prediccion_ventas(request):
         datos = serializer.validated_data
         
         try:
-            modelo = ModeloIA.objects.get(id=datos['modelo_id'])
-            
-            # Cargar modelo entrenado
-            modelo_rf = joblib.load(modelo.ruta_modelo)
+            if datos.get('modelo_id'):
+                modelo = ModeloIA.objects.get(id=datos['modelo_id'])
+            else:
+                modelo = ModeloIA.obtener_activo(NOMBRE_MODELO)
+                if modelo is None:
+                    raise ModeloIA.DoesNotExist
             
-            # Generar fechas para predicción
             fecha_inicio = datos['fecha_inicio']
             fecha_fin = datos['fecha_fin']
             
-            fechas_prediccion = pd.date_range(start=fecha_inicio, end=fecha_fin, freq='D')
-            
-            # Preparar características para predicción
-            caracteristicas = []
-            for fecha in fechas_prediccion:
-                carac = {
-                    'mes': fecha.month,
-                    'dia': fecha.day,
-                    'dia_semana': fecha.weekday(),
-                    'dia_del_anio': fecha.dayofyear,
-                    'semana_del_anio': fecha.isocalendar().week,
-                    'es_fin_de_semana': 1 if fecha.weekday() >= 5 else 0
-                }
-                caracteristicas.append(carac)
-            
-            df_pred = pd.DataFrame(caracteristicas)
-            
-            # Realizar predicciones
-            predicciones = modelo_rf.predict(df_pred)
-            
-            # Crear resultado
-            resultado = {}
-            for i, fecha in enumerate(fechas_prediccion):
-                resultado[fecha.strftime('%Y-%m-%d')] = float(predicciones[i])
+            # Los días ya pronosticados por este modelo se leen; solo se calculan los que faltan
+            resultado, dias_calculados = pronosticar_rango(
+                modelo, fecha_inicio, fecha_fin, categoria_id=datos.get('categoria_id')
+            )
             
-            # Guardar predicción
-            prediccion = PrediccionVentas.objects.create(
+            # Misma consulta que una anterior: se devuelve esa predicción en lugar de duplicarla
+            prediccion = PrediccionVentas.objects.filter(
                 modelo=modelo,
                 fecha_inicio=fecha_inicio,
                 fecha_fin=fecha_fin,
                 categoria_id=datos.get('categoria_id'),
-                resultado_prediccion=resultado,
-                metricas={
-                    'predicciones_generadas': len(predicciones),
-                    'rango_fechas': f"{fecha_inicio} a {fecha_fin}"
-                }
-            )
+                producto__isnull=True,
+            ).order_by('-id').first()
+            
+            if prediccion is None or prediccion.resultado_prediccion != resultado:
+                prediccion = PrediccionVentas.objects.create(
+                    modelo=modelo,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    categoria_id=datos.get('categoria_id'),
+                    resultado_prediccion=resultado,
+                    metricas={
+                        'predicciones_generadas': len(resultado),
+                        'dias_calculados': dias_calculados,
+                        'rango_fechas': f"{fecha_inicio} a {fecha_fin}"
+                    }
+                )
             
             return Response(PrediccionVentasSerializer(prediccion).data)
             
         except ModeloIA.DoesNotExist:
             return Response({'error': 'Modelo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        except SerieNoDisponible as e:
+            return Response({'categoria_id': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def pronosticar_por_lotes(request):
+    """
+    Encola el pronóstico de cada categoría (y de los productos más vendidos);
+    el avance se consulta en predicciones/lotes/<id>/estado/
+    """
+    serializer = PronosticoLoteSerializer(data=request.data)
+    if serializer.is_valid():
+        datos = serializer.validated_data
+        
+        if datos.get('modelo_id'):
+            modelo = ModeloIA.objects.filter(id=datos['modelo_id']).first()
+        else:
+            modelo = ModeloIA.obtener_activo(NOMBRE_MODELO)
+        if modelo is None:
+            return Response({'error': 'Modelo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        
+        with transaction.atomic():
+            lote = crear_lote(
+                modelo,
+                datos['fecha_inicio'],
+                datos['fecha_fin'],
+                dias_historia=datos['dias_historia'],
+                top_productos=datos['top_productos'],
+                objetivo=datos['objetivo'],
+            )
+        
+        return Response({
+            'mensaje': 'Pronóstico por lotes en cola',
+            'lote_id': lote.id,
+            'estado': lote.estado,
+            'url_estado': request.build_absolute_uri(reverse('estado_lote_pronostico', args=[lote.id])),
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def estado_lote_pronostico(request, lote_id):
+    """Estado y resumen de un pronóstico por lotes"""
+    try:
+        lote = LotePronostico.objects.get(id=lote_id)
+    except LotePronostico.DoesNotExist:
+        return Response({'error': 'Lote no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(LotePronosticoSerializer(lote).data)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def obtener_metricas_ventas(request):
     """Obtener métricas básicas de ventas para el dashboard"""
+    # Se leen los resúmenes diarios en lugar de recorrer la tabla de pedidos
+    hoy = timezone.localdate()
+    entregados = ResumenDiarioPedidos.objects.filter(estado_pedido='entregado')
     
-    query_ventas_hoy = """
-        SELECT COALESCE(SUM(monto_total), 0) 
-        FROM pedidos 
-        WHERE DATE(fecha_pedido) = CURRENT_DATE
-        AND estado_pedido = 'entregado'
-    """
+    ventas_hoy = entregados.filter(fecha=hoy).aggregate(
+        total=Coalesce(Sum('monto_total'), Decimal('0'))
+    )['total']
     
-    query_ventas_mes = """
-        SELECT COALESCE(SUM(monto_total), 0) 
-        FROM pedidos 
-        WHERE EXTRACT(MONTH FROM fecha_pedido) = EXTRACT(MONTH FROM CURRENT_DATE)
-        AND EXTRACT(YEAR FROM fecha_pedido) = EXTRACT(YEAR FROM CURRENT_DATE)
-        AND estado_pedido = 'entregado'
-    """
+    ventas_mes = entregados.filter(fecha__gte=hoy.replace(day=1), fecha__lte=hoy).aggregate(
+        total=Coalesce(Sum('monto_total'), Decimal('0'))
+    )['total']
     
-    query_pedidos_pendientes = """
-        SELECT COUNT(*) 
-        FROM pedidos 
-        WHERE estado_pedido IN ('pendiente', 'confirmado', 'en_proceso')
-    """
-    
-    with connection.cursor() as cursor:
-        cursor.execute(query_ventas_hoy)
-        ventas_hoy = cursor.fetchone()[0]
-        
-        cursor.execute(query_ventas_mes)
-        ventas_mes = cursor.fetchone()[0]
-        
-        cursor.execute(query_pedidos_pendientes)
-        pedidos_pendientes = cursor.fetchone()[0]
+    pedidos_pendientes = ResumenDiarioPedidos.objects.filter(
+        estado_pedido__in=['pendiente', 'confirmado', 'en_proceso']
+    ).aggregate(total=Coalesce(Sum('num_pedidos'), 0))['total']
     
     return Response({
         'ventas_hoy': ventas_hoy,
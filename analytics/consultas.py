@@ -0,0 +1,312 @@
+# analytics/consultas.py
+"""
+Constructor de consultas de reportes.
+
+Cada tipo de reporte declara sus columnas y arma su SQL con marcadores %s;
+los filtros se agregan como condiciones parametrizadas antes de cualquier
+GROUP BY. Las ejecuciones que no son en streaming (PDF y EXPLAIN) usan
+sentencias preparadas (PREPARE/EXECUTE) que se reutilizan mientras viva la
+conexión.
+
+Limitación: CSV y Excel no pasan por la sentencia preparada. Se leen con un
+cursor del lado del servidor (analytics.generadores.LectorLotes) y Postgres
+solo admite SELECT/VALUES en DECLARE ... CURSOR, no EXECUTE; un EXECUTE con
+cursor normal haría que psycopg2 cargue todo el resultado en memoria. Esas
+exportaciones planifican el SQL en cada ejecución, un costo menor frente a
+leer y escribir el resultado completo.
+"""
+import hashlib
+import json
+import re
+import weakref
+from collections import namedtuple
+from datetime import date, timedelta
+from django.db import connection
+
+Columna = namedtuple('Columna', ['nombre', 'titulo', 'tipo'])
+
+# Sentencias preparadas por conexión de psycopg2 (se pierden al reconectar)
+_preparadas = weakref.WeakKeyDictionary()
+
+
+def _fecha(valor):
+    if valor is None or isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor))
+
+
+class ConsultaReporte:
+    """SQL parametrizado de un reporte junto con su esquema de columnas"""
+
+    def __init__(self, tipo_reporte, sql, parametros, columnas):
+        self.tipo_reporte = tipo_reporte
+        self.sql = sql
+        self.parametros = list(parametros)
+        self.columnas = columnas
+
+    @property
+    def nombres_columnas(self):
+        return [columna.nombre for columna in self.columnas]
+
+    @property
+    def nombre_preparado(self):
+        """Un nombre por forma de consulta (tipo + filtros presentes)"""
+        huella = hashlib.sha1(self.sql.encode('utf-8')).hexdigest()[:12]
+        return f'reporte_{self.tipo_reporte}_{huella}'
+
+    def _sql_posicional(self):
+        """Convierte los %s de psycopg2 en $1, $2, ... para PREPARE"""
+        contador = iter(range(1, len(self.parametros) + 1))
+        return re.sub(r'%s', lambda _: f'${next(contador)}', self.sql.replace('%%', '%'))
+
+    def _preparar(self, cursor):
+        conexion = connection.connection
+        nombres = _preparadas.setdefault(conexion, set())
+        if self.nombre_preparado not in nombres:
+            cursor.execute(f'PREPARE {self.nombre_preparado} AS {self._sql_posicional()}')
+            nombres.add(self.nombre_preparado)
+
+    def _execute(self):
+        if not self.parametros:
+            return f'EXECUTE {self.nombre_preparado}'
+        marcadores = ', '.join(['%s'] * len(self.parametros))
+        return f'EXECUTE {self.nombre_preparado} ({marcadores})'
+
+    def ejecutar(self, limite=None):
+        """Ejecuta la sentencia preparada y devuelve hasta `limite` filas"""
+        with connection.cursor() as cursor:
+            self._preparar(cursor)
+            cursor.execute(self._execute(), self.parametros)
+            return cursor.fetchmany(limite) if limite else cursor.fetchall()
+
+    def explicar(self):
+        """Plan de ejecución (EXPLAIN FORMAT JSON) sin ejecutar la consulta"""
+        with connection.cursor() as cursor:
+            self._preparar(cursor)
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {self._execute()}', self.parametros)
+            plan = cursor.fetchone()[0]
+        return json.loads(plan) if isinstance(plan, str) else plan
+
+
+# =============================================================================
+# DEFINICIONES POR TIPO DE REPORTE
+# =============================================================================
+
+def _rango_fechas(columna, filtros, condiciones, parametros):
+    """Rango semiabierto [inicio, fin + 1 día) para poder usar el índice"""
+    fecha_inicio = _fecha(filtros.get('fecha_inicio'))
+    fecha_fin = _fecha(filtros.get('fecha_fin'))
+    if fecha_inicio:
+        condiciones.append(f'{columna} >= %s')
+        parametros.append(fecha_inicio)
+    if fecha_fin:
+        condiciones.append(f'{columna} < %s')
+        parametros.append(fecha_fin + timedelta(days=1))
+
+
+def _where(condiciones, prefijo='WHERE'):
+    return f'{prefijo} ' + ' AND '.join(condiciones) if condiciones else ''
+
+
+COLUMNAS_VENTAS = [
+    Columna('id', 'Pedido', 'entero'),
+    Columna('fecha_pedido', 'Fecha', 'fecha_hora'),
+    Columna('first_name', 'Nombre', 'texto'),
+    Columna('last_name', 'Apellido', 'texto'),
+    Columna('monto_total', 'Monto total', 'decimal'),
+    Columna('estado_pedido', 'Estado', 'texto'),
+]
+
+def consulta_ventas(filtros):
+    condiciones, parametros = [], []
+    _rango_fechas('p.fecha_pedido', filtros, condiciones, parametros)
+    if filtros.get('cliente_id'):
+        condiciones.append('p.usuario_id = %s')
+        parametros.append(filtros['cliente_id'])
+    if filtros.get('categoria_id'):
+        condiciones.append("""EXISTS (
+                SELECT 1 FROM detalle_pedido dp
+                JOIN productos pr ON pr.id = dp.producto_id
+                WHERE dp.pedido_id = p.id AND pr.categoria_id = %s
+            )""")
+        parametros.append(filtros['categoria_id'])
+
+    sql = f"""
+        SELECT p.id, p.fecha_pedido, u.first_name, u.last_name,
+               p.monto_total, p.estado_pedido
+        FROM pedidos p
+        JOIN usuarios u ON p.usuario_id = u.id
+        {_where(condiciones)}
+        ORDER BY p.fecha_pedido, p.id
+    """
+    return sql, parametros
+
+
+COLUMNAS_CLIENTES = [
+    Columna('id', 'Cliente', 'entero'),
+    Columna('first_name', 'Nombre', 'texto'),
+    Columna('last_name', 'Apellido', 'texto'),
+    Columna('email', 'Email', 'texto'),
+    Columna('telefono', 'Teléfono', 'texto'),
+    Columna('total_pedidos', 'Pedidos', 'entero'),
+    Columna('total_gastado', 'Total gastado', 'decimal'),
+]
+
+def consulta_clientes(filtros):
+    # El rango de fechas limita los pedidos que se suman, no los clientes
+    condiciones_pedidos, parametros = [], []
+    _rango_fechas('p.fecha_pedido', filtros, condiciones_pedidos, parametros)
+    condiciones = []
+    if filtros.get('cliente_id'):
+        condiciones.append('u.id = %s')
+        parametros.append(filtros['cliente_id'])
+
+    sql = f"""
+        SELECT u.id, u.first_name, u.last_name, u.email, u.telefono,
+               COUNT(p.id) AS total_pedidos,
+               COALESCE(SUM(p.monto_total), 0) AS total_gastado
+        FROM usuarios u
+        LEFT JOIN pedidos p ON u.id = p.usuario_id {_where(condiciones_pedidos, 'AND')}
+        {_where(condiciones)}
+        GROUP BY u.id, u.first_name, u.last_name, u.email, u.telefono
+        ORDER BY u.id
+    """
+    return sql, parametros
+
+
+COLUMNAS_PRODUCTOS = [
+    Columna('id', 'Producto', 'entero'),
+    Columna('nombre', 'Nombre', 'texto'),
+    Columna('sku', 'SKU', 'texto'),
+    Columna('precio', 'Precio', 'decimal'),
+    Columna('nombre_categoria', 'Categoría', 'texto'),
+    Columna('stock_actual', 'Stock', 'entero'),
+    Columna('total_vendido', 'Unidades vendidas', 'entero'),
+]
+
+def consulta_productos(filtros):
+    # Las ventas se agregan por producto antes de unirlas al catálogo
+    condiciones_ventas, parametros = [], []
+    _rango_fechas('p.fecha_pedido', filtros, condiciones_ventas, parametros)
+    condiciones = []
+    if filtros.get('categoria_id'):
+        condiciones.append('pr.categoria_id = %s')
+        parametros.append(filtros['categoria_id'])
+
+    sql = f"""
+        SELECT pr.id, pr.nombre, pr.sku, pr.precio, c.nombre_categoria,
+               i.stock_actual, COALESCE(v.total_vendido, 0) AS total_vendido
+        FROM productos pr
+        LEFT JOIN categorias c ON pr.categoria_id = c.id
+        LEFT JOIN inventario i ON pr.id = i.producto_id
+        LEFT JOIN (
+            SELECT dp.producto_id, SUM(dp.cantidad) AS total_vendido
+            FROM detalle_pedido dp
+            JOIN pedidos p ON p.id = dp.pedido_id
+            {_where(condiciones_ventas)}
+            GROUP BY dp.producto_id
+        ) v ON v.producto_id = pr.id
+        {_where(condiciones)}
+        ORDER BY pr.id
+    """
+    return sql, parametros
+
+
+COLUMNAS_INVENTARIO = [
+    Columna('id', 'Producto', 'entero'),
+    Columna('nombre', 'Nombre', 'texto'),
+    Columna('sku', 'SKU', 'texto'),
+    Columna('nombre_categoria', 'Categoría', 'texto'),
+    Columna('nombre_marca', 'Marca', 'texto'),
+    Columna('stock_actual', 'Stock', 'entero'),
+    Columna('stock_reservado', 'Reservado', 'entero'),
+    Columna('stock_disponible', 'Disponible', 'entero'),
+    Columna('stock_minimo', 'Stock mínimo', 'entero'),
+    Columna('bajo_minimo', 'Bajo mínimo', 'booleano'),
+    Columna('ultima_actualizacion', 'Última actualización', 'fecha_hora'),
+]
+
+def consulta_inventario(filtros):
+    condiciones, parametros = [], []
+    if filtros.get('categoria_id'):
+        condiciones.append('pr.categoria_id = %s')
+        parametros.append(filtros['categoria_id'])
+
+    sql = f"""
+        SELECT pr.id, pr.nombre, pr.sku, c.nombre_categoria, m.nombre_marca,
+               COALESCE(i.stock_actual, 0) AS stock_actual,
+               COALESCE(i.stock_reservado, 0) AS stock_reservado,
+               COALESCE(i.stock_actual, 0) - COALESCE(i.stock_reservado, 0) AS stock_disponible,
+               COALESCE(i.stock_minimo, 0) AS stock_minimo,
+               COALESCE(i.stock_actual, 0) <= COALESCE(i.stock_minimo, 0) AS bajo_minimo,
+               i.ultima_actualizacion
+        FROM productos pr
+        LEFT JOIN categorias c ON pr.categoria_id = c.id
+        LEFT JOIN marcas m ON pr.marca_id = m.id
+        LEFT JOIN inventario i ON pr.id = i.producto_id
+        {_where(condiciones)}
+        ORDER BY pr.id
+    """
+    return sql, parametros
+
+
+COLUMNAS_VENTAS_DIARIAS = [
+    Columna('fecha', 'Fecha', 'fecha'),
+    Columna('estado_pedido', 'Estado', 'texto'),
+    Columna('nombre_categoria', 'Categoría', 'texto'),
+    Columna('nombre_marca', 'Marca', 'texto'),
+    Columna('num_pedidos', 'Pedidos', 'entero'),
+    Columna('unidades', 'Unidades', 'entero'),
+    Columna('monto_productos', 'Monto', 'decimal'),
+]
+
+def consulta_ventas_diarias(filtros):
+    # Lee el resumen diario (analytics.resumenes), no pedidos/detalle_pedido
+    condiciones, parametros = [], []
+    _rango_fechas('v.fecha', filtros, condiciones, parametros)
+    if filtros.get('categoria_id'):
+        condiciones.append('v.categoria_id = %s')
+        parametros.append(filtros['categoria_id'])
+
+    sql = f"""
+        SELECT v.fecha, v.estado_pedido, c.nombre_categoria, m.nombre_marca,
+               v.num_pedidos, v.unidades, v.monto_productos
+        FROM ventas_diarias v
+        LEFT JOIN categorias c ON v.categoria_id = c.id
+        LEFT JOIN marcas m ON v.marca_id = m.id
+        {_where(condiciones)}
+        ORDER BY v.fecha, v.estado_pedido, c.nombre_categoria, m.nombre_marca
+    """
+    return sql, parametros
+
+
+# tipo_reporte -> (función que arma el SQL, columnas)
+DEFINICIONES = {
+    'ventas': (consulta_ventas, COLUMNAS_VENTAS),
+    'clientes': (consulta_clientes, COLUMNAS_CLIENTES),
+    'productos': (consulta_productos, COLUMNAS_PRODUCTOS),
+    'inventario': (consulta_inventario, COLUMNAS_INVENTARIO),
+    'ventas_diarias': (consulta_ventas_diarias, COLUMNAS_VENTAS_DIARIAS),
+}
+
+# Tablas que lee cada tipo de reporte (sus generaciones en core.cache indican
+# si un reporte ya generado sigue vigente)
+TABLAS_REPORTE = {
+    'ventas': ('pedidos', 'detalle_pedido', 'usuarios', 'productos'),
+    'clientes': ('usuarios', 'pedidos'),
+    'productos': ('productos', 'categorias', 'inventario', 'detalle_pedido', 'pedidos'),
+    'inventario': ('productos', 'categorias', 'marcas', 'inventario'),
+    'ventas_diarias': ('pedidos', 'detalle_pedido', 'categorias', 'marcas'),
+}
+
+
+def construir_consulta(parametros):
+    """Arma la consulta parametrizada a partir de los parámetros del reporte"""
+    tipo_reporte = parametros.get('tipo_reporte')
+    if tipo_reporte not in DEFINICIONES:
+        tipo_reporte = 'ventas'
+    armar, columnas = DEFINICIONES[tipo_reporte]
+    sql, valores = armar(parametros)
+    # Normalizar espacios para que la misma forma de consulta tenga el mismo nombre
+    sql = '\n'.join(linea.strip() for linea in sql.strip().splitlines() if linea.strip())
+    return ConsultaReporte(tipo_reporte, sql, valores, columnas)
@@ -0,0 +1,153 @@
+# analytics/generadores.py
+"""
+Render de reportes en PDF, Excel y CSV a partir de una ConsultaReporte
+(ver analytics.consultas).
+
+Las filas se leen con un cursor del lado del servidor (DECLARE ... CURSOR)
+en lotes de fetchmany y se escriben a un archivo temporal que pasa a disco
+al superar unos pocos MB, así que la memoria del worker no crece con el
+tamaño del resultado.
+"""
+import csv
+import io
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+TAMANO_LOTE = 2000
+# Tamaño a partir del cual el archivo temporal pasa de memoria a disco
+MAX_MEMORIA_ARCHIVO = 5 * 1024 * 1024
+# Filas para las que el avance llega a la mitad del tramo de escritura
+FILAS_REFERENCIA_AVANCE = 50000
+
+
+class LectorLotes:
+    """
+    Itera una consulta en lotes de `tamano_lote` filas usando un cursor con
+    nombre (connection.chunked_cursor): Postgres entrega las filas a medida
+    que se piden. `columnas` está disponible tras leer el primer lote.
+    No usa la sentencia preparada de la consulta: DECLARE no admite EXECUTE.
+    """
+
+    def __init__(self, consulta_sql, parametros=None, tamano_lote=TAMANO_LOTE):
+        self.consulta_sql = consulta_sql
+        self.parametros = parametros
+        self.tamano_lote = tamano_lote
+        self.columnas = []
+        self.filas_leidas = 0
+
+    def __iter__(self):
+        # Dentro de una transacción el cursor no necesita WITH HOLD, que
+        # obligaría a Postgres a materializar todo el resultado al confirmar.
+        # La transacción solo lee: el avance entre lotes se escribe en otra
+        # conexión (ReporteGenerado.actualizar_progreso)
+        with transaction.atomic():
+            with connection.chunked_cursor() as cursor:
+                cursor.execute(self.consulta_sql, self.parametros)
+                while True:
+                    lote = cursor.fetchmany(self.tamano_lote)
+                    if not self.columnas and cursor.description:
+                        self.columnas = [columna[0] for columna in cursor.description]
+                    if not lote:
+                        break
+                    self.filas_leidas += len(lote)
+                    yield lote
+
+
+def _avanzar(progreso, porcentaje):
+    if progreso is not None:
+        progreso(porcentaje)
+
+def _avanzar_por_filas(progreso, filas):
+    """Avance entre 40% y 90% sin conocer el total de filas de antemano"""
+    _avanzar(progreso, 40 + 50 * filas // (filas + FILAS_REFERENCIA_AVANCE))
+
+def escribir_csv(consulta, destino, progreso=None):
+    """Escribe el resultado como CSV en un archivo de texto, lote por lote"""
+    lector = LectorLotes(consulta.sql, consulta.parametros)
+    writer = csv.writer(destino)
+    writer.writerow(consulta.nombres_columnas)
+    for lote in lector:
+        writer.writerows(lote)
+        _avanzar_por_filas(progreso, lector.filas_leidas)
+    return lector.filas_leidas
+
+def _valor_excel(valor):
+    # Excel no admite zonas horarias: usar la hora local sin tzinfo
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.localtime(valor).replace(tzinfo=None)
+    return valor
+
+def escribir_excel(consulta, destino, progreso=None):
+    """Escribe el resultado en un libro write_only de openpyxl, lote por lote"""
+    import openpyxl
+    
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Reporte")
+    ws.append([columna.titulo for columna in consulta.columnas])
+    lector = LectorLotes(consulta.sql, consulta.parametros)
+    for lote in lector:
+        for fila in lote:
+            ws.append([_valor_excel(valor) for valor in fila])
+        _avanzar_por_filas(progreso, lector.filas_leidas)
+    wb.save(destino)
+    return lector.filas_leidas
+
+def _guardar(nombre_archivo, archivo, progreso):
+    archivo.seek(0)
+    nombre_archivo = default_storage.save(nombre_archivo, File(archivo))
+    _avanzar(progreso, 95)
+    return default_storage.url(nombre_archivo)
+
+def generar_reporte_pdf(consulta, reporte_id, progreso=None):
+    from reportlab.pdfgen import canvas
+    
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    
+    # El PDF básico solo muestra las primeras filas: leer únicamente esas
+    filas = consulta.ejecutar(limite=20)
+    _avanzar(progreso, 40)
+    
+    p.drawString(100, 800, "Reporte SmartSales365")
+    y = 780
+    for fila in filas:
+        p.drawString(100, y, str(fila))
+        y -= 20
+    
+    p.save()
+    return _guardar(f'reportes/reporte_{reporte_id}.pdf', buffer, progreso)
+
+def generar_reporte_excel(consulta, reporte_id, progreso=None):
+    with SpooledTemporaryFile(max_size=MAX_MEMORIA_ARCHIVO) as archivo:
+        escribir_excel(consulta, archivo, progreso=progreso)
+        return _guardar(f'reportes/reporte_{reporte_id}.xlsx', archivo, progreso)
+
+def generar_reporte_csv(consulta, reporte_id, progreso=None):
+    with SpooledTemporaryFile(max_size=MAX_MEMORIA_ARCHIVO) as archivo:
+        texto = io.TextIOWrapper(archivo, encoding='utf-8', newline='')
+        escribir_csv(consulta, texto, progreso=progreso)
+        texto.flush()
+        texto.detach()
+        return _guardar(f'reportes/reporte_{reporte_id}.csv', archivo, progreso)
+
+class _Eco:
+    """Pseudo-archivo que devuelve lo escrito, para csv.writer en streaming"""
+    def write(self, valor):
+        return valor
+
+def transmitir_csv(consulta):
+    """Genera el CSV línea por línea para un StreamingHttpResponse"""
+    writer = csv.writer(_Eco())
+    yield writer.writerow(consulta.nombres_columnas)
+    for lote in LectorLotes(consulta.sql, consulta.parametros):
+        yield ''.join(writer.writerow(fila) for fila in lote)
+
+GENERADORES = {
+    'pdf': generar_reporte_pdf,
+    'excel': generar_reporte_excel,
+    'csv': generar_reporte_csv,
+}
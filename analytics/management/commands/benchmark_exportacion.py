@@ -0,0 +1,112 @@
+# analytics/management/commands/benchmark_exportacion.py
+import csv
+import io
+import multiprocessing
+import os
+import resource
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from analytics.consultas import COLUMNAS_VENTAS, ConsultaReporte
+from analytics.generadores import escribir_csv, escribir_excel
+
+# Filas sintéticas con forma de reporte de ventas, sin tocar las tablas reales
+CONSULTA_SINTETICA = """
+    SELECT n AS id,
+           now() - n * interval '1 minute' AS fecha_pedido,
+           'Cliente ' || (n %% 5000) AS first_name,
+           md5(n::text) AS last_name,
+           round((n %% 1000) * 1.37, 2) AS monto_total,
+           'entregado' AS estado_pedido
+    FROM generate_series(1, %s) AS n
+"""
+
+
+def _consulta(filas):
+    return ConsultaReporte('ventas', CONSULTA_SINTETICA, [filas], COLUMNAS_VENTAS)
+
+
+def _rss_actual_mb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+def _csv_fetchall(filas):
+    """Camino anterior: fetchall() y CSV en memoria"""
+    with connection.cursor() as cursor:
+        cursor.execute(CONSULTA_SINTETICA, [filas])
+        resultados = cursor.fetchall()
+        columnas = [col[0] for col in cursor.description]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    writer.writerows(resultados)
+
+
+def _csv_streaming(filas):
+    with open(os.devnull, 'w', newline='') as destino:
+        escribir_csv(_consulta(filas), destino)
+
+
+def _excel_streaming(filas):
+    with open(os.devnull, 'wb') as destino:
+        escribir_excel(_consulta(filas), destino)
+
+
+CASOS = {
+    'csv fetchall': _csv_fetchall,
+    'csv streaming': _csv_streaming,
+    'excel streaming': _excel_streaming,
+}
+
+
+def _medir(caso, filas, cola):
+    """Se ejecuta en un proceso hijo para medir su propio pico de memoria"""
+    try:
+        base = _rss_actual_mb()
+        inicio = time.perf_counter()
+        CASOS[caso](filas)
+        duracion = time.perf_counter() - inicio
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        cola.put((pico - base, duracion, None))
+    except Exception as e:
+        cola.put((0, 0, f'{type(e).__name__}: {e}'))
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Mide el pico de memoria y el tiempo de exportar N filas: fetchall vs cursor del servidor'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas',
+            default='10000,100000,1000000',
+            help='Tamaños de resultado separados por coma',
+        )
+        parser.add_argument(
+            '--casos',
+            default=','.join(CASOS),
+            help=f'Casos a medir: {", ".join(CASOS)}',
+        )
+
+    def handle(self, *args, **options):
+        tamanos = [int(t) for t in options['filas'].split(',') if t.strip()]
+        casos = [c.strip() for c in options['casos'].split(',') if c.strip() in CASOS]
+        contexto = multiprocessing.get_context('fork')
+
+        self.stdout.write(f'{"caso":>16} {"filas":>10} {"pico MB":>10} {"segundos":>10}')
+        for filas in tamanos:
+            for caso in casos:
+                # Las conexiones abiertas no deben heredarse en el proceso hijo
+                connections.close_all()
+                cola = contexto.Queue()
+                proceso = contexto.Process(target=_medir, args=(caso, filas, cola))
+                proceso.start()
+                memoria, duracion, error = cola.get()
+                proceso.join()
+                if error:
+                    raise CommandError(f'❌ {caso} con {filas} filas: {error}')
+                self.stdout.write(f'{caso:>16} {filas:>10} {memoria:>10.1f} {duracion:>10.2f}')
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark de exportación completado'))
@@ -0,0 +1,54 @@
+# analytics/management/commands/procesar_reportes.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connection
+from analytics.models import ReporteGenerado
+from analytics.tareas import procesar_reporte
+
+
+def _vaciar_cola():
+    """Procesa reportes pendientes hasta que no quede ninguno"""
+    procesados = 0
+    try:
+        while procesar_reporte() is not None:
+            procesados += 1
+    finally:
+        connection.close()
+    return procesados
+
+
+class Command(BaseCommand):
+    help = 'Worker que genera los reportes pendientes (TAREAS_MODO=db o reportes abandonados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=2, help='Reportes generados en paralelo')
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=0,
+            help='Segundos entre revisiones de la cola; 0 la vacía una sola vez',
+        )
+        parser.add_argument(
+            '--abandonados',
+            type=int,
+            default=30,
+            help='Minutos sin avance tras los que un reporte en proceso vuelve a la cola',
+        )
+
+    def handle(self, *args, **options):
+        hilos = options['hilos']
+        intervalo = options['intervalo']
+
+        with ThreadPoolExecutor(max_workers=hilos) as executor:
+            while True:
+                reencolados = ReporteGenerado.reencolar_abandonados(options['abandonados'])
+                procesados = sum(executor.map(lambda _: _vaciar_cola(), range(hilos)))
+                if procesados or reencolados:
+                    self.stdout.write(f'Reportes procesados: {procesados} | Reencolados: {reencolados}')
+
+                if not intervalo:
+                    break
+                time.sleep(intervalo)
+
+        self.stdout.write(self.style.SUCCESS('✅ Cola de reportes procesada'))
@@ -0,0 +1,40 @@
+# analytics/management/commands/recalcular_resumenes_ventas.py
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from analytics.resumenes import rango_pedidos, recalcular_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes diarios de ventas (ventas_diarias y resumen_diario_pedidos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help='Primer día (AAAA-MM-DD); por defecto el del primer pedido')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Último día (AAAA-MM-DD); por defecto el del último pedido')
+        parser.add_argument('--dias-por-lote', type=int, default=31, help='Días recalculados en cada transacción')
+
+    def handle(self, *args, **options):
+        primero, ultimo = rango_pedidos()
+        desde = options['desde'] or primero
+        hasta = options['hasta'] or ultimo
+        if desde is None or hasta is None:
+            self.stdout.write('No hay pedidos para resumir')
+            return
+        if desde > hasta:
+            raise CommandError('--desde debe ser anterior o igual a --hasta')
+
+        # Lotes cortos para no bloquear los recálculos en línea durante mucho tiempo
+        paso = timedelta(days=max(1, options['dias_por_lote']))
+        total_ventas = total_pedidos = 0
+        inicio = desde
+        while inicio <= hasta:
+            fin = min(inicio + paso - timedelta(days=1), hasta)
+            ventas, pedidos = recalcular_resumenes(inicio, fin)
+            total_ventas += ventas
+            total_pedidos += pedidos
+            self.stdout.write(f'{inicio} a {fin}: {ventas} filas de ventas, {pedidos} de pedidos')
+            inicio = fin + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Resúmenes recalculados del {desde} al {hasta} '
+            f'({total_ventas} filas de ventas, {total_pedidos} de pedidos)'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_cola_reportes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportegenerado',
+            name='plan_ejecucion',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
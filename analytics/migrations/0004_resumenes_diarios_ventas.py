@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_busqueda_texto_completo'),
+        ('analytics', '0003_plan_ejecucion_reporte'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportegenerado',
+            name='tipo_reporte',
+            field=models.CharField(choices=[('ventas', 'Ventas'), ('clientes', 'Clientes'), ('productos', 'Productos'), ('inventario', 'Inventario'), ('ventas_diarias', 'Ventas diarias')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado_pedido', models.CharField(max_length=50)),
+                ('num_pedidos', models.IntegerField(default=0)),
+                ('unidades', models.IntegerField(default=0)),
+                ('monto_productos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('categoria', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.categoria')),
+                ('marca', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.marca')),
+            ],
+            options={
+                'db_table': 'ventas_diarias',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioPedidos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado_pedido', models.CharField(max_length=50)),
+                ('num_pedidos', models.IntegerField(default=0)),
+                ('monto_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'resumen_diario_pedidos',
+                'unique_together': {('fecha', 'estado_pedido')},
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ventadiaria',
+            constraint=models.UniqueConstraint(models.F('fecha'), models.F('estado_pedido'), django.db.models.functions.comparison.Coalesce(models.F('categoria_id'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('marca_id'), models.Value(0)), name='ventas_diarias_unica'),
+        ),
+    ]
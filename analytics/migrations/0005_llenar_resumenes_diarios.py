@@ -0,0 +1,41 @@
+# Los resúmenes diarios solo se mantenían para los pedidos modificados después
+# de crear las tablas; llenarlos con el historial de pedidos existente.
+from django.conf import settings
+from django.db import migrations
+
+LLENAR_VENTAS = """
+DELETE FROM ventas_diarias;
+INSERT INTO ventas_diarias
+    (fecha, estado_pedido, categoria_id, marca_id, num_pedidos, unidades, monto_productos)
+SELECT (p.fecha_pedido AT TIME ZONE %s)::date, p.estado_pedido,
+       pr.categoria_id, pr.marca_id,
+       COUNT(DISTINCT p.id), SUM(dp.cantidad),
+       SUM(dp.cantidad * dp.precio_unitario_en_el_momento)
+FROM pedidos p
+JOIN detalle_pedido dp ON dp.pedido_id = p.id
+JOIN productos pr ON pr.id = dp.producto_id
+GROUP BY 1, 2, 3, 4;
+"""
+
+LLENAR_PEDIDOS = """
+DELETE FROM resumen_diario_pedidos;
+INSERT INTO resumen_diario_pedidos (fecha, estado_pedido, num_pedidos, monto_total)
+SELECT (p.fecha_pedido AT TIME ZONE %s)::date, p.estado_pedido, COUNT(*), SUM(p.monto_total)
+FROM pedidos p
+GROUP BY 1, 2;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_eventos_stripe'),
+        ('analytics', '0004_resumenes_diarios_ventas'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [(LLENAR_VENTAS, [settings.TIME_ZONE]), (LLENAR_PEDIDOS, [settings.TIME_ZONE])],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,7 +1,46 @@
 # analytics/models.py
-from django.db import models
+import threading
+from datetime import timedelta
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from users.models import Usuario
 
+
+class ReporteCancelado(Exception):
+    """El usuario canceló el reporte mientras se generaba"""
+
+
+_conexion_avance = threading.local()
+
+
+def _ejecutar_en_autocommit(sql, parametros):
+    """
+    Ejecuta sql en una conexión propia del hilo, en autocommit, y devuelve la
+    primera fila. El avance se escribe mientras el lector de lotes
+    (analytics.generadores) mantiene abierta su transacción en la conexión
+    principal: por aquí cada UPDATE se confirma al momento, así que el
+    progreso se ve desde fuera y la fila del reporte no queda bloqueada
+    (cancelar_reporte y reencolar_abandonados no esperan al final).
+    """
+    conexion = getattr(_conexion_avance, 'conexion', None)
+    if conexion is None:
+        conexion = _conexion_avance.conexion = connections.create_connection(DEFAULT_DB_ALIAS)
+    conexion.close_if_unusable_or_obsolete()
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchone()
+
+
+def cerrar_conexion_avance():
+    """Cierra la conexión de avance del hilo (al terminar cada reporte)"""
+    conexion = getattr(_conexion_avance, 'conexion', None)
+    if conexion is not None:
+        conexion.close()
+        _conexion_avance.conexion = None
+
+
 class ReporteGenerado(models.Model):
     FORMATOS_SALIDA = (
         ('pdf', 'PDF'),
@@ -14,6 +53,7 @@ class ReporteGenerado(models.Model):
         ('clientes', 'Clientes'),
         ('productos', 'Productos'),
         ('inventario', 'Inventario'),
+        ('ventas_diarias', 'Ventas diarias'),
     )
     TIPOS_COMANDO = (
         ('voice', 'Voz'),
@@ -24,6 +64,7 @@ class ReporteGenerado(models.Model):
         ('procesando', 'Procesando'),
         ('completado', 'Completado'),
         ('error', 'Error'),
+        ('cancelado', 'Cancelado'),
     )
 
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
@@ -37,6 +78,15 @@ class ReporteGenerado(models.Model):
     url_descarga = models.URLField(max_length=500, null=True, blank=True)
     fecha_generacion = models.DateTimeField(auto_now_add=True)
     estado = models.CharField(max_length=20, choices=ESTADOS_REPORTE, default='pendiente')
+    # Seguimiento de la generación en segundo plano
+    progreso = models.PositiveSmallIntegerField(default=0)
+    mensaje_error = models.TextField(null=True, blank=True)
+    cancelacion_solicitada = models.BooleanField(default=False)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(null=True, blank=True)
+    # EXPLAIN (FORMAT JSON) de la consulta, para diagnosticar reportes lentos
+    plan_ejecucion = models.JSONField(null=True, blank=True)
 
     @classmethod
     def obtener_por_id(cls, reporte_id):
@@ -50,6 +100,131 @@ class ReporteGenerado(models.Model):
     def listar_por_usuario(cls, usuario_id):
         """Listar reportes de usuario"""
         return cls.objects.filter(usuario_id=usuario_id).order_by('-fecha_generacion')
+    
+    @classmethod
+    def reclamar_pendiente(cls, reporte_id=None):
+        """
+        Pasa un reporte de 'pendiente' a 'procesando' y lo devuelve. Usa
+        SKIP LOCKED para que varios workers nunca tomen el mismo reporte.
+        """
+        with transaction.atomic():
+            pendientes = cls.objects.select_for_update(skip_locked=True).filter(estado='pendiente')
+            if reporte_id is not None:
+                pendientes = pendientes.filter(id=reporte_id)
+            reporte = pendientes.order_by('fecha_generacion').first()
+            if reporte is None:
+                return None
+            ahora = timezone.now()
+            reporte.estado = 'procesando'
+            reporte.progreso = 0
+            reporte.fecha_inicio = ahora
+            reporte.fecha_actualizacion = ahora
+            reporte.save(update_fields=['estado', 'progreso', 'fecha_inicio', 'fecha_actualizacion'])
+        return reporte
+    
+    def actualizar_progreso(self, progreso):
+        """
+        Registra el avance (que también sirve de latido para
+        reencolar_abandonados) y lanza ReporteCancelado si el usuario lo
+        canceló. Usa su propia conexión: ver _ejecutar_en_autocommit.
+        """
+        self.progreso = max(0, min(100, int(progreso)))
+        fila = _ejecutar_en_autocommit(
+            f'UPDATE {self._meta.db_table} SET progreso = %s, fecha_actualizacion = %s '
+            f'WHERE id = %s RETURNING cancelacion_solicitada',
+            [self.progreso, timezone.now(), self.id]
+        )
+        if fila and fila[0]:
+            raise ReporteCancelado()
+    
+    def guardar_plan(self, plan):
+        """Guarda el plan de ejecución de la consulta del reporte"""
+        self.plan_ejecucion = plan
+        self.save(update_fields=['plan_ejecucion'])
+    
+    def cancelar(self):
+        """
+        Cancela un reporte. Si aún no empezó se cancela de inmediato; si se
+        está generando, el worker se detiene en el siguiente punto de avance.
+        Devuelve False si el reporte ya había terminado.
+        """
+        if ReporteGenerado.objects.filter(id=self.id, estado='pendiente').update(
+            estado='cancelado', cancelacion_solicitada=True, fecha_fin=timezone.now()
+        ):
+            self.refresh_from_db()
+            return True
+        if ReporteGenerado.objects.filter(id=self.id, estado='procesando').update(
+            cancelacion_solicitada=True
+        ):
+            self.refresh_from_db()
+            return True
+        return False
+    
+    def finalizar(self, estado, url_descarga=None, mensaje_error=None):
+        """Cierra el reporte como completado, error o cancelado"""
+        self.estado = estado
+        self.url_descarga = url_descarga or self.url_descarga
+        self.mensaje_error = mensaje_error
+        if estado == 'completado':
+            self.progreso = 100
+        self.fecha_fin = self.fecha_actualizacion = timezone.now()
+        self.save(update_fields=[
+            'estado', 'url_descarga', 'mensaje_error', 'progreso', 'fecha_fin', 'fecha_actualizacion'
+        ])
+    
+    @classmethod
+    def reencolar_abandonados(cls, minutos=30):
+        """Devuelve a 'pendiente' los reportes cuyo worker dejó de dar señales"""
+        limite = timezone.now() - timedelta(minutes=minutos)
+        return cls.objects.filter(
+            estado='procesando', cancelacion_solicitada=False, fecha_actualizacion__lt=limite
+        ).update(estado='pendiente', progreso=0)
+
+    class Meta:
+        db_table = 'reportes_generados'
+        indexes = [
+            models.Index(fields=['estado', 'fecha_generacion'], name='reportes_estado_fecha_idx'),
+        ]
+
+
+# =============================================================================
+# RESÚMENES DIARIOS DE VENTAS
+# =============================================================================
+# Tablas derivadas de pedidos/detalle_pedido que mantiene analytics.resumenes.
+# Se recalculan por día completo, así que nunca se editan a mano.
+
+class VentaDiaria(models.Model):
+    """Ventas de un día por estado del pedido, categoría y marca"""
+    fecha = models.DateField()
+    estado_pedido = models.CharField(max_length=50)
+    # Sin restricción de clave foránea: el resumen conserva el id aunque la
+    # categoría o la marca se borren, hasta el próximo recálculo del día
+    categoria = models.ForeignKey('products.Categoria', on_delete=models.DO_NOTHING,
+                                  db_constraint=False, null=True, blank=True, related_name='+')
+    marca = models.ForeignKey('products.Marca', on_delete=models.DO_NOTHING,
+                              db_constraint=False, null=True, blank=True, related_name='+')
+    num_pedidos = models.IntegerField(default=0)
+    unidades = models.IntegerField(default=0)
+    monto_productos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'ventas_diarias'
+        constraints = [
+            models.UniqueConstraint(
+                F('fecha'), F('estado_pedido'),
+                Coalesce(F('categoria_id'), Value(0)), Coalesce(F('marca_id'), Value(0)),
+                name='ventas_diarias_unica',
+            ),
+        ]
+
+
+class ResumenDiarioPedidos(models.Model):
+    """Cantidad y monto total (con envío e impuestos) de los pedidos de un día por estado"""
+    fecha = models.DateField()
+    estado_pedido = models.CharField(max_length=50)
+    num_pedidos = models.IntegerField(default=0)
+    monto_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
 
     class Meta:
-        db_table = 'reportes_generados'
\ No newline at end of file
+        db_table = 'resumen_diario_pedidos'
+        unique_together = ('fecha', 'estado_pedido')
@@ -0,0 +1,182 @@
+# analytics/resumenes.py
+"""
+Mantenimiento de los resúmenes diarios de ventas (ventas_diarias y
+resumen_diario_pedidos).
+
+Cada vez que un pedido cambia (se crea, cambia de estado o se borra) su día
+queda marcado y, al confirmarse la transacción, se encola en core.tareas el
+recálculo de ese día: se borran sus filas y se vuelven a insertar agregando
+pedidos y detalle_pedido. Al recalcular el día entero en lugar de sumar y
+restar diferencias, el resumen se corrige solo aunque algún cambio se haya
+hecho por fuera del ORM.
+
+El recálculo no corre en la petición que hizo el checkout: mientras un día
+tenga un recálculo encolado que todavía no empezó, los cambios siguientes de
+ese día no encolan otro (el que espera ya los verá). El advisory lock es por
+día, así que solo se serializan los recálculos del mismo día.
+
+El día de un pedido es la fecha local (TIME_ZONE) de fecha_pedido.
+"""
+import logging
+import threading
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from core.tareas import cola_tareas
+
+logger = logging.getLogger(__name__)
+
+# Primera mitad del advisory lock (la segunda es el día) que serializa los
+# recálculos de un mismo día entre procesos
+CLAVE_BLOQUEO = 7_310_010
+
+_pendientes = threading.local()
+
+# Días con un recálculo encolado en este proceso que todavía no empezó
+_en_cola = set()
+_en_cola_lock = threading.Lock()
+
+
+def fecha_local(momento):
+    """Día (en la zona horaria del sitio) al que pertenece un datetime"""
+    return timezone.localtime(momento, timezone.get_default_timezone()).date()
+
+
+def inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min), timezone.get_default_timezone())
+
+
+def recalcular_resumenes(desde, hasta):
+    """
+    Reconstruye los resúmenes de los días [desde, hasta] (ambos incluidos).
+    Devuelve la cantidad de filas insertadas en (ventas_diarias, resumen_diario_pedidos).
+    """
+    zona = timezone.get_default_timezone_name()
+    # Rango semiabierto sobre fecha_pedido para aprovechar el índice
+    inicio = inicio_del_dia(desde)
+    fin = inicio_del_dia(hasta + timedelta(days=1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Un lock por día, tomados en orden para no bloquearse entre rangos
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(%s, dia) FROM generate_series(%s::int, %s::int) AS dia ORDER BY dia',
+            [CLAVE_BLOQUEO, desde.toordinal(), hasta.toordinal()]
+        )
+
+        cursor.execute('DELETE FROM ventas_diarias WHERE fecha BETWEEN %s AND %s', [desde, hasta])
+        cursor.execute("""
+            INSERT INTO ventas_diarias
+                (fecha, estado_pedido, categoria_id, marca_id, num_pedidos, unidades, monto_productos)
+            SELECT (p.fecha_pedido AT TIME ZONE %s)::date, p.estado_pedido,
+                   pr.categoria_id, pr.marca_id,
+                   COUNT(DISTINCT p.id), SUM(dp.cantidad),
+                   SUM(dp.cantidad * dp.precio_unitario_en_el_momento)
+            FROM pedidos p
+            JOIN detalle_pedido dp ON dp.pedido_id = p.id
+            JOIN productos pr ON pr.id = dp.producto_id
+            WHERE p.fecha_pedido >= %s AND p.fecha_pedido < %s
+            GROUP BY 1, 2, 3, 4
+        """, [zona, inicio, fin])
+        ventas = cursor.rowcount
+
+        cursor.execute('DELETE FROM resumen_diario_pedidos WHERE fecha BETWEEN %s AND %s', [desde, hasta])
+        cursor.execute("""
+            INSERT INTO resumen_diario_pedidos (fecha, estado_pedido, num_pedidos, monto_total)
+            SELECT (p.fecha_pedido AT TIME ZONE %s)::date, p.estado_pedido,
+                   COUNT(*), SUM(p.monto_total)
+            FROM pedidos p
+            WHERE p.fecha_pedido >= %s AND p.fecha_pedido < %s
+            GROUP BY 1, 2
+        """, [zona, inicio, fin])
+        pedidos = cursor.rowcount
+
+    return ventas, pedidos
+
+
+def rango_pedidos():
+    """Primer y último día con pedidos, o (None, None) si no hay ninguno"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT MIN(fecha_pedido), MAX(fecha_pedido) FROM pedidos')
+        primero, ultimo = cursor.fetchone()
+    if primero is None:
+        return None, None
+    return fecha_local(primero), fecha_local(ultimo)
+
+
+# =============================================================================
+# RECÁLCULO AL CONFIRMAR LA TRANSACCIÓN
+# =============================================================================
+
+def _fechas_pendientes():
+    if not hasattr(_pendientes, 'fechas'):
+        _pendientes.fechas = set()
+    return _pendientes.fechas
+
+
+def _pedidos_pendientes():
+    if not hasattr(_pendientes, 'pedidos'):
+        _pendientes.pedidos = set()
+    return _pendientes.pedidos
+
+
+def programar_recalculo(momento):
+    """
+    Recalcula el día de `momento` cuando se confirme la transacción actual.
+    Varios pedidos del mismo día en una transacción se recalculan una vez.
+    """
+    if momento is None:
+        return
+    _fechas_pendientes().add(fecha_local(momento))
+    transaction.on_commit(_encolar_pendientes)
+
+
+def programar_recalculo_pedido(pedido_id):
+    """
+    Como programar_recalculo, pero a partir del id del pedido. El día se
+    resuelve al confirmar, con una sola consulta para todos los pedidos de la
+    transacción.
+    """
+    if pedido_id is None:
+        return
+    _pedidos_pendientes().add(pedido_id)
+    transaction.on_commit(_encolar_pendientes)
+
+
+def _encolar_pendientes():
+    fechas = _fechas_pendientes()
+    pedidos = _pedidos_pendientes()
+    if pedidos:
+        from orders.models import Pedido
+        ids = list(pedidos)
+        pedidos.clear()
+        # Los pedidos borrados ya programaron su día desde su propia señal
+        for momento in Pedido.objects.filter(id__in=ids).values_list('fecha_pedido', flat=True):
+            fechas.add(fecha_local(momento))
+
+    # También quedan aquí los días de transacciones revertidas; recalcularlos no cambia nada
+    while fechas:
+        fecha = fechas.pop()
+        if not cola_tareas.en_proceso:
+            # TAREAS_MODO = 'db': no hay hilos en el proceso web
+            _recalcular_dia(fecha)
+            continue
+        with _en_cola_lock:
+            if fecha in _en_cola:
+                continue
+            _en_cola.add(fecha)
+        cola_tareas.encolar(recalcular_dia_encolado, fecha)
+
+
+def recalcular_dia_encolado(fecha):
+    """Tarea de core.tareas: recalcula un día marcado por programar_recalculo"""
+    # Se saca de la cola antes de leer: lo que se confirme desde ahora encola otro
+    with _en_cola_lock:
+        _en_cola.discard(fecha)
+    _recalcular_dia(fecha)
+
+
+def _recalcular_dia(fecha):
+    try:
+        recalcular_resumenes(fecha, fecha)
+    except Exception:
+        logger.exception('No se pudo recalcular el resumen de ventas del %s', fecha)
@@ -12,7 +12,9 @@ class ReporteGeneradoSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReporteGenerado
         fields = '__all__'
-        read_only_fields = ('fecha_generacion', 'estado', 'url_descarga')
+        read_only_fields = ('fecha_generacion', 'estado', 'url_descarga', 'progreso', 'mensaje_error',
+                            'cancelacion_solicitada', 'fecha_inicio', 'fecha_fin', 'fecha_actualizacion',
+                            'plan_ejecucion')
 
 class ReporteSolicitudSerializer(serializers.Serializer):
     tipo_reporte = serializers.ChoiceField(choices=ReporteGenerado.TIPOS_REPORTE)
@@ -20,4 +22,13 @@ class ReporteSolicitudSerializer(serializers.Serializer):
     fecha_inicio = serializers.DateField(required=False)
     fecha_fin = serializers.DateField(required=False)
     categoria_id = serializers.IntegerField(required=False)
-    cliente_id = serializers.IntegerField(required=False)
\ No newline at end of file
+    cliente_id = serializers.IntegerField(required=False)
+
+class ReporteEstadoSerializer(serializers.ModelSerializer):
+    """Respuesta ligera para consultar el avance de un reporte"""
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    
+    class Meta:
+        model = ReporteGenerado
+        fields = ('id', 'estado', 'estado_display', 'progreso', 'mensaje_error', 'url_descarga',
+                  'fecha_generacion', 'fecha_inicio', 'fecha_fin')
\ No newline at end of file
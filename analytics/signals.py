@@ -0,0 +1,33 @@
+# analytics/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.cache import incrementar_al_confirmar
+from orders.models import Pedido, DetallePedido
+from users.models import Usuario
+from .resumenes import programar_recalculo, programar_recalculo_pedido
+
+
+@receiver([post_save, post_delete], sender=Pedido)
+def recalcular_resumen_pedido(sender, instance, **kwargs):
+    """Mantiene al día los resúmenes diarios ante cualquier cambio del pedido"""
+    programar_recalculo(instance.fecha_pedido)
+
+
+@receiver([post_save, post_delete], sender=DetallePedido)
+def recalcular_resumen_detalle(sender, instance, **kwargs):
+    # Sin consultar el pedido aquí: el día se resuelve al confirmar la transacción
+    if DetallePedido.pedido.is_cached(instance):
+        programar_recalculo(instance.pedido.fecha_pedido)
+    else:
+        programar_recalculo_pedido(instance.pedido_id)
+
+
+@receiver([post_save, post_delete], sender=Pedido)
+@receiver([post_save, post_delete], sender=DetallePedido)
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_reportes(sender, update_fields=None, **kwargs):
+    """Deja obsoletos los reportes reutilizables que leen la tabla modificada"""
+    # Cada inicio de sesión guarda last_login, que ningún reporte muestra
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    incrementar_al_confirmar(sender._meta.db_table)
@@ -0,0 +1,65 @@
+# analytics/tareas.py
+from core.tareas import cola_tareas
+from notifications.models import Notificacion
+from .consultas import construir_consulta
+from .generadores import GENERADORES
+from .models import ReporteGenerado, ReporteCancelado, cerrar_conexion_avance
+
+
+def encolar_reporte(reporte):
+    """Programa la generación del reporte cuando se confirme la transacción"""
+    cola_tareas.encolar(procesar_reporte, reporte.id)
+
+
+def procesar_reporte(reporte_id=None):
+    """
+    Reclama un reporte pendiente (el indicado o el más antiguo) y lo genera.
+    Devuelve el reporte procesado o None si no había nada que reclamar.
+    """
+    reporte = ReporteGenerado.reclamar_pendiente(reporte_id)
+    if reporte is None:
+        return None
+
+    try:
+        consulta = construir_consulta({'tipo_reporte': reporte.tipo_reporte, **(reporte.parametros or {})})
+        reporte.guardar_plan(consulta.explicar())
+        generador = GENERADORES.get(reporte.formato_salida, GENERADORES['csv'])
+        url_descarga = generador(consulta, reporte.id, progreso=reporte.actualizar_progreso)
+        reporte.finalizar('completado', url_descarga=url_descarga)
+    except ReporteCancelado:
+        reporte.finalizar('cancelado')
+    except Exception as e:
+        reporte.finalizar('error', mensaje_error=str(e))
+    finally:
+        cerrar_conexion_avance()
+
+    notificar_reporte(reporte)
+    return reporte
+
+
+def notificar_reporte(reporte):
+    """Avisa al usuario que su reporte terminó (o falló)"""
+    if reporte.estado == 'completado':
+        titulo = 'Reporte listo'
+        mensaje = f'Tu reporte de {reporte.get_tipo_reporte_display().lower()} está listo para descargar.'
+    elif reporte.estado == 'error':
+        titulo = 'Error al generar reporte'
+        mensaje = f'No se pudo generar tu reporte de {reporte.get_tipo_reporte_display().lower()}.'
+    else:
+        return None
+
+    return Notificacion.objects.create(
+        usuario_id=reporte.usuario_id,
+        tipo='sistema',
+        titulo=titulo,
+        mensaje=mensaje,
+        datos_adicionales={
+            'reporte_id': reporte.id,
+            'estado': reporte.estado,
+            'url_descarga': reporte.url_descarga,
+            # Reportes pedidos por voz o texto: el frontend enlaza el aviso con el comando
+            'tipo_comando': reporte.tipo_comando,
+            'comando_voz_id': reporte.comando_voz_id,
+            'comando_texto_id': reporte.comando_texto_id,
+        }
+    )
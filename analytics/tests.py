@@ -1,3 +1,180 @@
-from django.test import TestCase
+# analytics/tests.py
+import io
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from core.pruebas import crear_usuario, crear_productos
+from orders.models import Pedido, DetallePedido
+from . import resumenes
+from .generadores import escribir_csv
+from .models import ReporteGenerado, ReporteCancelado, ResumenDiarioPedidos, VentaDiaria, cerrar_conexion_avance
 
-# Create your tests here.
+
+# =============================================================================
+# GENERACIÓN EN STREAMING
+# =============================================================================
+
+class CancelacionDuranteStreamingTests(TransactionTestCase):
+    """El avance y la cancelación deben funcionar mientras el lector tiene su transacción abierta"""
+
+    FILAS = 20000
+
+    def setUp(self):
+        ReporteGenerado.objects.create(
+            usuario=crear_usuario('streaming'), tipo_reporte='ventas', formato_salida='csv'
+        )
+        self.reporte = ReporteGenerado.reclamar_pendiente()
+        self.consulta = SimpleNamespace(
+            sql='SELECT n FROM generate_series(1, %s) AS n',
+            parametros=[self.FILAS],
+            nombres_columnas=['n'],
+        )
+
+    def tearDown(self):
+        cerrar_conexion_avance()
+
+    def _desde_otra_conexion(self, funcion):
+        """Ejecuta funcion en otro hilo (otra conexión); falla si queda bloqueada"""
+        resultado = {}
+
+        def ejecutar():
+            try:
+                resultado['valor'] = funcion()
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=ejecutar)
+        hilo.start()
+        hilo.join(timeout=10)
+        self.assertFalse(hilo.is_alive(), 'La operación quedó bloqueada por la transacción del lector')
+        return resultado['valor']
+
+    def test_cancelar_a_mitad_del_streaming(self):
+        observado = {}
+
+        def progreso(porcentaje):
+            if 'progreso' not in observado:
+                # Primer lote: el avance ya está confirmado y la fila no está bloqueada
+                observado['progreso'] = self._desde_otra_conexion(
+                    lambda: ReporteGenerado.objects.get(id=self.reporte.id).progreso
+                )
+                observado['cancelado'] = self._desde_otra_conexion(
+                    lambda: ReporteGenerado.objects.get(id=self.reporte.id).cancelar()
+                )
+            self.reporte.actualizar_progreso(porcentaje)
+
+        with self.assertRaises(ReporteCancelado):
+            escribir_csv(self.consulta, io.StringIO(), progreso=progreso)
+
+        self.assertTrue(observado['cancelado'])
+        self.reporte.refresh_from_db()
+        self.assertTrue(self.reporte.cancelacion_solicitada)
+        self.assertGreater(self.reporte.progreso, 0)
+        self.assertLess(self.reporte.progreso, 90)
+
+    def test_avance_visible_durante_el_streaming(self):
+        vistos = []
+
+        def progreso(porcentaje):
+            self.reporte.actualizar_progreso(porcentaje)
+            vistos.append(self._desde_otra_conexion(
+                lambda: ReporteGenerado.objects.get(id=self.reporte.id).progreso
+            ))
+
+        filas = escribir_csv(self.consulta, io.StringIO(), progreso=progreso)
+
+        self.assertEqual(filas, self.FILAS)
+        self.assertGreater(len(vistos), 1)
+        self.assertEqual(vistos, sorted(vistos))
+        self.assertGreater(vistos[0], 0)
+
+
+# =============================================================================
+# RESÚMENES DIARIOS
+# =============================================================================
+
+class ResumenesDiariosTests(TestCase):
+
+    def setUp(self):
+        self.usuario = crear_usuario('resumen')
+        self.producto = crear_productos(1)[0]
+        self.hoy = timezone.localdate()
+
+    def tearDown(self):
+        resumenes._en_cola.clear()
+
+    def _pedido(self, monto='100.00'):
+        return Pedido.objects.create(
+            usuario=self.usuario, monto_total=Decimal(monto), estado_pedido='entregado', direccion_envio='Prueba'
+        )
+
+    def test_cambios_del_mismo_dia_encolan_un_solo_recalculo(self):
+        with mock.patch.object(resumenes.cola_tareas, 'encolar') as encolar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._pedido()
+            with self.captureOnCommitCallbacks(execute=True):
+                self._pedido()
+
+        # El segundo checkout encuentra el día ya encolado y no recalcula nada
+        encolar.assert_called_once_with(resumenes.recalcular_dia_encolado, self.hoy)
+        self.assertFalse(ResumenDiarioPedidos.objects.exists())
+
+        resumenes.recalcular_dia_encolado(self.hoy)
+        resumen = ResumenDiarioPedidos.objects.get(fecha=self.hoy, estado_pedido='entregado')
+        self.assertEqual(resumen.num_pedidos, 2)
+        self.assertEqual(resumen.monto_total, Decimal('200.00'))
+
+        # Una vez empezado el recálculo, un cambio nuevo vuelve a encolar
+        with mock.patch.object(resumenes.cola_tareas, 'encolar') as encolar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._pedido()
+        encolar.assert_called_once_with(resumenes.recalcular_dia_encolado, self.hoy)
+
+    def test_detalle_no_consulta_el_pedido(self):
+        pedido_id = self._pedido().id
+
+        with mock.patch.object(resumenes.cola_tareas, 'encolar') as encolar:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertNumQueries(1):
+                    DetallePedido.objects.create(
+                        pedido_id=pedido_id, producto=self.producto, cantidad=3,
+                        precio_unitario_en_el_momento=Decimal('10.00')
+                    )
+        encolar.assert_called_once_with(resumenes.recalcular_dia_encolado, self.hoy)
+
+        resumenes.recalcular_dia_encolado(self.hoy)
+        venta = VentaDiaria.objects.get(fecha=self.hoy, estado_pedido='entregado')
+        self.assertEqual((venta.num_pedidos, venta.unidades), (1, 3))
+        self.assertEqual(venta.monto_productos, Decimal('30.00'))
+
+    def test_el_bloqueo_es_por_dia(self):
+        ayer = self.hoy - timedelta(days=1)
+        bloqueado, liberar = threading.Event(), threading.Event()
+
+        def bloquear_ayer():
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [resumenes.CLAVE_BLOQUEO, ayer.toordinal()])
+                    bloqueado.set()
+                    liberar.wait(timeout=10)
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=bloquear_ayer)
+        hilo.start()
+        try:
+            self.assertTrue(bloqueado.wait(timeout=10))
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '2s'")
+            # Otro día no espera al recálculo en curso de ayer
+            self._pedido()
+            resumenes.recalcular_resumenes(self.hoy, self.hoy)
+        finally:
+            liberar.set()
+            hilo.join(timeout=10)
+        self.assertTrue(ResumenDiarioPedidos.objects.filter(fecha=self.hoy).exists())
@@ -5,8 +5,11 @@ from . import views
 urlpatterns = [
     path('reportes/', views.ReporteGeneradoListView.as_view(), name='lista_reportes'),
     path('reportes/generar/', views.generar_reporte, name='generar_reporte'),
+    path('reportes/exportar/csv/', views.exportar_reporte_csv, name='exportar_reporte_csv'),
 
     path('reportes/<int:reporte_id>/', views.obtener_reporte_por_id, name='obtener_reporte_por_id'),
+    path('reportes/<int:reporte_id>/estado/', views.estado_reporte, name='estado_reporte'),
+    path('reportes/<int:reporte_id>/cancelar/', views.cancelar_reporte, name='cancelar_reporte'),
     path('reportes/usuario/<int:usuario_id>/', views.listar_reportes_usuario, name='reportes_usuario'),
     path('reportes/mis-reportes/', views.listar_reportes_usuario, name='mis_reportes'),
 ]
\ No newline at end of file
@@ -0,0 +1,74 @@
+# core/cache.py
+"""
+Utilidades de caché compartidas por las apps.
+
+Las invalidaciones se hacen con contadores de generación por tabla: las
+claves de caché incluyen la generación vigente de cada tabla de la que
+dependen, así que incrementar el contador deja obsoletas todas esas claves
+sin tener que borrarlas una por una.
+"""
+import time
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _clave_generacion(tabla):
+    return f'generacion:{tabla}'
+
+
+def _generacion_inicial():
+    # Un valor basado en el reloj evita reutilizar generaciones antiguas si el
+    # contador se pierde (reinicio del proceso o expulsión de la caché)
+    return time.time_ns()
+
+
+def obtener_generaciones(tablas, alias='default'):
+    """Devuelve {tabla: generación} leyendo todos los contadores de una vez"""
+    cache = caches[alias]
+    claves = {_clave_generacion(tabla): tabla for tabla in tablas}
+    valores = cache.get_many(list(claves))
+
+    faltantes = [clave for clave in claves if clave not in valores]
+    for clave in faltantes:
+        cache.add(clave, _generacion_inicial(), timeout=None)
+    if faltantes:
+        valores.update(cache.get_many(faltantes))
+
+    return {tabla: valores.get(clave) for clave, tabla in claves.items()}
+
+
+def incrementar_generacion(tabla, alias='default'):
+    """Invalida todas las entradas que dependen de la tabla"""
+    cache = caches[alias]
+    clave = _clave_generacion(tabla)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        cache.set(clave, _generacion_inicial(), timeout=None)
+        return cache.get(clave)
+
+
+def incrementar_al_confirmar(*tablas, alias='default'):
+    """Incrementa las generaciones cuando la transacción actual se confirme"""
+    def incrementar():
+        for tabla in tablas:
+            incrementar_generacion(tabla, alias)
+    transaction.on_commit(incrementar)
+
+
+def registrar_evento(grupo, evento, alias='default'):
+    """Incrementa un contador de estadísticas (hits, misses, ...)"""
+    cache = caches[alias]
+    clave = f'estadisticas:{grupo}:{evento}'
+    try:
+        cache.incr(clave)
+    except ValueError:
+        if not cache.add(clave, 1, timeout=None):
+            cache.incr(clave)
+
+
+def obtener_estadisticas(grupo, eventos, alias='default'):
+    """Devuelve {evento: contador} para un grupo de estadísticas"""
+    claves = {f'estadisticas:{grupo}:{evento}': evento for evento in eventos}
+    valores = caches[alias].get_many(list(claves))
+    return {evento: valores.get(clave, 0) for clave, evento in claves.items()}
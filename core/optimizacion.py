@@ -0,0 +1,167 @@
+# core/optimizacion.py
+"""
+select_related / prefetch_related a partir de los serializers.
+
+Cada serializer declara las relaciones que lee directamente (campos con
+source 'categoria.nombre_categoria', SerializerMethodField que recorren
+relaciones, ...) en los atributos de clase `select_related` y
+`prefetch_related`. Los serializers anidados no hace falta declararlos: un
+anidado simple (source='producto') agrega sus relaciones con el prefijo
+'producto__' y uno many=True (source='detallepedido_set') se convierte en un
+Prefetch cuyo queryset ya viene optimizado con las relaciones del hijo. Así
+el número de consultas de una página no depende de cuántas filas tenga.
+
+Un serializer también puede declarar `only` (campos del modelo que lee,
+incluidos los de relaciones: 'inventario__stock_actual'); si algún anidado
+lo declara, el queryset se restringe con .only() y el padre carga todos sus
+campos propios más los del anidado.
+
+Un serializer puede definir anotar(queryset) (classmethod) para agregar
+columnas calculadas en SQL; se aplica también a los querysets de los Prefetch.
+
+Con ExpandibleMixin los anidados usan por defecto una proyección resumida y
+?expand=<source> los reemplaza por el serializer completo; el grafo se
+calcula por cada combinación de expansiones.
+
+Las vistas genéricas lo aplican con ConsultaOptimizadaMixin y las demás con
+optimizar_queryset o precargar.
+"""
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+_grafos = {}
+# Sources que algún serializer permite expandir (ver ExpandibleMixin)
+_expandibles = set()
+
+
+def _con_prefijo(prefijo, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f'{prefijo}__{lookup.prefetch_through}', queryset=lookup.queryset,
+                        to_attr=lookup.to_attr)
+    return f'{prefijo}__{lookup}'
+
+
+def _campos_modelo(serializer_class):
+    return [campo.name for campo in serializer_class.Meta.model._meta.concrete_fields]
+
+
+def grafo_relaciones(serializer_class, expand=frozenset()):
+    """
+    (select_related, prefetch_related, only) que necesita el serializer y sus
+    anidados; only es None si se cargan todos los campos.
+    """
+    clave = (serializer_class, expand)
+    if clave in _grafos:
+        return _grafos[clave]
+
+    select = list(getattr(serializer_class, 'select_related', ()))
+    prefetch = list(getattr(serializer_class, 'prefetch_related', ()))
+    only = getattr(serializer_class, 'only', None)
+    only = list(only) if only is not None else None
+    for campo in serializer_class(context={'expand': expand}).fields.values():
+        if campo.source == '*' or not isinstance(campo, BaseSerializer):
+            continue
+        origen = campo.source.replace('.', '__')
+        if isinstance(campo, ListSerializer):
+            hijo = type(campo.child)
+            prefetch.append(Prefetch(origen, queryset=optimizar_queryset(hijo.Meta.model.objects.all(), hijo, expand)))
+        else:
+            hijo_select, hijo_prefetch, hijo_only = grafo_relaciones(type(campo), expand)
+            select.append(origen)
+            select.extend(_con_prefijo(origen, lookup) for lookup in hijo_select)
+            prefetch.extend(_con_prefijo(origen, lookup) for lookup in hijo_prefetch)
+            if hijo_only is not None:
+                if only is None:
+                    only = _campos_modelo(serializer_class)
+                only.append(origen)
+                only.extend(_con_prefijo(origen, nombre) for nombre in hijo_only)
+
+    _grafos[clave] = (
+        tuple(dict.fromkeys(select)),
+        tuple(prefetch),
+        tuple(dict.fromkeys(only)) if only is not None else None,
+    )
+    return _grafos[clave]
+
+
+def _ruta(lookup):
+    return lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+
+
+def optimizar_queryset(queryset, serializer_class, expand=frozenset()):
+    """Aplica al queryset las relaciones y columnas que va a leer serializer_class"""
+    select, prefetch, only = grafo_relaciones(serializer_class, expand)
+    anotar = getattr(serializer_class, 'anotar', None)
+    if anotar is not None:
+        queryset = anotar(queryset)
+    if select:
+        queryset = queryset.select_related(*select)
+    if only is not None:
+        queryset = queryset.only(*only)
+    if prefetch:
+        # Un prefetch_related('detallepedido_set') ya puesto por la vista se
+        # reemplaza por el Prefetch optimizado (Django no admite ambos)
+        rutas = {_ruta(lookup) for lookup in prefetch}
+        anteriores = [
+            lookup for lookup in queryset._prefetch_related_lookups if _ruta(lookup) not in rutas
+        ]
+        queryset = queryset.prefetch_related(None).prefetch_related(*anteriores, *prefetch)
+    return queryset
+
+
+def precargar(instancias, serializer_class, expand=frozenset()):
+    """
+    Igual que optimizar_queryset para objetos ya cargados (p. ej. el pedido
+    recién creado): cada relación se trae con una consulta para todos.
+    """
+    select, prefetch, _ = grafo_relaciones(serializer_class, expand)
+    prefetch_related_objects(list(instancias), *select, *prefetch)
+
+
+def expansiones_solicitadas(request):
+    """Sources pedidos en ?expand=producto,... que algún serializer sabe expandir"""
+    if request is None:
+        return frozenset()
+    valor = request.query_params.get('expand', '')
+    return frozenset(nombre.strip() for nombre in valor.split(',')) & _expandibles
+
+
+class ExpandibleMixin:
+    """
+    Para serializers: `expandibles` asocia el nombre de un campo anidado
+    (resumido) con el serializer completo que lo reemplaza cuando la petición
+    incluye su source en ?expand=.
+
+        producto_detalle = ProductoResumenSerializer(source='producto', read_only=True)
+        expandibles = {'producto_detalle': ProductoSerializer}
+    """
+    expandibles = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for nombre in cls.expandibles:
+            _expandibles.add(cls._declared_fields[nombre].source)
+
+    def get_fields(self):
+        campos = super().get_fields()
+        expand = self.context.get('expand')
+        if expand is None:
+            expand = expansiones_solicitadas(self.context.get('request'))
+        for nombre, completo in self.expandibles.items():
+            if campos[nombre].source in expand:
+                campos[nombre] = completo(source=campos[nombre].source, read_only=True)
+        return campos
+
+
+class ConsultaOptimizadaMixin:
+    """
+    Para vistas genéricas de DRF: optimiza el queryset (listados y detalle)
+    con el grafo de relaciones del serializer de la vista.
+    """
+
+    def filter_queryset(self, queryset):
+        return optimizar_queryset(
+            super().filter_queryset(queryset),
+            self.get_serializer_class(),
+            expansiones_solicitadas(self.request),
+        )
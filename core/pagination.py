@@ -0,0 +1,150 @@
+# core/pagination.py
+import base64
+import json
+from datetime import date, datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PaginacionHibrida(PageNumberPagination):
+    """
+    Paginación por número de página (la de siempre) con un modo opcional por
+    cursor (keyset).
+
+    El modo cursor se activa con ?paginacion=cursor o al recibir ?cursor=, y
+    solo en las vistas que declaran `ordering_cursor`, por ejemplo
+    ('-fecha_pedido', '-id'). En lugar de COUNT(*) + OFFSET filtra por la
+    posición del último registro visto, así que el costo de una página no
+    depende de su profundidad. En este modo se ignora ?ordering y la respuesta
+    no incluye `count`.
+    """
+
+    cursor_query_param = 'cursor'
+    modo_query_param = 'paginacion'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering_cursor = getattr(view, 'ordering_cursor', None)
+        self.modo_cursor = bool(self.ordering_cursor) and (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.modo_query_param) == 'cursor'
+        )
+        if not self.modo_cursor:
+            # Sin orden explícito, las páginas por número no serían estables
+            if self.ordering_cursor and not queryset.ordered:
+                queryset = queryset.order_by(*self.ordering_cursor)
+            return super().paginate_queryset(queryset, request, view)
+        return self._paginar_por_cursor(queryset, request)
+
+    def get_paginated_response(self, data):
+        if not self.modo_cursor:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.modo_cursor:
+            return super().get_next_link()
+        if self.posicion_siguiente is None:
+            return None
+        return self._enlace(self.posicion_siguiente, reverso=False)
+
+    def get_previous_link(self):
+        if not self.modo_cursor:
+            return super().get_previous_link()
+        if self.posicion_anterior is None:
+            return None
+        return self._enlace(self.posicion_anterior, reverso=True)
+
+    # =========================================================================
+    # MODO CURSOR
+    # =========================================================================
+
+    def _paginar_por_cursor(self, queryset, request):
+        self.request = request
+        self.tamano = self.get_page_size(request)
+        posicion, reverso = self._decodificar_cursor(request.query_params.get(self.cursor_query_param))
+
+        orden = [self._invertir(campo) for campo in self.ordering_cursor] if reverso else list(self.ordering_cursor)
+        queryset = queryset.order_by(*orden)
+        if posicion is not None:
+            queryset = queryset.filter(self._filtro_posicion(orden, posicion))
+
+        # Un registro extra indica si hay más páginas en esta dirección
+        resultados = list(queryset[:self.tamano + 1])
+        hay_mas = len(resultados) > self.tamano
+        resultados = resultados[:self.tamano]
+        if reverso:
+            resultados.reverse()
+
+        primera = self._posicion_de(resultados[0]) if resultados else None
+        ultima = self._posicion_de(resultados[-1]) if resultados else None
+        if reverso:
+            self.posicion_siguiente = ultima if posicion is not None else None
+            self.posicion_anterior = primera if hay_mas else None
+        else:
+            self.posicion_siguiente = ultima if hay_mas else None
+            self.posicion_anterior = primera if posicion is not None else None
+        return resultados
+
+    @staticmethod
+    def _invertir(campo):
+        return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+    @staticmethod
+    def _filtro_posicion(orden, posicion):
+        """
+        Registros posteriores a la posición según el orden dado:
+        (a, b) > (x, y)  ≡  a >= x AND (a > x OR (a = x AND b > y)).
+        La cota sobre el primer campo permite que el índice compuesto limite
+        el rango del recorrido.
+        """
+        condicion = Q()
+        iguales = {}
+        for campo, valor in zip(orden, posicion):
+            nombre = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            condicion |= Q(**iguales, **{f'{nombre}__{operador}': valor})
+            iguales[nombre] = valor
+
+        primero = orden[0]
+        operador = 'lte' if primero.startswith('-') else 'gte'
+        return Q(**{f'{primero.lstrip("-")}__{operador}': posicion[0]}) & condicion
+
+    def _posicion_de(self, instancia):
+        valores = []
+        for campo in self.ordering_cursor:
+            valor = getattr(instancia, campo.lstrip('-'))
+            if isinstance(valor, (datetime, date)):
+                valor = valor.isoformat()
+            valores.append(valor)
+        return valores
+
+    def _decodificar_cursor(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            posicion = datos['p']
+            if len(posicion) != len(self.ordering_cursor):
+                raise ValueError
+            return posicion, bool(datos.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound('Cursor inválido')
+
+    @staticmethod
+    def codificar_cursor(posicion, reverso=False):
+        """Cursor opaco para la posición [valor_campo_1, valor_campo_2, ...]"""
+        return base64.urlsafe_b64encode(
+            json.dumps({'p': posicion, 'r': int(reverso)}).encode('utf-8')
+        ).decode('ascii')
+
+    def _enlace(self, posicion, reverso):
+        cursor = self.codificar_cursor(posicion, reverso)
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
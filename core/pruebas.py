@@ -0,0 +1,115 @@
+# core/pruebas.py
+"""
+Datos desechables para las pruebas y los comandos de benchmark: usuarios,
+productos con inventario, carritos y pedidos. También el mixin de pruebas que
+verifica que un endpoint no haga N+1.
+"""
+import uuid
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from products.models import Categoria, CategoriaEnvio, Producto, Inventario
+from orders.models import Carrito, DetalleCarrito, Pedido, DetallePedido
+
+Usuario = get_user_model()
+
+
+def crear_usuario(prefijo='benchmark'):
+    """Crea un usuario con email único"""
+    return Usuario.objects.create_user(
+        email=f'{prefijo}-{uuid.uuid4().hex[:10]}@smartsales365.com',
+        password=None,
+        nombre='Benchmark',
+        apellido='Checkout'
+    )
+
+
+def crear_productos(cantidad, stock=1_000_000):
+    """Crea productos con inventario y categoría de envío"""
+    sufijo = uuid.uuid4().hex[:8]
+    categoria = Categoria.objects.create(nombre_categoria=f'Benchmark {sufijo}')
+    categoria_envio = CategoriaEnvio.objects.create(
+        nombre=f'Benchmark {sufijo}', tarifa=Decimal('25.00')
+    )
+
+    productos = Producto.objects.bulk_create([
+        Producto(
+            sku=f'BENCH-{sufijo}-{i}',
+            slug=f'bench-{sufijo}-{i}',
+            nombre=f'Producto benchmark {i}',
+            precio=Decimal('100.00'),
+            precio_original=Decimal('120.00'),
+            categoria=categoria,
+            categoria_envio=categoria_envio,
+        )
+        for i in range(cantidad)
+    ])
+    Inventario.objects.bulk_create([
+        Inventario(producto=producto, stock_actual=stock, stock_minimo=0)
+        for producto in productos
+    ])
+    return productos
+
+
+def llenar_carrito(usuario, productos, cantidad=1):
+    """Reemplaza el contenido del carrito del usuario por los productos dados"""
+    carrito, _ = Carrito.objects.get_or_create(usuario=usuario)
+    carrito.detallecarrito_set.all().delete()
+    DetalleCarrito.objects.bulk_create([
+        DetalleCarrito(carrito=carrito, producto=producto, cantidad=cantidad)
+        for producto in productos
+    ])
+    return carrito
+
+
+def crear_pedidos(usuario, productos, cantidad):
+    """Crea `cantidad` pedidos entregados del usuario con una línea por producto"""
+    pedidos = Pedido.objects.bulk_create([
+        Pedido(usuario=usuario, monto_total=Decimal('113.00'), subtotal_productos=Decimal('100.00'),
+               costo_envio=Decimal('0.00'), monto_impuestos=Decimal('13.00'),
+               estado_pedido='entregado', direccion_envio='Benchmark')
+        for _ in range(cantidad)
+    ])
+    DetallePedido.objects.bulk_create([
+        DetallePedido(pedido=pedido, producto=producto, cantidad=1,
+                      precio_unitario_en_el_momento=producto.precio)
+        for pedido in pedidos for producto in productos
+    ])
+    return pedidos
+
+
+# =============================================================================
+# CONSULTAS POR PÁGINA
+# =============================================================================
+
+class ConsultasConstantesMixin:
+    """Mixin de TestCase: el número de consultas de un endpoint no crece con sus filas"""
+
+    FILAS_POCAS = 2
+    FILAS_MUCHAS = 15
+
+    def assert_consultas_constantes(self, usuario, url, agregar_filas):
+        """
+        Hace GET `url` como `usuario` con FILAS_POCAS filas y exige las mismas
+        consultas con FILAS_MUCHAS. agregar_filas(cantidad) crea filas que el
+        endpoint devuelve.
+        """
+        cliente = APIClient(HTTP_HOST='localhost')
+        cliente.force_authenticate(user=usuario)
+
+        def contar():
+            with CaptureQueriesContext(connection) as capturadas:
+                response = cliente.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(capturadas)
+
+        agregar_filas(self.FILAS_POCAS)
+        # La primera petición llena cachés (permisos, generaciones) que no dependen de las filas
+        contar()
+        pocas = contar()
+        agregar_filas(self.FILAS_MUCHAS - self.FILAS_POCAS)
+        with self.assertNumQueries(pocas):
+            response = cliente.get(url)
+        self.assertEqual(response.status_code, 200)
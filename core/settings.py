@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -180,7 +181,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.PaginacionHibrida',
     'PAGE_SIZE': 20
 }
 
@@ -204,10 +205,88 @@ CORS_ALLOW_CREDENTIALS = True
 
 #CORS_ALLOW_ALL_ORIGINS = DEBUG
 
+# Inventario: minutos que dura una reserva de stock durante el checkout
+INVENTARIO_RESERVA_MINUTOS = config('INVENTARIO_RESERVA_MINUTOS', default=15, cast=int)
+
+# Carrito: líneas que acepta una sola operación por lotes (agregar/reemplazar)
+CARRITO_MAX_LINEAS = config('CARRITO_MAX_LINEAS', default=100, cast=int)
+
+# Caché: memoria local (LRU por proceso) en desarrollo, Redis en producción
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'catalogo': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'catalogo',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'default',
+        },
+        'catalogo': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'catalogo',
+            'OPTIONS': {'MAX_ENTRIES': config('CATALOGO_CACHE_MAX_ENTRADAS', default=1000, cast=int)},
+        },
+    }
+
+# Segundos que vive una respuesta cacheada del catálogo de productos
+CATALOGO_CACHE_TIMEOUT = config('CATALOGO_CACHE_TIMEOUT', default=300, cast=int)
+
+# Segundos durante los que un comando de voz/texto reutiliza un reporte ya
+# generado con los mismos parámetros (si los datos no cambiaron)
+COMANDOS_CACHE_TIMEOUT = config('COMANDOS_CACHE_TIMEOUT', default=900, cast=int)
+
+# Tareas en segundo plano: 'hilos' (pool dentro del proceso web) o 'db'
+# (solo se registran; las ejecutan los comandos procesar_reportes,
+# entrenar_modelos y procesar_lotes_pronostico)
+TAREAS_MODO = config('TAREAS_MODO', default='hilos')
+TAREAS_HILOS = config('TAREAS_HILOS', default=2, cast=int)
+
+# Modelos de IA cargados en memoria por proceso (LRU). MODELOS_IA_MMAP='r'
+# abre los arreglos NumPy del archivo por memoria mapeada (ver ai_models.registro)
+MODELOS_IA_CACHE_MAX = config('MODELOS_IA_CACHE_MAX', default=4, cast=int)
+MODELOS_IA_MMAP = config('MODELOS_IA_MMAP', default='') or None
+
+# Entrenamiento: carpeta de los .joblib, combinaciones de hiperparámetros que
+# prueba la búsqueda y procesos para la validación cruzada (-1 = todos los núcleos)
+MODELOS_IA_DIR = config('MODELOS_IA_DIR', default='modelos')
+MODELOS_IA_BUSQUEDA_ITER = config('MODELOS_IA_BUSQUEDA_ITER', default=10, cast=int)
+MODELOS_IA_JOBS = config('MODELOS_IA_JOBS', default=-1, cast=int)
+# Con TAREAS_MODO='hilos' el entrenamiento corre dentro de gunicorn: ahí se usan
+# como máximo estos procesos para no dejar sin CPU a las peticiones
+MODELOS_IA_JOBS_HILOS = config('MODELOS_IA_JOBS_HILOS', default=2, cast=int)
+# Días que se dejan pronosticados al promover un modelo
+MODELOS_IA_HORIZONTE = config('MODELOS_IA_HORIZONTE', default=90, cast=int)
+
+# Segundos que vive en caché el conjunto de permisos RBAC de un usuario
+# (se invalida al cambiar sus roles o los permisos de un rol)
+PERMISOS_CACHE_TIMEOUT = config('PERMISOS_CACHE_TIMEOUT', default=3600, cast=int)
+
 # Stripe Configuration
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET')
 
+# Pasarela de pagos (orders.pasarelas): 'stripe' o 'falsa' (en memoria, sin
+# red). Timeouts en segundos por intento, reintentos del SDK, conexiones
+# keep-alive por proceso y fallos seguidos que abren el circuito
+PAGOS_PASARELA = config('PAGOS_PASARELA', default='stripe')
+PAGOS_TIMEOUT_CONEXION = config('PAGOS_TIMEOUT_CONEXION', default=3, cast=float)
+PAGOS_TIMEOUT_LECTURA = config('PAGOS_TIMEOUT_LECTURA', default=10, cast=float)
+PAGOS_REINTENTOS = config('PAGOS_REINTENTOS', default=2, cast=int)
+PAGOS_POOL_CONEXIONES = config('PAGOS_POOL_CONEXIONES', default=10, cast=int)
+PAGOS_CIRCUITO_FALLOS = config('PAGOS_CIRCUITO_FALLOS', default=5, cast=int)
+PAGOS_CIRCUITO_SEGUNDOS = config('PAGOS_CIRCUITO_SEGUNDOS', default=30, cast=int)
+
 # Swagger Configuration
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
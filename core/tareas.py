@@ -0,0 +1,70 @@
+# core/tareas.py
+"""
+Cola de tareas en segundo plano sin brokers externos.
+
+Con TAREAS_MODO = 'hilos' (por defecto) las tareas se ejecutan en un pool de
+hilos dentro del propio proceso de gunicorn, después de que se confirme la
+transacción que las encoló. Con TAREAS_MODO = 'db' no se ejecuta nada en el
+proceso web: las tareas quedan registradas en su tabla (p. ej. un
+ReporteGenerado en 'pendiente') y las toma un comando de management que
+actúa como worker.
+
+Las tareas deben reclamar su registro con un UPDATE condicional o un
+SELECT ... FOR UPDATE SKIP LOCKED, de modo que ambos modos pueden convivir
+sin procesar dos veces el mismo trabajo.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ColaTareas:
+    """Pool de hilos perezoso y seguro ante fork"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    @property
+    def en_proceso(self):
+        return getattr(settings, 'TAREAS_MODO', 'hilos') == 'hilos'
+
+    def encolar(self, funcion, *args, **kwargs):
+        """
+        Programa funcion(*args, **kwargs) para cuando se confirme la
+        transacción actual. En modo 'db' no hace nada: el worker la recogerá.
+        """
+        if not self.en_proceso:
+            return
+        transaction.on_commit(lambda: self._executor_actual().submit(self._ejecutar, funcion, args, kwargs))
+
+    def _executor_actual(self):
+        with self._lock:
+            # Un worker creado por fork no hereda los hilos del padre
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'TAREAS_HILOS', 2),
+                    thread_name_prefix='tarea'
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    @staticmethod
+    def _ejecutar(funcion, args, kwargs):
+        close_old_connections()
+        try:
+            funcion(*args, **kwargs)
+        except Exception:
+            logger.exception('Error ejecutando la tarea %s', funcion.__name__)
+        finally:
+            # Cada hilo abre su propia conexión; no dejarla abierta
+            connection.close()
+
+
+cola_tareas = ColaTareas()
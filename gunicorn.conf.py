@@ -0,0 +1,32 @@
+# gunicorn.conf.py (gunicorn lo lee automáticamente desde el directorio de trabajo)
+import os
+
+# Cargar la aplicación en el maestro para que los workers compartan por
+# copy-on-write los modelos de IA precargados en when_ready
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+
+def _precargar_modelos(log):
+    from django.db import connection
+    from ai_models.registro import registro_modelos
+
+    try:
+        cargados = registro_modelos.precargar()
+        log.info('Modelos de IA precargados: %s', cargados)
+    except Exception:
+        log.exception('No se pudieron precargar los modelos de IA')
+    finally:
+        # No compartir con los workers una conexión abierta durante el arranque
+        connection.close()
+
+
+def when_ready(server):
+    """Con preload_app, cargar los modelos una sola vez antes del fork"""
+    if server.cfg.preload_app:
+        _precargar_modelos(server.log)
+
+
+def post_worker_init(worker):
+    """Sin preload_app cada worker carga los suyos antes de atender peticiones"""
+    if not worker.cfg.preload_app:
+        _precargar_modelos(worker.log)
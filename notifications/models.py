@@ -28,6 +28,9 @@ class Notificacion(models.Model):
     
     class Meta:
         db_table = 'notificaciones'
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_creacion', '-id'], name='notif_usuario_fecha_id_idx'),
+        ]
 
 class PreferenciaNotificacionUsuario(models.Model):
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
@@ -10,6 +10,7 @@ from .serializers import (NotificacionSerializer, PreferenciaNotificacionSeriali
 class NotificacionListView(generics.ListAPIView):
     serializer_class = NotificacionSerializer
     permission_classes = [IsAuthenticated]
+    ordering_cursor = ('-fecha_creacion', '-id')
     
     def get_queryset(self):
         return Notificacion.objects.filter(usuario=self.request.user).order_by('-fecha_creacion')
@@ -0,0 +1,128 @@
+# orders/eventos_stripe.py
+"""
+Webhooks de Stripe con bandeja de entrada (EventoStripe).
+
+El webhook verifica la firma, guarda el evento por su id de Stripe y responde
+de inmediato; las reentregas del mismo evento encuentran la fila existente y
+no se vuelven a encolar. El procesamiento toma el evento con
+SELECT ... FOR UPDATE SKIP LOCKED y aplica sus efectos (pago, pedido,
+comprobante) en la misma transacción que lo marca como procesado, así que
+cada evento produce sus efectos exactamente una vez aunque lo intenten
+varios workers. Los eventos pendientes que no tomó el pool de hilos (modo
+'db' o caída del proceso) los procesa el comando procesar_eventos_stripe.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+import stripe
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from core.tareas import cola_tareas
+from .models import Comprobante, EventoStripe, Pago
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# MANEJADORES POR TIPO DE EVENTO
+# =============================================================================
+
+def _checkout_completado(sesion):
+    pago = Pago.objects.select_for_update().get(id=sesion['metadata']['pago_id'])
+    if pago.estado_pago == 'exitoso':
+        return
+    pago.confirmar(sesion.get('payment_intent'))
+    Comprobante.generar_comprobante(pago.pedido_id)
+
+
+def _checkout_expirado(sesion):
+    pago = Pago.objects.select_for_update().get(id=sesion['metadata']['pago_id'])
+    if pago.estado_pago == 'pendiente':
+        pago.fallar('La sesión de pago expiró')
+
+
+MANEJADORES = {
+    'checkout.session.completed': _checkout_completado,
+    'checkout.session.expired': _checkout_expirado,
+}
+
+
+# =============================================================================
+# RECEPCIÓN Y PROCESAMIENTO
+# =============================================================================
+
+def recibir_webhook(payload, firma):
+    """
+    Verifica la firma y guarda el evento. Lanza ValueError si el payload no es
+    válido o stripe.error.SignatureVerificationError si la firma no coincide.
+    Devuelve (evento, creado).
+    """
+    stripe.Webhook.construct_event(payload, firma, settings.STRIPE_WEBHOOK_SECRET)
+    datos = json.loads(payload)
+    # Los tipos sin manejador se guardan como ignorados y no pasan por la cola
+    estado = 'pendiente' if datos['type'] in MANEJADORES else 'ignorado'
+    evento, creado = EventoStripe.registrar(datos, estado)
+    if creado and estado == 'pendiente':
+        cola_tareas.encolar(procesar_evento, evento.id)
+    return evento, creado
+
+
+def procesar_evento(evento_id=None):
+    """
+    Procesa un evento pendiente (el indicado o el más antiguo). Devuelve el
+    evento procesado o None si no había ninguno disponible.
+    """
+    with transaction.atomic():
+        pendientes = EventoStripe.objects.select_for_update(skip_locked=True).filter(estado='pendiente')
+        if evento_id is not None:
+            pendientes = pendientes.filter(id=evento_id)
+        evento = pendientes.order_by('fecha_recepcion').first()
+        if evento is None:
+            return None
+
+        evento.intentos += 1
+        manejador = MANEJADORES.get(evento.tipo)
+        try:
+            # Punto de guardado: si el manejador falla se deshacen solo sus cambios
+            with transaction.atomic():
+                if manejador:
+                    manejador(evento.payload['data']['object'])
+            evento.estado = 'procesado' if manejador else 'ignorado'
+            evento.mensaje_error = None
+        except Exception as e:
+            logger.exception('Error procesando el evento de Stripe %s', evento.stripe_id)
+            evento.estado = 'error'
+            evento.mensaje_error = str(e)
+        evento.fecha_procesado = timezone.now()
+        evento.save(update_fields=['estado', 'intentos', 'mensaje_error', 'fecha_procesado'])
+    return evento
+
+
+# =============================================================================
+# EVENTOS FIRMADOS LOCALMENTE (PRUEBAS)
+# =============================================================================
+
+def firmar_payload(payload, secreto=None, momento=None):
+    """Cabecera Stripe-Signature de `payload` calculada como lo hace Stripe"""
+    secreto = secreto or settings.STRIPE_WEBHOOK_SECRET
+    momento = int(momento or time.time())
+    firma = hmac.new(secreto.encode(), f'{momento}.{payload}'.encode(), hashlib.sha256).hexdigest()
+    return f't={momento},v1={firma}'
+
+
+def evento_checkout(stripe_id, pago, tipo='checkout.session.completed'):
+    """Payload JSON de un evento de Checkout Session para el pago dado"""
+    return json.dumps({
+        'id': stripe_id,
+        'object': 'event',
+        'type': tipo,
+        'data': {'object': {
+            'id': f'cs_prueba_{pago.id}',
+            'object': 'checkout.session',
+            'payment_intent': f'pi_prueba_{pago.id}',
+            'metadata': {'pedido_id': str(pago.pedido_id), 'pago_id': str(pago.id)},
+        }},
+    })
@@ -0,0 +1,11 @@
+# orders/management/commands/_datos_benchmark.py
+"""Utilidades de medición para los comandos de benchmark de pedidos"""
+
+
+def percentil(valores, porcentaje):
+    """Percentil por rango más cercano"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, int(round(porcentaje / 100 * len(ordenados) + 0.5)) - 1)
+    return ordenados[min(indice, len(ordenados) - 1)]
@@ -0,0 +1,60 @@
+# orders/management/commands/benchmark_checkout.py
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from orders.services import ServicioCheckout
+from core.pruebas import crear_usuario, crear_productos, llenar_carrito
+from ._datos_benchmark import percentil
+
+
+class Command(BaseCommand):
+    help = 'Mide número de consultas y latencia p95 del checkout según el tamaño del carrito'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos',
+            default='1,5,10,25,50,100',
+            help='Tamaños de carrito separados por coma',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=20,
+            help='Checkouts medidos por tamaño de carrito',
+        )
+
+    def handle(self, *args, **options):
+        tamanos = [int(t) for t in options['tamanos'].split(',') if t.strip()]
+        repeticiones = options['repeticiones']
+
+        self.stdout.write(f'{"items":>6} {"consultas":>10} {"p50 ms":>10} {"p95 ms":>10}')
+
+        # Todo se ejecuta dentro de una transacción que se revierte al final
+        with transaction.atomic():
+            usuario = crear_usuario()
+            productos = crear_productos(max(tamanos))
+
+            for tamano in tamanos:
+                tiempos = []
+                consultas = 0
+                for _ in range(repeticiones):
+                    punto = transaction.savepoint()
+                    carrito = llenar_carrito(usuario, productos[:tamano])
+
+                    with CaptureQueriesContext(connection) as contexto:
+                        inicio = time.perf_counter()
+                        ServicioCheckout.crear_pedido(carrito, {'direccion_envio': 'Benchmark'})
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                    consultas = len(contexto.captured_queries)
+
+                    transaction.savepoint_rollback(punto)
+
+                self.stdout.write(
+                    f'{tamano:>6} {consultas:>10} '
+                    f'{percentil(tiempos, 50):>10.2f} {percentil(tiempos, 95):>10.2f}'
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark de checkout completado'))
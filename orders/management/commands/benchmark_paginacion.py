@@ -0,0 +1,81 @@
+# orders/management/commands/benchmark_paginacion.py
+import time
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.pagination import PaginacionHibrida
+from orders.models import Pedido
+from orders.views import PedidoListView
+from core.pruebas import crear_usuario
+from ._datos_benchmark import percentil
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia de la página 1 y una página profunda de pedidos: número de página vs cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pagina', type=int, default=5000, help='Página profunda a medir')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Mediciones por caso')
+
+    def handle(self, *args, **options):
+        pagina = options['pagina']
+        repeticiones = options['repeticiones']
+        tamano = PaginacionHibrida.page_size
+        vista = PedidoListView.as_view()
+        fabrica = APIRequestFactory(HTTP_HOST='localhost')
+
+        # Todo se ejecuta dentro de una transacción que se revierte al final
+        with transaction.atomic():
+            usuario = crear_usuario()
+            usuario.is_staff = True
+            usuario.save(update_fields=['is_staff'])
+
+            total = pagina * tamano
+            self.stdout.write(f'Generando {total} pedidos...')
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO pedidos (usuario_id, fecha_pedido, monto_total, estado_pedido,
+                                         direccion_envio, subtotal_productos, costo_envio, monto_impuestos)
+                    SELECT %s, now() - (n || ' seconds')::interval, 113, 'entregado',
+                           'Benchmark', 100, 0, 13
+                    FROM generate_series(1, %s) AS n
+                    """,
+                    [usuario.id, total]
+                )
+                cursor.execute('ANALYZE pedidos')
+
+            # Posición del último pedido de la página anterior a la profunda
+            orden = PedidoListView.ordering_cursor
+            anterior = Pedido.objects.order_by(*orden)[(pagina - 1) * tamano - 1]
+            cursor_profundo = PaginacionHibrida.codificar_cursor(
+                [anterior.fecha_pedido.isoformat(), anterior.id]
+            )
+
+            casos = [
+                ('página 1', {'page': 1}),
+                (f'página {pagina}', {'page': pagina}),
+                ('cursor 1', {'paginacion': 'cursor'}),
+                (f'cursor {pagina}', {'cursor': cursor_profundo}),
+            ]
+
+            self.stdout.write(f'{"caso":>16} {"p50 ms":>10} {"p95 ms":>10}')
+            for nombre, parametros in casos:
+                tiempos = []
+                for _ in range(repeticiones):
+                    request = fabrica.get('/api/orders/pedidos/', parametros)
+                    force_authenticate(request, user=usuario)
+                    inicio = time.perf_counter()
+                    response = vista(request)
+                    response.render()
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                    if response.status_code != 200 or len(response.data['results']) != tamano:
+                        self.stdout.write(self.style.WARNING(f'  {nombre}: respuesta inesperada'))
+                        break
+                self.stdout.write(
+                    f'{nombre:>16} {percentil(tiempos, 50):>10.2f} {percentil(tiempos, 95):>10.2f}'
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark de paginación completado'))
@@ -0,0 +1,113 @@
+# orders/management/commands/benchmark_pagos.py
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from products.models import Producto
+from orders.eventos_stripe import evento_checkout, firmar_payload, procesar_evento
+from orders.models import EventoStripe, Pago
+from orders.pasarelas import PasarelaFalsa, configurar_pasarela
+from core.pruebas import crear_usuario, crear_productos, llenar_carrito
+from ._datos_benchmark import percentil
+
+Usuario = get_user_model()
+ETAPAS = ('pedido', 'sesion', 'webhook')
+
+
+def _comprar(usuario):
+    """Checkout, sesión de pago y webhook de un usuario. Devuelve ({etapa: ms}, error)"""
+    tiempos = {}
+    try:
+        cliente = APIClient(HTTP_HOST='localhost')
+        cliente.force_authenticate(usuario)
+
+        inicio = time.perf_counter()
+        respuesta = cliente.post(reverse('crear_pedido'), {'direccion_envio': 'Benchmark'}, format='json')
+        tiempos['pedido'] = (time.perf_counter() - inicio) * 1000
+        if respuesta.status_code != 201:
+            return tiempos, f'pedido {respuesta.status_code}'
+        pedido_id = respuesta.data['id']
+
+        inicio = time.perf_counter()
+        respuesta = cliente.post(reverse('crear_checkout_stripe', args=[pedido_id]))
+        tiempos['sesion'] = (time.perf_counter() - inicio) * 1000
+        if respuesta.status_code != 200:
+            return tiempos, f'sesión {respuesta.status_code}'
+
+        pago = Pago.objects.get(pedido_id=pedido_id)
+        payload = evento_checkout(f'evt_bench_{uuid.uuid4().hex}', pago)
+        inicio = time.perf_counter()
+        respuesta = cliente.post(
+            reverse('stripe_webhook'), data=payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=firmar_payload(payload),
+        )
+        tiempos['webhook'] = (time.perf_counter() - inicio) * 1000
+        return tiempos, None if respuesta.status_code == 200 else f'webhook {respuesta.status_code}'
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Mide el flujo de compra completo (pedido, sesión de pago, webhook) con la pasarela falsa, sin red'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compras', type=int, default=50, help='Compras a ejecutar')
+        parser.add_argument('--hilos', type=int, default=4, help='Compras concurrentes')
+        parser.add_argument('--productos', type=int, default=3, help='Productos por carrito')
+        parser.add_argument('--latencia-ms', type=float, default=50, help='Latencia simulada de la pasarela')
+        parser.add_argument('--tasa-fallos', type=float, default=0.0, help='Fracción de llamadas que fallan')
+
+    def handle(self, *args, **options):
+        total = options['compras']
+        pasarela = PasarelaFalsa(latencia=options['latencia_ms'] / 1000, tasa_fallos=options['tasa_fallos'])
+        configurar_pasarela(pasarela)
+
+        productos = crear_productos(options['productos'])
+        usuarios = [crear_usuario(prefijo='pagos') for _ in range(total)]
+        for usuario in usuarios:
+            llenar_carrito(usuario, productos)
+
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['hilos']) as executor:
+                resultados = list(executor.map(_comprar, usuarios))
+            duracion = time.perf_counter() - inicio
+
+            # Eventos que el pool de tareas no alcanzó a procesar (o modo 'db')
+            while procesar_evento() is not None:
+                pass
+            pendientes = EventoStripe.objects.filter(stripe_id__startswith='evt_bench_', estado='pendiente').count()
+
+            errores = [error for _, error in resultados if error]
+            exitosos = Pago.objects.filter(pedido__usuario__in=usuarios, estado_pago='exitoso').count()
+            self.stdout.write(
+                f'Compras: {total} en {duracion:.2f}s ({total / duracion:.1f}/s) | '
+                f'Latencia pasarela: {options["latencia_ms"]:.0f} ms | Hilos: {options["hilos"]}'
+            )
+            self.stdout.write(f'{"etapa":>8} {"p50 ms":>10} {"p95 ms":>10}')
+            for etapa in ETAPAS:
+                tiempos = [medidas[etapa] for medidas, _ in resultados if etapa in medidas]
+                self.stdout.write(f'{etapa:>8} {percentil(tiempos, 50):>10.2f} {percentil(tiempos, 95):>10.2f}')
+            self.stdout.write(
+                f'Pagos confirmados: {exitosos} | Errores: {len(errores)} | '
+                f'Eventos pendientes: {pendientes} | Circuito: {pasarela.interruptor.estado}'
+            )
+            for error in sorted(set(errores)):
+                self.stdout.write(self.style.WARNING(f'  {error}: {errores.count(error)}'))
+
+            if not options['tasa_fallos'] and (errores or exitosos != total):
+                raise CommandError('❌ Hubo compras que no terminaron con el pago confirmado')
+        finally:
+            # La próxima llamada vuelve a crear la pasarela de PAGOS_PASARELA
+            configurar_pasarela(None)
+            EventoStripe.objects.filter(stripe_id__startswith='evt_bench_').delete()
+            Usuario.objects.filter(id__in=[usuario.id for usuario in usuarios]).delete()
+            Producto.objects.filter(id__in=[producto.id for producto in productos]).delete()
+            productos[0].categoria.delete()
+            productos[0].categoria_envio.delete()
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark de pagos completado'))
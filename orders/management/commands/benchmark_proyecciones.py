@@ -0,0 +1,60 @@
+# orders/management/commands/benchmark_proyecciones.py
+import time
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+from orders.models import Devolucion
+from products.models import Favorito
+from core.pruebas import crear_usuario, crear_productos, crear_pedidos, llenar_carrito
+from ._datos_benchmark import percentil
+
+ENDPOINTS = (
+    ('carrito', '/api/orders/carrito/'),
+    ('pedidos', '/api/orders/pedidos/'),
+    ('devoluciones', '/api/orders/devoluciones/'),
+    ('favoritos', '/api/products/favoritos/'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compara tamaño de respuesta y latencia con el producto resumido y con ?expand=producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=20, help='Pedidos, ítems de carrito, devoluciones y favoritos')
+        parser.add_argument('--lineas', type=int, default=3, help='Productos por pedido')
+        parser.add_argument('--repeticiones', type=int, default=30, help='Mediciones por caso')
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        repeticiones = options['repeticiones']
+
+        # Todo se ejecuta dentro de una transacción que se revierte al final
+        with transaction.atomic():
+            usuario = crear_usuario()
+            productos = crear_productos(max(filas, options['lineas']))
+            llenar_carrito(usuario, productos[:filas])
+            Favorito.objects.bulk_create([Favorito(usuario=usuario, producto=p) for p in productos[:filas]])
+            pedidos = crear_pedidos(usuario, productos[:options['lineas']], filas)
+            Devolucion.objects.bulk_create([
+                Devolucion(pedido=pedido, producto=productos[0], motivo='Benchmark') for pedido in pedidos
+            ])
+
+            cliente = APIClient(HTTP_HOST='localhost')
+            cliente.force_authenticate(user=usuario)
+
+            self.stdout.write(f'{"endpoint":>14} {"proyección":>10} {"bytes":>10} {"p50 ms":>10} {"p95 ms":>10}')
+            for nombre, url in ENDPOINTS:
+                for proyeccion, parametros in (('resumen', {}), ('completo', {'expand': 'producto'})):
+                    tiempos = []
+                    for _ in range(repeticiones):
+                        inicio = time.perf_counter()
+                        response = cliente.get(url, parametros)
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                    self.stdout.write(
+                        f'{nombre:>14} {proyeccion:>10} {len(response.content):>10} '
+                        f'{percentil(tiempos, 50):>10.2f} {percentil(tiempos, 95):>10.2f}'
+                    )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark de proyecciones completado'))
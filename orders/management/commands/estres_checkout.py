@@ -0,0 +1,88 @@
+# orders/management/commands/estres_checkout.py
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from products.models import Producto
+from orders.models import Carrito, Pedido
+from orders.services import ServicioCheckout, StockInsuficienteError
+from core.pruebas import crear_usuario, crear_productos, llenar_carrito
+
+Usuario = get_user_model()
+
+
+def _checkout(usuario_id):
+    """Ejecuta un checkout con su propia conexión y devuelve el error, si hubo"""
+    try:
+        carrito = Carrito.objects.get(usuario_id=usuario_id)
+        ServicioCheckout.crear_pedido(carrito, {'direccion_envio': 'Prueba de estrés'})
+        return None
+    except StockInsuficienteError as e:
+        return f'stock: {e}'
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+    finally:
+        connection.close()
+
+
+def _ejecutar_lote(usuario_ids, hilos):
+    """Ejecuta un lote de checkouts en paralelo dentro de un proceso"""
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        return list(executor.map(_checkout, usuario_ids))
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta N checkouts en paralelo y verifica que los números de seguimiento no colisionan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pedidos', type=int, default=200, help='Checkouts a ejecutar')
+        parser.add_argument('--procesos', type=int, default=4, help='Procesos (simulan workers de gunicorn)')
+        parser.add_argument('--hilos', type=int, default=8, help='Hilos por proceso')
+        parser.add_argument('--productos', type=int, default=3, help='Productos por carrito')
+
+    def handle(self, *args, **options):
+        total = options['pedidos']
+        procesos = options['procesos']
+        hilos = options['hilos']
+
+        self.stdout.write(f'Preparando {total} carritos...')
+        productos = crear_productos(options['productos'])
+        usuarios = [crear_usuario(prefijo='estres') for _ in range(total)]
+        for usuario in usuarios:
+            llenar_carrito(usuario, productos)
+        usuario_ids = [usuario.id for usuario in usuarios]
+
+        try:
+            # Las conexiones abiertas no deben heredarse en los procesos hijos
+            connections.close_all()
+            lotes = [usuario_ids[i::procesos] for i in range(procesos)]
+
+            inicio = time.perf_counter()
+            with multiprocessing.get_context('fork').Pool(procesos) as pool:
+                resultados = pool.starmap(_ejecutar_lote, [(lote, hilos) for lote in lotes])
+            duracion = time.perf_counter() - inicio
+
+            errores = [error for lote in resultados for error in lote if error]
+            numeros = list(
+                Pedido.objects.filter(usuario_id__in=usuario_ids)
+                .values_list('numero_seguimiento', flat=True)
+            )
+
+            self.stdout.write(f'Checkouts: {total} en {duracion:.2f}s ({total / duracion:.1f}/s)')
+            self.stdout.write(f'Pedidos creados: {len(numeros)}')
+            self.stdout.write(f'Números únicos: {len(set(numeros))}')
+            for error in errores[:10]:
+                self.stdout.write(self.style.WARNING(f'  {error}'))
+
+            if errores or len(numeros) != total or len(set(numeros)) != total:
+                raise CommandError(f'❌ {len(errores)} checkouts fallaron o hubo números repetidos')
+        finally:
+            # Limpiar los datos de la prueba (los pedidos caen en cascada)
+            Usuario.objects.filter(id__in=usuario_ids).delete()
+            Producto.objects.filter(id__in=[producto.id for producto in productos]).delete()
+            productos[0].categoria.delete()
+            productos[0].categoria_envio.delete()
+
+        self.stdout.write(self.style.SUCCESS('✅ Prueba de estrés completada sin colisiones'))
@@ -0,0 +1,50 @@
+# orders/management/commands/procesar_eventos_stripe.py
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from orders.eventos_stripe import procesar_evento
+from orders.models import EventoStripe
+
+
+def _vaciar_cola():
+    """Procesa eventos pendientes hasta que no quede ninguno"""
+    procesados = 0
+    try:
+        while procesar_evento() is not None:
+            procesados += 1
+    finally:
+        connection.close()
+    return procesados
+
+
+class Command(BaseCommand):
+    help = 'Worker que procesa los eventos de Stripe pendientes (TAREAS_MODO=db o reintentos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=0,
+            help='Segundos entre revisiones de la bandeja; 0 la vacía una sola vez',
+        )
+        parser.add_argument(
+            '--max-intentos',
+            type=int,
+            default=5,
+            help='Intentos tras los que un evento con error deja de reintentarse',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+
+        while True:
+            reintentados = EventoStripe.reintentar_fallidos(options['max_intentos'])
+            procesados = _vaciar_cola()
+            if procesados or reintentados:
+                self.stdout.write(f'Eventos procesados: {procesados} | Reintentados: {reintentados}')
+
+            if not intervalo:
+                break
+            time.sleep(intervalo)
+
+        self.stdout.write(self.style.SUCCESS('✅ Bandeja de eventos de Stripe procesada'))
@@ -0,0 +1,92 @@
+# orders/management/commands/simular_webhooks_stripe.py
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from orders.eventos_stripe import evento_checkout, firmar_payload, procesar_evento
+from orders.models import Comprobante, EventoStripe, Pago, Pedido, SeguimientoPedido
+from core.pruebas import crear_usuario
+from ._datos_benchmark import percentil
+
+Usuario = get_user_model()
+
+
+def _enviar(payload, firma):
+    """POST al webhook con su propia conexión; devuelve (status, milisegundos)"""
+    try:
+        inicio = time.perf_counter()
+        respuesta = Client(HTTP_HOST='localhost').post(
+            reverse('stripe_webhook'), data=payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=firma,
+        )
+        return respuesta.status_code, (time.perf_counter() - inicio) * 1000
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Envía eventos de Stripe firmados localmente (con reentregas) y verifica que se procesan una sola vez'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pagos', type=int, default=50, help='Pagos a confirmar')
+        parser.add_argument('--reentregas', type=int, default=3, help='Veces que llega cada evento')
+        parser.add_argument('--hilos', type=int, default=8, help='Envíos concurrentes')
+        parser.add_argument('--espera', type=int, default=30, help='Segundos máximos esperando a la cola')
+
+    def handle(self, *args, **options):
+        total = options['pagos']
+        usuario = crear_usuario(prefijo='webhook')
+        stripe_ids = []
+        try:
+            pagos = []
+            for _ in range(total):
+                pedido = Pedido.objects.create(usuario=usuario, monto_total=150, direccion_envio='Webhook')
+                pagos.append(Pago.objects.create(
+                    pedido=pedido, monto=150, stripe_payment_intent_id=f'temp_{uuid.uuid4().hex}'
+                ))
+
+            # Cada evento llega varias veces, mezclado con los demás
+            stripe_ids = [f'evt_prueba_{uuid.uuid4().hex}' for _ in pagos]
+            eventos = [evento_checkout(stripe_id, pago) for stripe_id, pago in zip(stripe_ids, pagos)]
+            envios = [(payload, firmar_payload(payload)) for payload in eventos] * options['reentregas']
+            with ThreadPoolExecutor(max_workers=options['hilos']) as executor:
+                resultados = list(executor.map(lambda envio: _enviar(*envio), envios))
+
+            falsificado = _enviar(eventos[0], firmar_payload(eventos[0], secreto='whsec_falso'))[0]
+
+            # Lo que no haya tomado el pool de hilos (o en modo 'db') se procesa aquí
+            limite = time.monotonic() + options['espera']
+            ids = [pago.id for pago in pagos]
+            eventos_prueba = EventoStripe.objects.filter(stripe_id__in=stripe_ids)
+            while eventos_prueba.filter(estado='pendiente').exists() and time.monotonic() < limite:
+                if procesar_evento() is None:
+                    time.sleep(0.1)
+
+            tiempos = [milisegundos for _, milisegundos in resultados]
+            codigos = {codigo for codigo, _ in resultados}
+            exitosos = Pago.objects.filter(id__in=ids, estado_pago='exitoso').count()
+            comprobantes = Comprobante.objects.filter(pedido__pago__id__in=ids).count()
+            seguimientos = SeguimientoPedido.objects.filter(pedido__pago__id__in=ids, estado_nuevo='confirmado').count()
+            procesados = eventos_prueba.filter(estado='procesado', intentos=1).count()
+
+            self.stdout.write(
+                f'Entregas: {len(resultados)} | Códigos: {sorted(codigos)} | Firma falsa: {falsificado} | '
+                f'p50 {percentil(tiempos, 50):.1f} ms | p95 {percentil(tiempos, 95):.1f} ms'
+            )
+            self.stdout.write(
+                f'Eventos guardados: {eventos_prueba.count()} | Procesados una vez: {procesados} | '
+                f'Pagos exitosos: {exitosos} | Comprobantes: {comprobantes} | Seguimientos: {seguimientos}'
+            )
+            if codigos != {200} or falsificado != 400 or not (
+                eventos_prueba.count() == procesados == exitosos == comprobantes == seguimientos == total
+            ):
+                raise CommandError('❌ Algún evento se perdió o se procesó más de una vez')
+        finally:
+            EventoStripe.objects.filter(stripe_id__in=stripe_ids).delete()
+            Usuario.objects.filter(id=usuario.id).delete()
+
+        self.stdout.write(self.style.SUCCESS('✅ Cada evento se procesó exactamente una vez'))
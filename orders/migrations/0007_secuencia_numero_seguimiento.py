@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+# El incremento debe coincidir con AsignadorNumeroSeguimiento.TAMANO_BLOQUE:
+# cada nextval() devuelve el final de un bloque de 50 números.
+CREAR_SECUENCIA = """
+    CREATE SEQUENCE IF NOT EXISTS pedidos_numero_seguimiento_seq INCREMENT BY 50 MINVALUE 1;
+    SELECT setval(
+        'pedidos_numero_seguimiento_seq',
+        COALESCE((
+            SELECT MAX(CAST(SUBSTRING(numero_seguimiento FROM '^ORD-([0-9]+)$') AS BIGINT))
+            FROM pedidos
+        ), 0) + 50,
+        false
+    );
+"""
+
+ELIMINAR_SECUENCIA = "DROP SEQUENCE IF EXISTS pedidos_numero_seguimiento_seq;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_pedido_costo_envio_pedido_monto_impuestos_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREAR_SECUENCIA, ELIMINAR_SECUENCIA),
+    ]
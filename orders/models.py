@@ -14,10 +14,9 @@ class Carrito(models.Model):
         self.save()
     
     def calcular_total(self):
-        """Calcular total del carrito"""
-        detalles = self.detallecarrito_set.select_related('producto')
-        total = sum(detalle.producto.precio * detalle.cantidad for detalle in detalles)
-        return total
+        """Calcular total del carrito (subtotal de productos, en SQL)"""
+        from .precios import totales_carrito
+        return totales_carrito(self).subtotal_productos
     
     def quitar_producto(self, producto_id):
         """Quitar producto del carrito"""
@@ -93,6 +92,11 @@ class Pedido(models.Model):
     
     class Meta:
         db_table = 'pedidos'
+        indexes = [
+            # Paginación por cursor: listado del staff y de cada cliente
+            models.Index(fields=['-fecha_pedido', '-id'], name='pedidos_fecha_id_idx'),
+            models.Index(fields=['usuario', '-fecha_pedido', '-id'], name='pedidos_usuario_fecha_id_idx'),
+        ]
 
 class DetallePedido(models.Model):
     pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE)
@@ -251,7 +255,11 @@ class Devolucion(models.Model):
                 pedido=self.pedido, 
                 producto=self.producto
             )
-            inventario.aumentar_stock(detalle_pedido.cantidad)
+            inventario.aumentar_stock(
+                detalle_pedido.cantidad,
+                tipo='devolucion',
+                referencia=f'devolucion:{self.id}'
+            )
             
             self.estado = 'reembolsada'
             self.save()
@@ -281,4 +289,49 @@ class SeguimientoPedido(models.Model):
         return cls.objects.filter(pedido_id=pedido_id).order_by('fecha_cambio')
     
     class Meta:
-        db_table = 'seguimiento_pedido'
\ No newline at end of file
+        db_table = 'seguimiento_pedido'
+
+# =============================================================================
+# EVENTOS DE STRIPE
+# =============================================================================
+
+class EventoStripe(models.Model):
+    """
+    Bandeja de entrada de los webhooks de Stripe. El webhook solo verifica la
+    firma y guarda el evento (una fila por id de Stripe, así que las
+    reentregas no se duplican); orders.eventos_stripe lo procesa después.
+    """
+    ESTADOS = (
+        ('pendiente', 'Pendiente'),
+        ('procesado', 'Procesado'),
+        ('ignorado', 'Ignorado'),
+        ('error', 'Error'),
+    )
+
+    stripe_id = models.CharField(max_length=255, unique=True)
+    tipo = models.CharField(max_length=100)
+    payload = models.JSONField()
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    mensaje_error = models.TextField(null=True, blank=True)
+    fecha_recepcion = models.DateTimeField(auto_now_add=True)
+    fecha_procesado = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def registrar(cls, evento, estado='pendiente'):
+        """Guarda el evento si es nuevo. Devuelve (evento, creado)"""
+        return cls.objects.get_or_create(
+            stripe_id=evento['id'],
+            defaults={'tipo': evento['type'], 'payload': evento, 'estado': estado},
+        )
+
+    @classmethod
+    def reintentar_fallidos(cls, maximo_intentos=5):
+        """Devuelve a 'pendiente' los eventos con error que aún tienen intentos"""
+        return cls.objects.filter(estado='error', intentos__lt=maximo_intentos).update(estado='pendiente')
+
+    class Meta:
+        db_table = 'eventos_stripe'
+        indexes = [
+            models.Index(fields=['estado', 'fecha_recepcion'], name='eventos_stripe_estado_idx'),
+        ]
@@ -0,0 +1,245 @@
+# orders/pasarelas.py
+"""
+Pasarelas de pago.
+
+Las vistas hablan con una PasarelaPago (obtener_pasarela) y no con el SDK de
+Stripe directamente. PasarelaStripe usa una sesión HTTP con pool de
+conexiones keep-alive, timeouts de conexión y lectura, reintentos acotados
+del SDK (con clave de idempotencia) y un interruptor de circuito: tras
+varios fallos seguidos de red o del servidor deja de llamar a Stripe durante
+unos segundos y falla de inmediato, en vez de dejar cada worker esperando
+el timeout. PasarelaFalsa guarda las sesiones en memoria para pruebas y
+benchmarks sin red (PAGOS_PASARELA='falsa').
+"""
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+SesionPago = namedtuple('SesionPago', ['id', 'url', 'estado'])
+
+
+class ErrorPasarela(Exception):
+    """La pasarela rechazó la operación o no respondió"""
+
+
+class PasarelaNoDisponible(ErrorPasarela):
+    """El circuito está abierto: la pasarela falló varias veces seguidas"""
+
+
+class InterruptorCircuito:
+    """
+    Cerrado: las llamadas pasan. Tras `fallos_maximos` fallos seguidos se
+    abre durante `segundos_abierto` y rechaza todo; después deja pasar una
+    llamada de prueba (semiabierto) que lo cierra o lo vuelve a abrir.
+    """
+
+    def __init__(self, fallos_maximos=5, segundos_abierto=30):
+        self.fallos_maximos = fallos_maximos
+        self.segundos_abierto = segundos_abierto
+        self._lock = threading.Lock()
+        self._fallos = 0
+        self._abierto_hasta = None
+        self._probando = False
+
+    @property
+    def estado(self):
+        with self._lock:
+            if self._abierto_hasta is None:
+                return 'cerrado'
+            return 'abierto' if time.monotonic() < self._abierto_hasta else 'semiabierto'
+
+    def _permitir(self):
+        with self._lock:
+            if self._abierto_hasta is None:
+                return True
+            if time.monotonic() < self._abierto_hasta or self._probando:
+                return False
+            self._probando = True
+            return True
+
+    def _registrar(self, exito):
+        with self._lock:
+            self._probando = False
+            if exito:
+                self._fallos = 0
+                self._abierto_hasta = None
+                return
+            self._fallos += 1
+            if self._fallos >= self.fallos_maximos or self._abierto_hasta is not None:
+                self._abierto_hasta = time.monotonic() + self.segundos_abierto
+
+    def llamar(self, funcion, *args, fallos=(Exception,), **kwargs):
+        """Ejecuta funcion; solo las excepciones de `fallos` cuentan para abrir el circuito"""
+        if not self._permitir():
+            raise PasarelaNoDisponible('La pasarela de pagos no está disponible; intenta en unos segundos')
+        try:
+            resultado = funcion(*args, **kwargs)
+        except fallos:
+            self._registrar(False)
+            raise
+        except Exception:
+            # Errores de la solicitud (4xx): la pasarela respondió bien
+            self._registrar(True)
+            raise
+        self._registrar(True)
+        return resultado
+
+
+class PasarelaPago:
+    """Operaciones de pago que usan las vistas de pedidos"""
+    nombre = None
+
+    def crear_sesion_checkout(self, pedido, pago, url_exito, url_cancelacion):
+        """Crea la sesión de pago del pedido y devuelve una SesionPago"""
+        raise NotImplementedError
+
+    def obtener_sesion_checkout(self, sesion_id):
+        """Devuelve la SesionPago con ese id o lanza ErrorPasarela"""
+        raise NotImplementedError
+
+
+# =============================================================================
+# STRIPE
+# =============================================================================
+
+class PasarelaStripe(PasarelaPago):
+    nombre = 'stripe'
+    # Errores que indican que Stripe no está sano (red, 429, 5xx)
+    FALLOS = (stripe.error.APIConnectionError, stripe.error.RateLimitError, stripe.error.APIError)
+
+    def __init__(self):
+        sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=settings.PAGOS_POOL_CONEXIONES)
+        sesion.mount('https://', adaptador)
+        # El SDK reintenta con backoff y clave de idempotencia; el timeout
+        # acota cada intento, así que la espera máxima es conocida
+        stripe.default_http_client = stripe.http_client.RequestsClient(
+            timeout=(settings.PAGOS_TIMEOUT_CONEXION, settings.PAGOS_TIMEOUT_LECTURA),
+            session=sesion,
+        )
+        stripe.max_network_retries = settings.PAGOS_REINTENTOS
+        self.interruptor = InterruptorCircuito(settings.PAGOS_CIRCUITO_FALLOS, settings.PAGOS_CIRCUITO_SEGUNDOS)
+
+    def _llamar(self, funcion, **kwargs):
+        try:
+            return self.interruptor.llamar(funcion, api_key=settings.STRIPE_SECRET_KEY, fallos=self.FALLOS, **kwargs)
+        except stripe.error.StripeError as e:
+            raise ErrorPasarela(str(e)) from e
+
+    def crear_sesion_checkout(self, pedido, pago, url_exito, url_cancelacion):
+        sesion = self._llamar(
+            stripe.checkout.Session.create,
+            payment_method_types=['card'],
+            line_items=[
+                {
+                    'price_data': {
+                        'currency': pago.moneda.lower(),  # Stripe usa la moneda en minúsculas
+                        'product_data': {
+                            'name': f'Pedido #{pedido.id}',
+                            'description': f'Productos del pedido #{pedido.id}',
+                        },
+                        'unit_amount': int(pedido.monto_total * 100),  # Stripe trabaja en centavos
+                    },
+                    'quantity': 1,
+                },
+            ],
+            mode='payment',
+            success_url=url_exito,
+            cancel_url=url_cancelacion,
+            metadata={
+                'pedido_id': pedido.id,
+                'pago_id': pago.id
+            },
+            # Un reintento del mismo intento de pago no crea otra sesión
+            idempotency_key=f'checkout-{pago.id}-{pago.stripe_payment_intent_id}',
+        )
+        return SesionPago(sesion.id, sesion.url, sesion.status)
+
+    def obtener_sesion_checkout(self, sesion_id):
+        sesion = self._llamar(stripe.checkout.Session.retrieve, id=sesion_id)
+        return SesionPago(sesion.id, sesion.url, sesion.status)
+
+
+# =============================================================================
+# PASARELA FALSA (PRUEBAS Y BENCHMARKS)
+# =============================================================================
+
+class PasarelaFalsa(PasarelaPago):
+    """
+    Sesiones en memoria con latencia y tasa de fallos configurables. Pasa por
+    el mismo interruptor de circuito que Stripe.
+    """
+    nombre = 'falsa'
+
+    def __init__(self, latencia=0.0, tasa_fallos=0.0, fallos_maximos=5, segundos_abierto=30):
+        self.latencia = latencia
+        self.tasa_fallos = tasa_fallos
+        self.interruptor = InterruptorCircuito(fallos_maximos, segundos_abierto)
+        self.sesiones = {}
+        self._lock = threading.Lock()
+
+    def _simular_red(self):
+        if self.latencia:
+            time.sleep(self.latencia)
+        if self.tasa_fallos and random.random() < self.tasa_fallos:
+            raise ConnectionError('Fallo simulado de la pasarela')
+
+    def _llamar(self, funcion, *args):
+        # Solo los fallos simulados de red cuentan para el circuito, como en Stripe
+        try:
+            return self.interruptor.llamar(funcion, *args, fallos=(ConnectionError,))
+        except ConnectionError as e:
+            raise ErrorPasarela(str(e)) from e
+
+    def _crear(self, url_exito):
+        self._simular_red()
+        sesion_id = f'cs_falsa_{uuid.uuid4().hex}'
+        sesion = SesionPago(sesion_id, url_exito.replace('{CHECKOUT_SESSION_ID}', sesion_id), 'open')
+        with self._lock:
+            self.sesiones[sesion_id] = sesion
+        return sesion
+
+    def _obtener(self, sesion_id):
+        self._simular_red()
+        with self._lock:
+            sesion = self.sesiones.get(sesion_id)
+        if sesion is None:
+            raise ErrorPasarela(f'Sesión {sesion_id} no encontrada')
+        return sesion
+
+    def crear_sesion_checkout(self, pedido, pago, url_exito, url_cancelacion):
+        return self._llamar(self._crear, url_exito)
+
+    def obtener_sesion_checkout(self, sesion_id):
+        return self._llamar(self._obtener, sesion_id)
+
+
+PASARELAS = {
+    'stripe': PasarelaStripe,
+    'falsa': PasarelaFalsa,
+}
+
+_pasarela = None
+_lock_pasarela = threading.Lock()
+
+
+def obtener_pasarela():
+    """Pasarela configurada en PAGOS_PASARELA (una por proceso)"""
+    global _pasarela
+    with _lock_pasarela:
+        if _pasarela is None:
+            _pasarela = PASARELAS[settings.PAGOS_PASARELA]()
+        return _pasarela
+
+
+def configurar_pasarela(pasarela):
+    """Reemplaza la pasarela del proceso (p. ej. una PasarelaFalsa en benchmarks)"""
+    global _pasarela
+    with _lock_pasarela:
+        _pasarela = pasarela
@@ -0,0 +1,83 @@
+# orders/precios.py
+"""
+Precios del carrito calculados en SQL.
+
+El subtotal de cada línea (cantidad * producto.precio), el subtotal del
+carrito y el costo de envío se calculan en la misma consulta que trae las
+líneas, con funciones de ventana particionadas por carrito. La vista del
+carrito y el checkout usan las mismas expresiones, así que lo que se muestra
+es lo que se cobra.
+
+Envío: gratis si algún producto tiene envio_gratis; si no, la tarifa más
+alta entre las categorías de envío de los productos.
+"""
+from collections import namedtuple
+from decimal import Decimal
+from django.db.models import Case, When, Value, F, Sum, Max, Window, DecimalField, IntegerField, ExpressionWrapper
+from .models import DetalleCarrito
+
+TotalesCarrito = namedtuple('TotalesCarrito', ['subtotal_productos', 'costo_envio'])
+
+SUBTOTAL_LINEA = ExpressionWrapper(
+    F('cantidad') * F('producto__precio'), output_field=DecimalField(max_digits=12, decimal_places=2)
+)
+ENVIO_GRATIS = Case(
+    When(producto__envio_gratis=True, then=Value(1)), default=Value(0), output_field=IntegerField()
+)
+TARIFA_ENVIO = Case(
+    When(producto__envio_gratis=False, then=F('producto__categoria_envio__tarifa')),
+    output_field=DecimalField(max_digits=10, decimal_places=2)
+)
+
+
+def _agregados():
+    return {
+        'subtotal_carrito': Sum(SUBTOTAL_LINEA),
+        'envio_gratis_carrito': Max(ENVIO_GRATIS),
+        'tarifa_envio_carrito': Max(TARIFA_ENVIO),
+    }
+
+
+def anotar_lineas(queryset):
+    """Anota cada DetalleCarrito con su subtotal y los totales de su carrito"""
+    return queryset.annotate(
+        subtotal=SUBTOTAL_LINEA,
+        **{
+            nombre: Window(agregado, partition_by=[F('carrito_id')])
+            for nombre, agregado in _agregados().items()
+        }
+    )
+
+
+def lineas_carrito(carrito):
+    """Líneas del carrito con producto y precios anotados (una consulta)"""
+    return anotar_lineas(carrito.detallecarrito_set.select_related('producto').order_by('id'))
+
+
+def _totales(subtotal, envio_gratis, tarifa):
+    if subtotal is None:
+        return TotalesCarrito(Decimal('0.00'), Decimal('0.00'))
+    costo_envio = Decimal('0.00') if envio_gratis else (tarifa or Decimal('0.00'))
+    return TotalesCarrito(subtotal, costo_envio)
+
+
+def totales_de_lineas(lineas):
+    """Totales a partir de líneas anotadas con anotar_lineas (sin consultas)"""
+    if not lineas:
+        return _totales(None, None, None)
+    linea = lineas[0]
+    return _totales(linea.subtotal_carrito, linea.envio_gratis_carrito, linea.tarifa_envio_carrito)
+
+
+def totales_carrito(carrito):
+    """
+    Totales del carrito. Usa las líneas ya precargadas si vienen anotadas;
+    si no, los calcula con una consulta de agregación.
+    """
+    precargadas = getattr(carrito, '_prefetched_objects_cache', {}).get('detallecarrito_set')
+    if precargadas is not None:
+        precargadas = list(precargadas)
+        if all(hasattr(linea, 'subtotal_carrito') for linea in precargadas):
+            return totales_de_lineas(precargadas)
+    valores = DetalleCarrito.objects.filter(carrito=carrito).aggregate(**_agregados())
+    return _totales(valores['subtotal_carrito'], valores['envio_gratis_carrito'], valores['tarifa_envio_carrito'])
@@ -1,38 +1,61 @@
 # orders/serializers.py
+from collections import defaultdict
+from django.conf import settings
 from rest_framework import serializers
 from .models import (Carrito, DetalleCarrito, Pedido, DetallePedido, 
                     Comprobante, Pago, Devolucion, SeguimientoPedido)
-from products.serializers import ProductoSerializer
+from products.serializers import ProductoSerializer, ProductoResumenSerializer
+from core.optimizacion import ExpandibleMixin
+from .precios import anotar_lineas, totales_carrito
 
-class DetalleCarritoSerializer(serializers.ModelSerializer):
-    producto_detalle = ProductoSerializer(source='producto', read_only=True)
+class DetalleCarritoSerializer(ExpandibleMixin, serializers.ModelSerializer):
+    producto_detalle = ProductoResumenSerializer(source='producto', read_only=True)
     subtotal = serializers.SerializerMethodField()
     
+    # ?expand=producto devuelve el producto completo
+    expandibles = {'producto_detalle': ProductoSerializer}
+    
     class Meta:
         model = DetalleCarrito
         fields = ('id', 'carrito', 'producto', 'producto_detalle', 'cantidad', 'subtotal')
     
+    @classmethod
+    def anotar(cls, queryset):
+        # Subtotal de la línea y totales del carrito en la misma consulta
+        return anotar_lineas(queryset)
+    
     def get_subtotal(self, obj):
+        if hasattr(obj, 'subtotal'):
+            return obj.subtotal
         return obj.producto.precio * obj.cantidad
 
 class CarritoSerializer(serializers.ModelSerializer):
     items = DetalleCarritoSerializer(many=True, read_only=True, source='detallecarrito_set')
     total = serializers.SerializerMethodField()
+    costo_envio = serializers.SerializerMethodField()
+    total_con_envio = serializers.SerializerMethodField()
     
     class Meta:
         model = Carrito
-        fields = ('id', 'usuario', 'fecha_ultima_actualizacion', 'items', 'total')
+        fields = ('id', 'usuario', 'fecha_ultima_actualizacion', 'items', 'total',
+                  'costo_envio', 'total_con_envio')
     
     def get_total(self, obj):
-        total = 0
-        for item in obj.detallecarrito_set.all():
-            total += item.producto.precio * item.cantidad
-        return total
+        return totales_carrito(obj).subtotal_productos
+    
+    def get_costo_envio(self, obj):
+        return totales_carrito(obj).costo_envio
+    
+    def get_total_con_envio(self, obj):
+        return sum(totales_carrito(obj))
 
-class DetallePedidoSerializer(serializers.ModelSerializer):
-    producto_detalle = ProductoSerializer(source='producto', read_only=True)
+class DetallePedidoSerializer(ExpandibleMixin, serializers.ModelSerializer):
+    producto_detalle = ProductoResumenSerializer(source='producto', read_only=True)
     subtotal = serializers.SerializerMethodField()
     
+    # ?expand=producto devuelve el producto completo
+    expandibles = {'producto_detalle': ProductoSerializer}
+    
     class Meta:
         model = DetallePedido
         fields = ('id', 'pedido', 'producto', 'producto_detalle', 'cantidad', 
@@ -41,10 +64,28 @@ class DetallePedidoSerializer(serializers.ModelSerializer):
     def get_subtotal(self, obj):
         return obj.precio_unitario_en_el_momento * obj.cantidad
 
+class LineaCarritoSerializer(serializers.Serializer):
+    producto_id = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1, default=1)
+
+class CarritoLoteSerializer(serializers.Serializer):
+    """Varias líneas para agregar al carrito (o fijar, con reemplazar=true)"""
+    items = LineaCarritoSerializer(many=True, allow_empty=False, max_length=settings.CARRITO_MAX_LINEAS)
+    reemplazar = serializers.BooleanField(default=False)
+    
+    def obtener_cantidades(self):
+        """{producto_id: cantidad}; un producto repetido en items suma sus cantidades"""
+        cantidades = defaultdict(int)
+        for item in self.validated_data['items']:
+            cantidades[item['producto_id']] += item['cantidad']
+        return dict(cantidades)
+
 class PedidoSerializer(serializers.ModelSerializer):
     detalles = DetallePedidoSerializer(many=True, read_only=True, source='detallepedido_set')
     usuario_nombre = serializers.CharField(source='usuario.get_full_name', read_only=True)
     
+    select_related = ('usuario',)
+    
     class Meta:
         model = Pedido
         fields = ('id', 'usuario', 'usuario_nombre', 'fecha_pedido',
@@ -67,8 +108,10 @@ class PagoSerializer(serializers.ModelSerializer):
         model = Pago
         fields = '__all__'
 
-class DevolucionSerializer(serializers.ModelSerializer):
-    producto_detalle = ProductoSerializer(source='producto', read_only=True)
+class DevolucionSerializer(ExpandibleMixin, serializers.ModelSerializer):
+    producto_detalle = ProductoResumenSerializer(source='producto', read_only=True)
+    
+    expandibles = {'producto_detalle': ProductoSerializer}
     
     class Meta:
         model = Devolucion
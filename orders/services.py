@@ -0,0 +1,371 @@
+# orders/services.py
+import os
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Case, When, Value, F, Q, Sum, IntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.cache import incrementar_al_confirmar
+from products.models import Producto, Inventario, MovimientoInventario, ReservaInventario
+from .models import DetalleCarrito, Pedido, DetallePedido, SeguimientoPedido
+from .precios import lineas_carrito, totales_de_lineas
+
+
+class CarritoVacioError(Exception):
+    """El carrito no tiene productos"""
+
+
+class StockInsuficienteError(Exception):
+    """Algún producto del carrito no tiene stock suficiente"""
+
+    def __init__(self, nombre_producto):
+        self.nombre_producto = nombre_producto
+        super().__init__(f'Stock insuficiente para {nombre_producto}')
+
+
+class ProductoNoDisponibleError(Exception):
+    """El producto no existe o no está activo"""
+
+    def __init__(self, producto_id):
+        self.producto_id = producto_id
+        super().__init__(f'El producto {producto_id} no está disponible')
+
+
+class AsignadorNumeroSeguimiento:
+    """
+    Reparte números de seguimiento a partir de bloques reservados en la
+    secuencia pedidos_numero_seguimiento_seq.
+
+    Cada nextval() reserva TAMANO_BLOQUE números para el proceso actual, que
+    los entrega desde memoria sin más consultas. Los números de un bloque que
+    no llegan a usarse (reinicio del worker, rollback) se pierden: la
+    numeración es única y creciente por bloque, pero admite huecos.
+    """
+
+    SECUENCIA = 'pedidos_numero_seguimiento_seq'
+    TAMANO_BLOQUE = 50  # Debe coincidir con INCREMENT BY de la secuencia
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._siguiente = 0
+        self._limite = 0
+
+    def siguiente(self):
+        """Devuelve el siguiente número de seguimiento disponible"""
+        with self._lock:
+            # Un proceso hijo (fork) no debe reutilizar el bloque del padre
+            if self._pid != os.getpid() or self._siguiente >= self._limite:
+                self._reservar_bloque()
+            numero = self._siguiente
+            self._siguiente += 1
+        return f'ORD-{numero:05d}'
+
+    def _reservar_bloque(self):
+        """Reserva un nuevo bloque de números en la secuencia"""
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s)', [self.SECUENCIA])
+            fin_bloque = cursor.fetchone()[0]
+        self._pid = os.getpid()
+        self._siguiente = fin_bloque - self.TAMANO_BLOQUE + 1
+        self._limite = fin_bloque + 1
+
+
+asignador_numero_seguimiento = AsignadorNumeroSeguimiento()
+
+
+class ServicioCheckout:
+    """Convierte un carrito en pedido usando operaciones por conjuntos"""
+
+    TASA_IVA = Decimal('1.13')
+
+    @staticmethod
+    def generar_numero_seguimiento():
+        """Genera el siguiente número de seguimiento ORD-NNNNN"""
+        return asignador_numero_seguimiento.siguiente()
+
+    @classmethod
+    def crear_pedido(cls, carrito, datos_pedido):
+        """
+        Crea el pedido a partir del carrito.
+
+        Bloquea todas las filas de inventario en un solo SELECT ... FOR UPDATE,
+        descuenta stock con un único UPDATE condicional y escribe los detalles
+        con bulk_create, de modo que el número de consultas no depende del
+        tamaño del carrito.
+        """
+        # Líneas con subtotales y envío calculados en SQL (orders.precios)
+        items = list(lineas_carrito(carrito))
+        if not items:
+            raise CarritoVacioError('El carrito está vacío')
+
+        cantidades = {item.producto_id: item.cantidad for item in items}
+
+        with transaction.atomic():
+            stock = cls._bloquear_stock(cantidades)
+
+            # Las reservas activas del propio usuario cuentan como stock disponible.
+            # Sin SKIP LOCKED: si otra petición del usuario las tiene bloqueadas
+            # se espera, en lugar de contarlas como ajenas
+            reservas = list(
+                ReservaInventario.objects.select_for_update(of=('self',))
+                .filter(
+                    usuario=carrito.usuario,
+                    estado='activa',
+                    expira_en__gte=timezone.now(),
+                    inventario__producto_id__in=cantidades
+                )
+                .values_list('id', 'inventario__producto_id', 'cantidad')
+            )
+            reservado_propio = defaultdict(int)
+            for _, producto_id, cantidad in reservas:
+                reservado_propio[producto_id] += cantidad
+
+            faltantes = cls._faltantes(items, stock, reservado_propio)
+            if faltantes:
+                # Puede haber reservas vencidas que todavía cuentan en stock_reservado
+                inventario_ids = [valores[0] for valores in stock.values()]
+                if ReservaInventario.liberar_expiradas(inventario_ids=inventario_ids):
+                    stock = cls._bloquear_stock(cantidades)
+                    faltantes = cls._faltantes(items, stock, reservado_propio)
+                if faltantes:
+                    raise StockInsuficienteError(faltantes[0].producto.nombre)
+
+            subtotal_productos, costo_envio = totales_de_lineas(items)
+            subtotal_con_envio = subtotal_productos + costo_envio
+            monto_total = subtotal_con_envio * cls.TASA_IVA
+
+            pedido = Pedido(**datos_pedido)
+            pedido.usuario = carrito.usuario
+            pedido.numero_seguimiento = cls.generar_numero_seguimiento()
+            pedido.subtotal_productos = subtotal_productos
+            pedido.costo_envio = costo_envio
+            pedido.monto_impuestos = monto_total - subtotal_con_envio
+            pedido.monto_total = monto_total
+            pedido.save()
+
+            DetallePedido.objects.bulk_create([
+                DetallePedido(
+                    pedido=pedido,
+                    producto=item.producto,
+                    cantidad=item.cantidad,
+                    precio_unitario_en_el_momento=item.producto.precio
+                )
+                for item in items
+            ])
+
+            # Descontar todo el stock en un solo UPDATE condicional
+            cantidad_pedida = Case(
+                *[When(producto_id=producto_id, then=Value(cantidad))
+                  for producto_id, cantidad in cantidades.items()],
+                output_field=IntegerField()
+            )
+            reserva_consumida = Case(
+                *[When(producto_id=producto_id, then=Value(cantidad))
+                  for producto_id, cantidad in reservado_propio.items()],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+            actualizados = Inventario.objects.filter(
+                producto_id__in=cantidades,
+                stock_actual__gte=F('stock_reservado') - reserva_consumida + cantidad_pedida
+            ).update(
+                stock_actual=F('stock_actual') - cantidad_pedida,
+                stock_reservado=F('stock_reservado') - reserva_consumida,
+                ultima_actualizacion=timezone.now()
+            )
+            if actualizados != len(cantidades):
+                raise StockInsuficienteError('uno de los productos del carrito')
+            incrementar_al_confirmar('inventario')
+
+            if reservas:
+                ReservaInventario.objects.filter(
+                    id__in=[reserva[0] for reserva in reservas]
+                ).update(estado='confirmada')
+
+            MovimientoInventario.objects.bulk_create([
+                MovimientoInventario(
+                    inventario_id=stock[producto_id][0],
+                    tipo='salida',
+                    cantidad=-cantidad,
+                    referencia=pedido.numero_seguimiento
+                )
+                for producto_id, cantidad in cantidades.items()
+            ])
+
+            carrito.detallecarrito_set.all().delete()
+
+            SeguimientoPedido.objects.create(
+                pedido=pedido,
+                estado_anterior='pendiente',
+                estado_nuevo='pendiente',
+                comentario='Pedido creado exitosamente'
+            )
+
+        return pedido
+
+    @staticmethod
+    def _bloquear_stock(cantidades):
+        """Bloquea las filas de inventario en un solo SELECT ... FOR UPDATE"""
+        # Bloquear en orden de producto para evitar interbloqueos entre checkouts
+        filas = (
+            Inventario.objects.select_for_update()
+            .filter(producto_id__in=cantidades)
+            .order_by('producto_id')
+            .values_list('producto_id', 'id', 'stock_actual', 'stock_reservado')
+        )
+        return {
+            producto_id: (inventario_id, stock_actual or 0, stock_reservado)
+            for producto_id, inventario_id, stock_actual, stock_reservado in filas
+        }
+
+    @staticmethod
+    def _faltantes(items, stock, reservado_propio):
+        """Items cuyo stock libre más lo reservado por el usuario no alcanza"""
+        faltantes = []
+        for item in items:
+            if item.producto_id not in stock:
+                faltantes.append(item)
+                continue
+            _, stock_actual, stock_reservado = stock[item.producto_id]
+            disponible = stock_actual - stock_reservado + reservado_propio.get(item.producto_id, 0)
+            if disponible < item.cantidad:
+                faltantes.append(item)
+        return faltantes
+
+    @staticmethod
+    def reservar_carrito(carrito):
+        """
+        Reserva el stock de todo el carrito mientras el usuario completa el
+        pago. Las reservas anteriores del usuario se liberan primero.
+        """
+        cantidades = {
+            producto_id: cantidad
+            for producto_id, cantidad in carrito.detallecarrito_set.values_list('producto_id', 'cantidad')
+        }
+        if not cantidades:
+            raise CarritoVacioError('El carrito está vacío')
+
+        with transaction.atomic():
+            ReservaInventario.liberar_de_usuario(carrito.usuario)
+            reservas, sin_stock = ReservaInventario.reservar_lote(carrito.usuario, cantidades)
+            if sin_stock:
+                nombre = carrito.detallecarrito_set.filter(
+                    producto_id=sin_stock[0]
+                ).values_list('producto__nombre', flat=True).first()
+                raise StockInsuficienteError(nombre)
+        return reservas
+
+
+class ServicioCarrito:
+    """Agrega o reemplaza varias líneas del carrito en una sola operación"""
+
+    @classmethod
+    def agregar_lineas(cls, carrito, cantidades, reemplazar=False):
+        """
+        Suma (o fija, con reemplazar=True) las cantidades {producto_id: cantidad}
+        en el carrito y devuelve {producto_id: cantidad_resultante}.
+
+        El stock de todos los productos se lee con una sola consulta y las
+        líneas se escriben con un único INSERT ... ON CONFLICT. Al sumar, el
+        incremento lo hace la base de datos (cantidad = cantidad + EXCLUDED.cantidad),
+        así que dos peticiones simultáneas (doble clic) no pierden unidades; la
+        fila bloqueada por el upsert hace que la segunda valide el total real.
+        Si algún producto no alcanza no se modifica nada.
+        """
+        with transaction.atomic():
+            disponibles = cls._stock_disponible(carrito.usuario_id, cantidades)
+            for producto_id in cantidades:
+                if producto_id not in disponibles:
+                    raise ProductoNoDisponibleError(producto_id)
+
+            if reemplazar:
+                DetalleCarrito.objects.bulk_create(
+                    [
+                        DetalleCarrito(carrito=carrito, producto_id=producto_id, cantidad=cantidad)
+                        for producto_id, cantidad in cantidades.items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['carrito', 'producto'],
+                    update_fields=['cantidad'],
+                )
+                resultantes = dict(cantidades)
+            else:
+                resultantes = cls._sumar_cantidades(carrito.id, cantidades)
+
+            faltantes = cls._faltantes_carrito(resultantes, disponibles)
+            if faltantes:
+                # Reservas vencidas que todavía cuentan en stock_reservado
+                if ReservaInventario.liberar_expiradas(
+                    inventario_ids=Inventario.objects.filter(producto_id__in=faltantes).values_list('id', flat=True)
+                ):
+                    disponibles = cls._stock_disponible(carrito.usuario_id, cantidades)
+                    faltantes = cls._faltantes_carrito(resultantes, disponibles)
+                if faltantes:
+                    raise StockInsuficienteError(disponibles[faltantes[0]][0])
+        return resultantes
+
+    @staticmethod
+    def _faltantes_carrito(resultantes, disponibles):
+        return [
+            producto_id for producto_id, cantidad in resultantes.items()
+            if cantidad > disponibles[producto_id][1]
+        ]
+
+    @staticmethod
+    def _stock_disponible(usuario_id, cantidades):
+        """
+        {producto_id: (nombre, disponible)} de los productos activos; las
+        reservas activas del propio usuario cuentan como disponibles
+        """
+        reservado_propio = Coalesce(
+            Sum(
+                'inventario__reservainventario__cantidad',
+                filter=Q(
+                    inventario__reservainventario__usuario_id=usuario_id,
+                    inventario__reservainventario__estado='activa',
+                    inventario__reservainventario__expira_en__gte=timezone.now()
+                )
+            ),
+            0
+        )
+        filas = (
+            Producto.objects.filter(id__in=cantidades, estado='activo')
+            .annotate(reservado_propio=reservado_propio)
+            .values_list('id', 'nombre', 'inventario__stock_actual', 'inventario__stock_reservado', 'reservado_propio')
+        )
+        return {
+            producto_id: (nombre, (stock_actual or 0) - (stock_reservado or 0) + reservado)
+            for producto_id, nombre, stock_actual, stock_reservado, reservado in filas
+        }
+
+    @staticmethod
+    def _sumar_cantidades(carrito_id, cantidades):
+        """Upsert con incremento atómico; devuelve las cantidades resultantes"""
+        # bulk_create(update_conflicts=True) solo puede asignar EXCLUDED.cantidad,
+        # no sumarla, por eso el INSERT ... ON CONFLICT se escribe a mano
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO detalle_carrito (carrito_id, producto_id, cantidad)
+                SELECT %s, lineas.producto_id, lineas.cantidad
+                FROM unnest(%s::bigint[], %s::integer[]) AS lineas (producto_id, cantidad)
+                ON CONFLICT (carrito_id, producto_id)
+                DO UPDATE SET cantidad = detalle_carrito.cantidad + EXCLUDED.cantidad
+                RETURNING producto_id, cantidad
+                """,
+                [carrito_id, list(cantidades), list(cantidades.values())]
+            )
+            return dict(cursor.fetchall())
+
+    @classmethod
+    def repetir_pedido(cls, carrito, pedido):
+        """Agrega al carrito los productos de un pedido anterior"""
+        cantidades = defaultdict(int)
+        for producto_id, cantidad in pedido.detallepedido_set.values_list('producto_id', 'cantidad'):
+            cantidades[producto_id] += cantidad
+        if not cantidades:
+            raise CarritoVacioError('El pedido no tiene productos')
+        return cls.agregar_lineas(carrito, dict(cantidades))
@@ -1,3 +1,173 @@
-from django.test import TestCase
+# orders/tests.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from core.pruebas import ConsultasConstantesMixin, crear_usuario, crear_productos, crear_pedidos, llenar_carrito
+from .models import Carrito, Devolucion, Pedido
+from products.models import ReservaInventario
+from .services import AsignadorNumeroSeguimiento, ServicioCheckout
 
-# Create your tests here.
+
+def _consultas_nextval(capturadas):
+    return sum('nextval' in consulta['sql'] for consulta in capturadas.captured_queries)
+
+
+# =============================================================================
+# NÚMEROS DE SEGUIMIENTO
+# =============================================================================
+
+class AsignadorNumeroSeguimientoTests(TestCase):
+
+    def test_reparte_un_bloque_sin_consultas_y_reserva_otro_al_agotarlo(self):
+        asignador = AsignadorNumeroSeguimiento()
+        tamano = AsignadorNumeroSeguimiento.TAMANO_BLOQUE
+
+        with CaptureQueriesContext(connection) as capturadas:
+            primer_bloque = [asignador.siguiente() for _ in range(tamano)]
+        self.assertEqual(_consultas_nextval(capturadas), 1)
+        numeros = [int(numero[4:]) for numero in primer_bloque]
+        self.assertEqual(numeros, list(range(numeros[0], numeros[0] + tamano)))
+
+        with CaptureQueriesContext(connection) as capturadas:
+            siguiente = asignador.siguiente()
+        self.assertEqual(_consultas_nextval(capturadas), 1)
+        self.assertGreater(int(siguiente[4:]), numeros[-1])
+        self.assertNotIn(siguiente, primer_bloque)
+
+    def test_proceso_hijo_reserva_su_propio_bloque(self):
+        asignador = AsignadorNumeroSeguimiento()
+        padre = asignador.siguiente()
+
+        # Tras un fork el pid cambia: el hijo no debe seguir con el bloque del padre
+        with mock.patch('orders.services.os.getpid', return_value=-1):
+            with CaptureQueriesContext(connection) as capturadas:
+                hijo = asignador.siguiente()
+        self.assertEqual(_consultas_nextval(capturadas), 1)
+        self.assertGreaterEqual(int(hijo[4:]) - int(padre[4:]), AsignadorNumeroSeguimiento.TAMANO_BLOQUE)
+
+    def test_formato(self):
+        self.assertRegex(AsignadorNumeroSeguimiento().siguiente(), r'^ORD-\d{5,}$')
+
+
+# Sin hilos de core.tareas: sus recálculos seguirían corriendo al vaciar la base
+@override_settings(TAREAS_MODO='db')
+class CheckoutConcurrenteTests(TransactionTestCase):
+    """Checkouts simultáneos con conexiones reales (cada hilo usa la suya)"""
+
+    CHECKOUTS = 24
+    HILOS = 8
+
+    def _en_hilo(self, funcion, *args):
+        try:
+            return funcion(*args)
+        finally:
+            connection.close()
+
+    def _checkout(self, usuario_id):
+        carrito = Carrito.objects.get(usuario_id=usuario_id)
+        return ServicioCheckout.crear_pedido(carrito, {'direccion_envio': 'Prueba concurrente'}).id
+
+    def test_checkouts_concurrentes_tienen_numeros_distintos(self):
+        productos = crear_productos(3)
+        usuario_ids = []
+        for _ in range(self.CHECKOUTS):
+            usuario = crear_usuario('concurrente')
+            llenar_carrito(usuario, productos)
+            usuario_ids.append(usuario.id)
+
+        with ThreadPoolExecutor(max_workers=self.HILOS) as executor:
+            pedido_ids = list(executor.map(lambda usuario_id: self._en_hilo(self._checkout, usuario_id), usuario_ids))
+
+        numeros = list(Pedido.objects.filter(id__in=pedido_ids).values_list('numero_seguimiento', flat=True))
+        self.assertEqual(len(numeros), self.CHECKOUTS)
+        self.assertEqual(len(set(numeros)), self.CHECKOUTS)
+
+    def test_checkout_espera_las_reservas_propias_bloqueadas(self):
+        productos = crear_productos(1, stock=5)
+        usuario = crear_usuario('reserva-bloqueada')
+        llenar_carrito(usuario, productos, cantidad=5)
+        reservas, sin_stock = ReservaInventario.reservar_lote(usuario, {productos[0].id: 5})
+        self.assertEqual(sin_stock, [])
+        bloqueada = threading.Event()
+
+        def bloquear_reserva():
+            # Otra pestaña del mismo usuario tiene la reserva bloqueada un momento
+            with transaction.atomic():
+                ReservaInventario.objects.select_for_update().get(id=reservas[0].id)
+                bloqueada.set()
+                threading.Event().wait(0.5)
+
+        hilo = threading.Thread(target=self._en_hilo, args=(bloquear_reserva,))
+        hilo.start()
+        self.assertTrue(bloqueada.wait(timeout=10))
+        try:
+            pedido_id = self._checkout(usuario.id)
+        finally:
+            hilo.join(timeout=10)
+
+        self.assertTrue(Pedido.objects.filter(id=pedido_id).exists())
+        self.assertEqual(ReservaInventario.objects.get(id=reservas[0].id).estado, 'confirmada')
+
+    def test_varios_procesos_no_colisionan(self):
+        # Un asignador por "worker": cada uno reserva bloques propios de la secuencia
+        asignadores = [AsignadorNumeroSeguimiento() for _ in range(self.HILOS)]
+
+        def repartir(asignador):
+            return [asignador.siguiente() for _ in range(AsignadorNumeroSeguimiento.TAMANO_BLOQUE + 5)]
+
+        with ThreadPoolExecutor(max_workers=self.HILOS) as executor:
+            lotes = list(executor.map(lambda asignador: self._en_hilo(repartir, asignador), asignadores))
+
+        numeros = [numero for lote in lotes for numero in lote]
+        self.assertEqual(len(set(numeros)), len(numeros))
+
+
+# =============================================================================
+# CONSULTAS POR PÁGINA
+# =============================================================================
+
+class ConsultasConstantesTests(ConsultasConstantesMixin, TestCase):
+    """Las consultas de cada endpoint no crecen con las filas de la página (N+1)"""
+
+    LINEAS = 3
+
+    def setUp(self):
+        self.productos = crear_productos(self.LINEAS)
+        self.staff = crear_usuario('consultas-staff')
+        self.staff.is_staff = True
+        self.staff.save(update_fields=['is_staff'])
+        self.cliente = crear_usuario('consultas-cliente')
+        self.pedido = crear_pedidos(self.cliente, self.productos, 1)[0]
+        self.en_carrito = []
+
+    def _agregar_filas(self, filas):
+        pedidos = crear_pedidos(self.cliente, self.productos, filas)
+        Devolucion.objects.bulk_create([
+            Devolucion(pedido=pedido, producto=self.productos[0], motivo='Consultas') for pedido in pedidos
+        ])
+        self.en_carrito += crear_productos(filas)
+        llenar_carrito(self.cliente, self.en_carrito)
+
+    def test_pedidos_staff(self):
+        self.assert_consultas_constantes(self.staff, '/api/orders/pedidos/', self._agregar_filas)
+
+    def test_pedidos_cliente(self):
+        self.assert_consultas_constantes(self.cliente, '/api/orders/pedidos/', self._agregar_filas)
+
+    def test_pedidos_expand(self):
+        self.assert_consultas_constantes(self.cliente, '/api/orders/pedidos/?expand=producto', self._agregar_filas)
+
+    def test_detalle_de_pedido(self):
+        self.assert_consultas_constantes(self.cliente, f'/api/orders/pedidos/{self.pedido.id}/', self._agregar_filas)
+
+    def test_devoluciones(self):
+        self.assert_consultas_constantes(self.cliente, '/api/orders/devoluciones/', self._agregar_filas)
+
+    def test_carrito(self):
+        self.assert_consultas_constantes(self.cliente, '/api/orders/carrito/', self._agregar_filas)
+
+    def test_carrito_expand(self):
+        self.assert_consultas_constantes(self.cliente, '/api/orders/carrito/?expand=producto', self._agregar_filas)
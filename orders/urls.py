@@ -7,11 +7,15 @@ urlpatterns = [
     path('carrito/', views.CarritoDetailView.as_view(), name='carrito'),
     path('carrito/agregar/', views.agregar_al_carrito, name='agregar_carrito'),
     path('carrito/actualizar/<int:producto_id>/', views.actualizar_cantidad_carrito, name='actualizar_carrito'),
+    path('carrito/lote/', views.agregar_lote_carrito, name='agregar_lote_carrito'),
+    path('carrito/reservar/', views.reservar_carrito, name='reservar_carrito'),
+    path('carrito/liberar-reserva/', views.liberar_reserva_carrito, name='liberar_reserva_carrito'),
     
     # Pedidos
     path('pedidos/crear/', views.crear_pedido_desde_carrito, name='crear_pedido'),
     path('pedidos/', views.PedidoListView.as_view(), name='lista_pedidos'),
     path('pedidos/<int:pk>/', views.PedidoDetailView.as_view(), name='detalle_pedido'),
+    path('pedidos/<int:pedido_id>/repetir/', views.repetir_pedido, name='repetir_pedido'),
     path('pedidos/<int:pedido_id>/actualizar-estado/', views.actualizar_estado_pedido, name='actualizar_estado_pedido'),
     path('pedidos/<int:pedido_id>/pago/', views.procesar_pago_stripe, name='procesar_pago'),
     
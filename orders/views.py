@@ -21,12 +21,17 @@ from .serializers import (CarritoSerializer, DetalleCarritoSerializer,
                         PedidoSerializer, PedidoCreateSerializer,
                         DetallePedidoSerializer, ComprobanteSerializer,
                         PagoSerializer, DevolucionSerializer, 
-                        SeguimientoPedidoSerializer)
-from django.db.models import Max
+                        SeguimientoPedidoSerializer, LineaCarritoSerializer,
+                        CarritoLoteSerializer)
+from products.models import ReservaInventario
+from core.optimizacion import ConsultaOptimizadaMixin, precargar, expansiones_solicitadas
+from users.permisos import TienePermiso
+from .services import (ServicioCheckout, ServicioCarrito, CarritoVacioError,
+                       StockInsuficienteError, ProductoNoDisponibleError)
+from .eventos_stripe import recibir_webhook
+from .pasarelas import obtener_pasarela, ErrorPasarela, PasarelaNoDisponible
 from decimal import Decimal
 
-# Configurar la clave secreta de Stripe
-stripe.api_key = settings.STRIPE_SECRET_KEY
 
 class CarritoDetailView(generics.RetrieveAPIView):
     serializer_class = CarritoSerializer
@@ -34,25 +39,30 @@ class CarritoDetailView(generics.RetrieveAPIView):
     
     def get_object(self):
         carrito, created = Carrito.objects.get_or_create(usuario=self.request.user)
+        precargar([carrito], CarritoSerializer, expansiones_solicitadas(self.request))
         return carrito
 
+def serializar_carrito(carrito, request):
+    """Carrito completo con las relaciones y totales precargados"""
+    precargar([carrito], CarritoSerializer, expansiones_solicitadas(request))
+    return CarritoSerializer(carrito, context={'request': request}).data
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def agregar_al_carrito(request):
-    carrito, created = Carrito.objects.get_or_create(usuario=request.user)
-    producto_id = request.data.get('producto_id')
-    cantidad = request.data.get('cantidad', 1)
-    
-    detalle, created = DetalleCarrito.objects.get_or_create(
-        carrito=carrito,
-        producto_id=producto_id,
-        defaults={'cantidad': cantidad}
-    )
+    linea = LineaCarritoSerializer(data=request.data)
+    if not linea.is_valid():
+        return Response(linea.errors, status=status.HTTP_400_BAD_REQUEST)
+    producto_id = linea.validated_data['producto_id']
     
-    if not created:
-        detalle.cantidad += cantidad
-        detalle.save()
+    carrito, created = Carrito.objects.get_or_create(usuario=request.user)
+    try:
+        # Incremento atómico: un doble clic suma las dos veces
+        ServicioCarrito.agregar_lineas(carrito, {producto_id: linea.validated_data['cantidad']})
+    except (ProductoNoDisponibleError, StockInsuficienteError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
+    detalle = DetalleCarrito.objects.select_related('producto').get(carrito=carrito, producto_id=producto_id)
     serializer = DetalleCarritoSerializer(detalle)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -65,139 +75,122 @@ def actualizar_cantidad_carrito(request, producto_id):
     cantidad = request.data.get('cantidad')
     if cantidad is None:
         return Response({'error': 'La cantidad es requerida'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        cantidad = int(cantidad)
+    except (TypeError, ValueError):
+        return Response({'error': 'La cantidad debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
     
     if cantidad <= 0:
         detalle.delete()
         return Response({'message': 'Producto eliminado del carrito'}, status=status.HTTP_200_OK)
     
+    try:
+        ServicioCarrito.agregar_lineas(carrito, {producto_id: cantidad}, reemplazar=True)
+    except (ProductoNoDisponibleError, StockInsuficienteError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     detalle.cantidad = cantidad
-    detalle.save()
     
     serializer = DetalleCarritoSerializer(detalle)
     return Response(serializer.data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def agregar_lote_carrito(request):
+    """
+    Agrega varias líneas al carrito en una sola petición (restaurar un carrito
+    guardado, importar una lista). Con reemplazar=true fija las cantidades en
+    vez de sumarlas. Devuelve el carrito completo.
+    """
+    lote = CarritoLoteSerializer(data=request.data)
+    if not lote.is_valid():
+        return Response(lote.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    carrito, created = Carrito.objects.get_or_create(usuario=request.user)
+    try:
+        ServicioCarrito.agregar_lineas(carrito, lote.obtener_cantidades(), lote.validated_data['reemplazar'])
+    except (ProductoNoDisponibleError, StockInsuficienteError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(serializar_carrito(carrito, request))
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def repetir_pedido(request, pedido_id):
+    """Comprar de nuevo: agrega al carrito los productos de un pedido anterior"""
+    pedido = get_object_or_404(Pedido, id=pedido_id, usuario=request.user)
+    carrito, created = Carrito.objects.get_or_create(usuario=request.user)
+    try:
+        ServicioCarrito.repetir_pedido(carrito, pedido)
+    except (CarritoVacioError, ProductoNoDisponibleError, StockInsuficienteError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(serializar_carrito(carrito, request))
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reservar_carrito(request):
+    """Reserva el stock del carrito mientras el usuario completa el pago"""
+    carrito = get_object_or_404(Carrito, usuario=request.user)
+    try:
+        reservas = ServicioCheckout.reservar_carrito(carrito)
+    except (CarritoVacioError, StockInsuficienteError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'mensaje': 'Stock reservado correctamente',
+        'productos_reservados': len(reservas),
+        'expira_en': reservas[0].expira_en
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def liberar_reserva_carrito(request):
+    """Libera las reservas de stock activas del usuario"""
+    liberadas = ReservaInventario.liberar_de_usuario(request.user)
+    return Response({'mensaje': 'Reservas liberadas', 'reservas_liberadas': liberadas})
 # =============================================================================
 # VISTAS DE PEDIDOS
 # =============================================================================
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@transaction.atomic
 def crear_pedido_desde_carrito(request):
     carrito = get_object_or_404(Carrito, usuario=request.user)
-    items_carrito = carrito.detallecarrito_set.select_related('producto').all()
     
-    if not items_carrito:
-        return Response({'error': 'El carrito está vacío'}, status=status.HTTP_400_BAD_REQUEST)
+    pedido_serializer = PedidoCreateSerializer(data=request.data)
+    if not pedido_serializer.is_valid():
+        return Response(pedido_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    # Verificar stock disponible
-    for item in items_carrito:
-        if item.producto.inventario.stock_actual < item.cantidad:
-            return Response(
-                {'error': f'Stock insuficiente para {item.producto.nombre}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    try:
+        pedido = ServicioCheckout.crear_pedido(carrito, pedido_serializer.validated_data)
+    except (CarritoVacioError, StockInsuficienteError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Crear pedido
-    pedido_serializer = PedidoCreateSerializer(data=request.data)
-    if pedido_serializer.is_valid():
-        # Generar numero_seguimiento
-        ultimo_pedido = Pedido.objects.order_by('id').last()
-        if ultimo_pedido:
-            try:
-                ultimo_numero = int(ultimo_pedido.numero_seguimiento.split('-')[1])
-                nuevo_numero = ultimo_numero + 1
-            except (AttributeError, IndexError, ValueError):
-                nuevo_numero = (ultimo_pedido.id or 0) + 1
-        else:
-            nuevo_numero = 1
-        
-        numero_seguimiento = f'ORD-{nuevo_numero:05d}'
+    precargar([pedido], PedidoSerializer)
+    serializer = PedidoSerializer(pedido)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        # --- INICIO DE LA CORRECCIÓN ---
-        
-        # 1. Crear la instancia del pedido en memoria, SIN guardarla en la BD aún.
-        # Usamos los datos validados del serializer.
-        pedido = Pedido(**pedido_serializer.validated_data)
-        pedido.usuario = request.user
-        pedido.numero_seguimiento = numero_seguimiento
-        
-        # 2. Calcular el subtotal de los productos
-        subtotal_productos = Decimal('0.00')
-        for item in items_carrito:
-            subtotal_productos += item.producto.precio_original * item.cantidad
-
-        # 3. Calcular el costo de envío
-        if items_carrito.filter(producto__envio_gratis=True).exists():
-            costo_envio = Decimal('0.00')
-        else:
-            costo_envio = items_carrito.aggregate(
-                max_tarifa=Max('producto__categoria_envio__tarifa')
-            )['max_tarifa'] or Decimal('0.00')
-
-        # 4. Calcular el monto total con IVA (13%)
-        subtotal_con_envio = subtotal_productos + costo_envio
-        tasa_iva = Decimal('1.13')
-        monto_total = subtotal_con_envio * tasa_iva
-        
-        # 5. Asignar todos los valores calculados al objeto en memoria
-        pedido.subtotal_productos = subtotal_productos
-        pedido.costo_envio = costo_envio
-        pedido.monto_impuestos = monto_total - subtotal_con_envio
-        pedido.monto_total = monto_total
-        
-        # 6. AHORA SÍ, guardar el objeto completo en la base de datos
-        pedido.save()
-        
-        # --- FIN DE LA CORRECCIÓN ---
-
-        # Crear detalles del pedido y actualizar inventario
-        for item in items_carrito:
-            DetallePedido.objects.create(
-                pedido=pedido,
-                producto=item.producto,
-                cantidad=item.cantidad,
-                precio_unitario_en_el_momento=item.producto.precio_original
-            )
-            
-            inventario = item.producto.inventario
-            inventario.stock_actual -= item.cantidad
-            inventario.save()
-        
-        # Vaciar carrito
-        carrito.detallecarrito_set.all().delete()
-        
-        # Crear registro de seguimiento
-        SeguimientoPedido.objects.create(
-            pedido=pedido,
-            estado_anterior='pendiente',
-            estado_nuevo='pendiente',
-            comentario='Pedido creado exitosamente'
-        )
-        
-        serializer = PedidoSerializer(pedido)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    
-    return Response(pedido_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-class PedidoListView(generics.ListAPIView):
+class PedidoListView(ConsultaOptimizadaMixin, generics.ListAPIView):
     serializer_class = PedidoSerializer
     permission_classes = [IsAuthenticated]
+    ordering_cursor = ('-fecha_pedido', '-id')
     
     def get_queryset(self):
         if self.request.user.is_staff:
-            return Pedido.objects.select_related('usuario').prefetch_related('detallepedido_set').all()
-        return Pedido.objects.filter(usuario=self.request.user).select_related('usuario').prefetch_related('detallepedido_set')
+            return Pedido.objects.all()
+        return Pedido.objects.filter(usuario=self.request.user)
 
-class PedidoDetailView(generics.RetrieveAPIView):
+class PedidoDetailView(ConsultaOptimizadaMixin, generics.RetrieveAPIView):
     serializer_class = PedidoSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         if self.request.user.is_staff:
-            return Pedido.objects.select_related('usuario').prefetch_related('detallepedido_set').all()
-        return Pedido.objects.filter(usuario=self.request.user).select_related('usuario').prefetch_related('detallepedido_set')
+            return Pedido.objects.all()
+        return Pedido.objects.filter(usuario=self.request.user)
 
 
 @api_view(['POST'])
-@permission_classes([IsAdminUser])
+@permission_classes([IsAdminUser | TienePermiso('gestionar_pedidos')])
 def actualizar_estado_pedido(request, pedido_id):
     pedido = get_object_or_404(Pedido, id=pedido_id)
     nuevo_estado = request.data.get('estado')
@@ -281,14 +274,14 @@ def obtener_comprobante_pedido(request, pedido_id):
     else:
         return Response({'error': 'Comprobante no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
-class DevolucionListCreateView(generics.ListCreateAPIView):
+class DevolucionListCreateView(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     serializer_class = DevolucionSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         if self.request.user.is_staff:
-            return Devolucion.objects.select_related('pedido', 'producto').all()
-        return Devolucion.objects.filter(pedido__usuario=self.request.user).select_related('pedido', 'producto')
+            return Devolucion.objects.all()
+        return Devolucion.objects.filter(pedido__usuario=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save()
@@ -299,6 +292,8 @@ class DevolucionListCreateView(generics.ListCreateAPIView):
 class PagoListView(generics.ListAPIView):
     serializer_class = PagoSerializer
     permission_classes = [IsAuthenticated]
+    # fecha_pago es nula hasta confirmar el pago, así que se pagina por id
+    ordering_cursor = ('-id',)
 
     def get_queryset(self):
         if self.request.user.is_staff:
@@ -366,12 +361,14 @@ def procesar_pago_stripe(request, pedido_id):
                 # Si ya hay un pago pendiente, devolver la URL de la sesión existente
                 if pago.stripe_checkout_session_id:
                     try:
-                        session = stripe.checkout.Session.retrieve(pago.stripe_checkout_session_id)
+                        session = obtener_pasarela().obtener_sesion_checkout(pago.stripe_checkout_session_id)
                         return Response({
                             'sessionId': session.id,
                             'checkoutUrl': session.url
                         })
-                    except stripe.error.StripeError:
+                    except PasarelaNoDisponible as e:
+                        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                    except ErrorPasarela:
                         # Si la sesión ya no es válida, crear una nueva
                         pass
         
@@ -399,57 +396,20 @@ def confirmar_pago_stripe(request):
         return Response({'mensaje': 'Pago confirmado correctamente'})
     except Pago.DoesNotExist:
         return Response({'error': 'Pago no encontrado'}, status=status.HTTP_404_NOT_FOUND) """
-# Reemplaza tu función actual con esta
 @api_view(['POST'])
 @permission_classes([AllowAny]) # <-- CORRECCIÓN: Permitir llamadas externas
 def confirmar_pago_stripe(request):
     """
-    Webhook de Stripe para confirmar pagos exitosos.
+    Webhook de Stripe para confirmar pagos exitosos. Igual que
+    StripeWebhookView: guarda el evento y lo procesa en segundo plano.
     """
-    payload = request.body
-    sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
-
     try:
-        # CORRECCIÓN: Verificar la firma para asegurar que la llamada es legítima
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
-        )
-    except ValueError as e:
-        # Payload inválido
-        return Response(status=status.HTTP_400_BAD_REQUEST)
-    except stripe.error.SignatureVerificationError as e:
-        # Firma inválida (no es una llamada real de Stripe)
+        evento, creado = recibir_webhook(request.body, request.META.get('HTTP_STRIPE_SIGNATURE'))
+    except (ValueError, stripe.error.SignatureVerificationError):
+        # Payload o firma inválidos (no es una llamada real de Stripe)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
-    # Manejar el evento de checkout completado
-    if event.type == 'checkout.session.completed':
-        session = event['data']['object'] # Contiene toda la info de la sesión
-
-        # Obtenemos los IDs que guardamos en los metadatos al crear la sesión
-        pedido_id = session['metadata']['pedido_id']
-        pago_id = session['metadata']['pago_id']
-        stripe_payment_intent_id = session.get('payment_intent') # El ID del pago real
-
-        try:
-            # Buscamos el pago por su ID, que es más seguro que por el payment_intent_id
-            pago = Pago.objects.get(id=pago_id)
-            
-            # Usamos tu método del modelo para confirmar
-            pago.confirmar(stripe_payment_intent_id)
-            
-            # O si no tienes ese método, lo actualizas manualmente:
-            # pago.estado_pago = 'exitoso'
-            # pago.stripe_payment_intent_id = stripe_payment_intent_id
-            # pago.fecha_pago = timezone.now()
-            # pago.save()
-
-            return Response({'mensaje': 'Pago confirmado correctamente'}, status=status.HTTP_200_OK)
-
-        except Pago.DoesNotExist:
-            return Response({'error': 'Pago no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-    else:
-        # Manejar otros tipos de eventos si es necesario
-        return Response({'mensaje': f'Evento no manejado: {event.type}'}, status=status.HTTP_200_OK)
+    return Response({'status': 'recibido' if creado else 'duplicado', 'evento': evento.stripe_id})
 
 
 @api_view(['POST'])
@@ -692,39 +652,23 @@ def crear_checkout_session_stripe(request, pedido_id):
             pago.save()
 
         # Crear Checkout Session
-        checkout_session = stripe.checkout.Session.create(
-            payment_method_types=['card'],
-            line_items=[
-                {
-                    'price_data': {
-                        'currency': 'bob',  # ✅ Stripe usa 'bob' en minúsculas
-                        'product_data': {
-                            'name': f'Pedido #{pedido.id}',
-                            'description': f'Productos del pedido #{pedido.id}',
-                        },
-                        'unit_amount': int(pedido.monto_total * 100),  # Stripe trabaja en centavos
-                    },
-                    'quantity': 1,
-                },
-            ],
-            mode='payment',
-            success_url=f"{settings.FRONTEND_URL}/pago/exitoso?session_id={{CHECKOUT_SESSION_ID}}",
-            cancel_url=f"{settings.FRONTEND_URL}/pago/cancelado?session_id={{CHECKOUT_SESSION_ID}}",
-            metadata={
-                'pedido_id': pedido.id,
-                'pago_id': pago.id
-            }
+        checkout_session = obtener_pasarela().crear_sesion_checkout(
+            pedido,
+            pago,
+            url_exito=f"{settings.FRONTEND_URL}/pago/exitoso?session_id={{CHECKOUT_SESSION_ID}}",
+            url_cancelacion=f"{settings.FRONTEND_URL}/pago/cancelado?session_id={{CHECKOUT_SESSION_ID}}",
         )
-        print('pago realizado correctamente')
         # Guardar el ID de la sesión en el registro de pago
         pago.stripe_checkout_session_id = checkout_session.id
-        pago.save()
+        pago.save(update_fields=['stripe_checkout_session_id'])
         
         return Response({
             'sessionId': checkout_session.id,
             'checkoutUrl': checkout_session.url
         })
         
+    except PasarelaNoDisponible as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response(
             {'error': str(e)}, 
@@ -733,84 +677,16 @@ def crear_checkout_session_stripe(request, pedido_id):
 @method_decorator(csrf_exempt, name='dispatch')
 class StripeWebhookView(View):
     """
-    Vista para procesar webhooks de Stripe
+    Vista para procesar webhooks de Stripe. Solo verifica la firma y guarda el
+    evento; el pago, el pedido y el comprobante se actualizan en segundo plano
+    (orders.eventos_stripe). Las reentregas responden 200 sin reprocesar.
     """
     def post(self, request, *args, **kwargs):
-        print("🔔 Webhook recibido")  # Para debugging
-        payload = request.body
-        sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
-        event = None
-
         try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
-            )
-            print(f"✅ Evento verificado: {event['type']}")  # Para debugging
+            evento, creado = recibir_webhook(request.body, request.META.get('HTTP_STRIPE_SIGNATURE'))
         except ValueError as e:
-            print(f"❌ Error en payload: {e}")  # Para debugging
             return JsonResponse({'error': str(e)}, status=400)
         except stripe.error.SignatureVerificationError as e:
-            print(f"❌ Error en firma: {e}")  # Para debugging
             return JsonResponse({'error': str(e)}, status=400)
 
-        # Manejar el evento
-        if event['type'] == 'checkout.session.completed':
-            session = event['data']['object']
-            
-            # Obtener el ID del pago desde los metadatos
-            pago_id = session['metadata']['pago_id']
-            payment_intent_id = session['payment_intent']
-            
-            print(f"💰 Pago completado para pago_id: {pago_id}")  # ¡AHORA SÍ!
-            
-            try:
-                # Actualizar el registro de pago
-                pago = Pago.objects.get(id=pago_id)
-                pago.confirmar(payment_intent_id)
-                
-                # Actualizar el estado del pedido
-                pedido = pago.pedido
-                pedido.estado_pedido = 'confirmado'
-                pedido.save()
-                
-                # Crear comprobante
-                from .models import Comprobante
-                Comprobante.objects.create(
-                    pedido=pedido,
-                    tipo_comprobante='factura' if pedido.monto_total > 700 else 'boleta'
-                )
-                
-                print(f"✅ Pago {pago_id} confirmado exitosamente")
-                return JsonResponse({'status': 'success'}, status=200)
-                
-            except Pago.DoesNotExist:
-                print(f"❌ Pago no encontrado: {pago_id}")
-                return JsonResponse({'error': 'Pago no encontrado'}, status=404)
-            except Exception as e:
-                print(f"❌ Error procesando pago {pago_id}: {e}")
-                return JsonResponse({'error': str(e)}, status=500)
-        
-        elif event['type'] == 'checkout.session.expired':
-            session = event['data']['object']
-            
-            # Obtener el ID del pago desde los metadatos
-            pago_id = session['metadata']['pago_id']
-            
-            print(f"⏰ Sesión expirada para pago_id: {pago_id}")
-            
-            try:
-                # Actualizar el registro de pago como fallido
-                pago = Pago.objects.get(id=pago_id)
-                pago.fallar('La sesión de pago expiró')
-                
-                print(f"✅ Pago {pago_id} marcado como expirado")
-                return JsonResponse({'status': 'success'}, status=200)
-                
-            except Pago.DoesNotExist:
-                print(f"❌ Pago no encontrado: {pago_id}")
-                return JsonResponse({'error': 'Pago no encontrado'}, status=404)
-        
-        else:
-            print(f"ℹ️ Evento no manejado: {event['type']}")
-        
-        return JsonResponse({'status': 'success'}, status=200)
\ No newline at end of file
+        return JsonResponse({'status': 'recibido' if creado else 'duplicado', 'evento': evento.stripe_id}, status=200)
@@ -0,0 +1,105 @@
+# products/busqueda.py
+"""
+Búsqueda de productos sobre la columna productos.vector_busqueda.
+
+El vector lo mantiene un trigger de la base de datos con el diccionario
+'spanish' (nombre y SKU con peso A, modelo B, descripción C) y está indexado
+con GIN. Cuando el texto completo no encuentra nada se recurre a la similitud
+por trigramas sobre el nombre (pg_trgm) para tolerar errores de tipeo.
+"""
+import re
+from django.contrib.postgres.search import (SearchQuery, SearchRank, SearchHeadline,
+                                            TrigramWordSimilarity)
+from django.db import connection
+from django.db.models import F
+from .models import Producto
+
+CONFIGURACION = 'spanish'
+_PALABRA = re.compile(r'\w+', re.UNICODE)
+_trigramas_disponibles = None
+
+
+def trigramas_disponibles():
+    """Indica si la extensión pg_trgm está instalada (se consulta una sola vez)"""
+    global _trigramas_disponibles
+    if _trigramas_disponibles is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigramas_disponibles = cursor.fetchone() is not None
+    return _trigramas_disponibles
+
+
+def construir_consulta(termino):
+    """
+    Convierte el texto del usuario en un tsquery por prefijos
+    ('refri sams' → 'refri:* & sams:*') para que funcione mientras se escribe.
+    """
+    palabras = _PALABRA.findall(termino.lower())
+    if not palabras:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{palabra}:*' for palabra in palabras),
+        config=CONFIGURACION,
+        search_type='raw'
+    )
+
+
+class BuscadorProductos:
+    """Búsqueda rankeada de productos con respaldo por similitud"""
+
+    INICIO_RESALTADO = '<mark>'
+    FIN_RESALTADO = '</mark>'
+
+    @classmethod
+    def buscar(cls, termino, queryset=None, resaltar=True):
+        """
+        Devuelve un queryset ordenado por relevancia y anotado con
+        `relevancia` y, si se pide, `nombre_resaltado` y `descripcion_resaltada`.
+        """
+        if queryset is None:
+            queryset = Producto.objects.filter(estado='activo')
+
+        consulta = construir_consulta(termino or '')
+        if consulta is None:
+            return queryset.none()
+
+        resultados = (
+            queryset.filter(vector_busqueda=consulta)
+            .annotate(relevancia=SearchRank(F('vector_busqueda'), consulta))
+            .order_by('-relevancia', '-id')
+        )
+        if not resultados.exists() and trigramas_disponibles():
+            resultados = cls._buscar_aproximado(termino, queryset)
+
+        if resaltar:
+            resultados = resultados.annotate(
+                nombre_resaltado=cls._resaltado('nombre', consulta),
+                descripcion_resaltada=cls._resaltado('descripcion', consulta, max_palabras=25),
+            )
+        return resultados
+
+    @classmethod
+    def _buscar_aproximado(cls, termino, queryset):
+        """
+        Similitud por trigramas sobre el nombre. El operador <% usa
+        productos_nombre_trgm_idx y el umbral pg_trgm.word_similarity_threshold.
+        """
+        termino = ' '.join(_PALABRA.findall(termino.lower()))
+        return (
+            queryset.filter(nombre__trigram_word_similar=termino)
+            .annotate(relevancia=TrigramWordSimilarity(termino, 'nombre'))
+            .order_by('-relevancia', '-id')
+        )
+
+    @classmethod
+    def _resaltado(cls, campo, consulta, max_palabras=35):
+        return SearchHeadline(
+            campo,
+            consulta,
+            config=CONFIGURACION,
+            start_sel=cls.INICIO_RESALTADO,
+            stop_sel=cls.FIN_RESALTADO,
+            max_words=max_palabras,
+            min_words=min(15, max_palabras - 1),
+            highlight_all=False,
+        )
@@ -0,0 +1,82 @@
+# products/cache.py
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+from core.cache import obtener_generaciones, registrar_evento, obtener_estadisticas
+
+ALIAS_CACHE = 'catalogo'
+
+# Tablas cuyo contenido aparece en la respuesta serializada de un producto
+TABLAS_CATALOGO = ('productos', 'inventario', 'categorias', 'marcas', 'categorias_envio')
+
+
+def normalizar_parametros(query_params):
+    """Normaliza filtros, búsqueda, orden y página para que equivalgan en la clave"""
+    normalizados = []
+    for nombre in sorted(query_params):
+        valores = sorted(
+            ' '.join(valor.split()).lower() if nombre == 'search' else valor.strip()
+            for valor in query_params.getlist(nombre)
+        )
+        valores = [valor for valor in valores if valor]
+        if not valores or (nombre == 'page' and valores == ['1']):
+            continue
+        normalizados.append((nombre, valores))
+    return normalizados
+
+
+def construir_clave(vista, request, argumentos):
+    """Clave versionada con las generaciones de las tablas del catálogo"""
+    contenido = json.dumps([
+        vista,
+        argumentos,
+        normalizar_parametros(request.query_params),
+        obtener_generaciones(TABLAS_CATALOGO),
+    ], sort_keys=True, default=str)
+    return f'{vista}:{hashlib.sha1(contenido.encode()).hexdigest()}'
+
+
+def estadisticas_catalogo():
+    """Hits y misses acumulados de la caché del catálogo"""
+    contadores = obtener_estadisticas('catalogo', ['hits', 'misses'])
+    total = contadores['hits'] + contadores['misses']
+    contadores['hit_rate'] = round(contadores['hits'] / total, 4) if total else 0.0
+    return contadores
+
+
+class CatalogoCacheMixin:
+    """
+    Cachea las respuestas GET del catálogo para usuarios que no son staff.
+    Las entradas quedan obsoletas cuando cambia cualquiera de las tablas del
+    catálogo (ver products.signals).
+    """
+    cache_vista = None
+
+    def list(self, request, *args, **kwargs):
+        return self._respuesta_cacheada(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._respuesta_cacheada(super().retrieve, request, *args, **kwargs)
+
+    def _respuesta_cacheada(self, generar, request, *args, **kwargs):
+        # El staff ve productos inactivos, así que no comparte caché
+        if request.user.is_staff:
+            return generar(request, *args, **kwargs)
+
+        cache = caches[ALIAS_CACHE]
+        clave = construir_clave(self.cache_vista, request, kwargs)
+        datos = cache.get(clave)
+        if datos is not None:
+            registrar_evento('catalogo', 'hits')
+            response = Response(datos)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        registrar_evento('catalogo', 'misses')
+        response = generar(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(clave, response.data, settings.CATALOGO_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
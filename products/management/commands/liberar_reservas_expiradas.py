@@ -0,0 +1,31 @@
+# products/management/commands/liberar_reservas_expiradas.py
+import time
+from django.core.management.base import BaseCommand
+from products.models import ReservaInventario
+
+
+class Command(BaseCommand):
+    help = 'Devuelve al stock libre las reservas de checkout expiradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=0,
+            help='Segundos entre ejecuciones; 0 ejecuta una sola vez',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+
+        # Las reservas también se liberan al reservar o comprar esos productos;
+        # esto corrige stock_reservado de los que nadie vuelve a pedir
+        while True:
+            expiradas = ReservaInventario.liberar_expiradas()
+            self.stdout.write(f'Reservas expiradas: {expiradas}')
+
+            if not intervalo:
+                break
+            time.sleep(intervalo)
+
+        self.stdout.write(self.style.SUCCESS('✅ Reservas expiradas liberadas'))
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0007_categoriaenvio_producto_categoria_envio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventario',
+            name='stock_reservado',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='inventario',
+            name='stock_actual',
+            field=models.IntegerField(blank=True, default=0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='inventario',
+            name='ultima_actualizacion',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ReservaInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField()),
+                ('estado', models.CharField(choices=[('activa', 'Activa'), ('confirmada', 'Confirmada'), ('liberada', 'Liberada'), ('expirada', 'Expirada')], default='activa', max_length=20)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('expira_en', models.DateTimeField()),
+                ('inventario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.inventario')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reservas_inventario',
+                'indexes': [models.Index(fields=['estado', 'expira_en'], name='reservas_estado_expira_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida'), ('ajuste', 'Ajuste'), ('devolucion', 'Devolución')], max_length=20)),
+                ('cantidad', models.IntegerField()),
+                ('aplicado', models.BooleanField(default=False)),
+                ('referencia', models.CharField(blank=True, max_length=100, null=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('inventario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.inventario')),
+            ],
+            options={
+                'db_table': 'movimientos_inventario',
+                'indexes': [models.Index(condition=models.Q(('aplicado', False)), fields=['inventario'], name='movimientos_pendientes_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_libro_movimientos_reservas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['estado', '-fecha_creacion', '-id'], name='productos_estado_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='productos_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:43
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+VECTOR_PRODUCTO = """
+    setweight(to_tsvector('spanish', coalesce({t}.nombre, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({t}.sku, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce({t}.modelo, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce({t}.descripcion, '')), 'C')
+"""
+
+CREAR_TRIGGER = f"""
+CREATE OR REPLACE FUNCTION productos_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    NEW.vector_busqueda := {VECTOR_PRODUCTO.format(t='NEW')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER productos_vector_busqueda
+    BEFORE INSERT OR UPDATE OF nombre, sku, modelo, descripcion, vector_busqueda ON productos
+    FOR EACH ROW EXECUTE FUNCTION productos_vector_busqueda();
+
+UPDATE productos SET vector_busqueda = {VECTOR_PRODUCTO.format(t='productos')};
+"""
+
+ELIMINAR_TRIGGER = """
+DROP TRIGGER IF EXISTS productos_vector_busqueda ON productos;
+DROP FUNCTION IF EXISTS productos_vector_busqueda();
+"""
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    """
+    La búsqueda aproximada necesita pg_trgm. Si el servidor no incluye la
+    extensión, la migración continúa y la búsqueda se limita al texto completo.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS productos_nombre_trgm_idx '
+            'ON productos USING gin (nombre gin_trgm_ops)'
+        )
+
+
+def eliminar_indice_trigramas(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS productos_nombre_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_indices_paginacion_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='vector_busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREAR_TRIGGER, ELIMINAR_TRIGGER),
+        migrations.AddIndex(
+            model_name='producto',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['vector_busqueda'], name='productos_busqueda_gin_idx'),
+        ),
+        migrations.RunPython(crear_indice_trigramas, eliminar_indice_trigramas),
+    ]
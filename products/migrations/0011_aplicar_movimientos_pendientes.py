@@ -0,0 +1,29 @@
+# Las entradas de inventario ahora se aplican al registrarse; consolidar las
+# que quedaron pendientes en el libro antes de este cambio.
+from django.db import migrations
+
+CONSOLIDAR_PENDIENTES = """
+WITH pendientes AS (
+    UPDATE movimientos_inventario SET aplicado = TRUE
+    WHERE aplicado = FALSE
+    RETURNING inventario_id, cantidad
+)
+UPDATE inventario
+SET stock_actual = COALESCE(inventario.stock_actual, 0) + totales.total,
+    ultima_actualizacion = now()
+FROM (
+    SELECT inventario_id, SUM(cantidad) AS total FROM pendientes GROUP BY inventario_id
+) AS totales
+WHERE inventario.id = totales.inventario_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CONSOLIDAR_PENDIENTES, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_aplicar_movimientos_pendientes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='movimientoinventario',
+            name='movimientos_pendientes_idx',
+        ),
+        migrations.RemoveField(
+            model_name='movimientoinventario',
+            name='aplicado',
+        ),
+    ]
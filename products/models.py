@@ -1,6 +1,15 @@
 # products/models.py
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Case, When, Value, F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from users.models import Usuario
+from core.cache import incrementar_al_confirmar
 from cloudinary.models import CloudinaryField
 from django.utils.text import slugify
 
@@ -73,6 +82,8 @@ class Producto(models.Model):
         blank=True
     )
     fecha_actualizacion = models.DateTimeField(auto_now=True)  # Nuevo
+    # Mantenido por el trigger productos_vector_busqueda (ver products.busqueda)
+    vector_busqueda = SearchVectorField(null=True, editable=False)
     
 
     def activar(self):
@@ -98,35 +109,96 @@ class Producto(models.Model):
         
     class Meta:
         db_table = 'productos'
+        indexes = [
+            # Paginación por cursor del catálogo público (solo productos activos)
+            models.Index(fields=['estado', '-fecha_creacion', '-id'], name='productos_estado_fecha_id_idx'),
+            models.Index(fields=['-fecha_creacion', '-id'], name='productos_fecha_id_idx'),
+            GinIndex(fields=['vector_busqueda'], name='productos_busqueda_gin_idx'),
+        ]
 
 class Inventario(models.Model):
     producto = models.OneToOneField(Producto, on_delete=models.CASCADE)
     stock_actual = models.IntegerField(default=0,null=True, blank=True)
     stock_minimo = models.IntegerField(default=0, null=True, blank=True)
+    stock_reservado = models.IntegerField(default=0)
     ultima_actualizacion = models.DateTimeField(auto_now=True,null=True, blank=True)
     
-    def ajustar_stock(self, nueva_cantidad):
+    def ajustar_stock(self, nueva_cantidad, referencia=None):
         """Establece un nuevo nivel de stock"""
+        nueva_cantidad = int(nueva_cantidad)
+        with transaction.atomic():
+            anterior = Inventario.objects.select_for_update().values_list(
+                'stock_actual', flat=True
+            ).get(pk=self.pk) or 0
+            Inventario.objects.filter(pk=self.pk).update(
+                stock_actual=nueva_cantidad,
+                ultima_actualizacion=timezone.now()
+            )
+            MovimientoInventario.objects.create(
+                inventario_id=self.pk,
+                tipo='ajuste',
+                cantidad=nueva_cantidad - anterior,
+                referencia=referencia
+            )
+            # update() no emite post_save: invalidar la caché del catálogo a mano
+            incrementar_al_confirmar('inventario')
         self.stock_actual = nueva_cantidad
-        self.save()
     
-    def reducir_stock(self, cantidad):
-        """Reduce el stock"""
-        if self.stock_actual >= cantidad:
-            self.stock_actual -= cantidad
-            self.save()
-            return True
-        return False
-    
-    def aumentar_stock(self, cantidad):
-        """Aumenta el stock"""
-        self.stock_actual += cantidad
-        self.save()
+    def reducir_stock(self, cantidad, referencia=None):
+        """Reduce el stock con un UPDATE condicional, sin leer-modificar-escribir"""
+        cantidad = int(cantidad)
+        with transaction.atomic():
+            descontado = self._descontar(cantidad)
+            if not descontado and ReservaInventario.liberar_expiradas(inventario_ids=[self.pk]):
+                # Reservas vencidas que todavía contaban en stock_reservado
+                descontado = self._descontar(cantidad)
+            if not descontado:
+                return False
+            incrementar_al_confirmar('inventario')
+            MovimientoInventario.objects.create(
+                inventario_id=self.pk,
+                tipo='salida',
+                cantidad=-cantidad,
+                referencia=referencia
+            )
+        self.refresh_from_db(fields=['stock_actual', 'stock_reservado'])
+        return True
+    
+    def aumentar_stock(self, cantidad, tipo='entrada', referencia=None):
+        """
+        Suma la entrada a stock_actual con un UPDATE atómico (F()) y la
+        registra en el libro de movimientos. El bloqueo de la fila dura solo
+        ese UPDATE.
+        """
+        cantidad = int(cantidad)
+        with transaction.atomic():
+            Inventario.objects.filter(pk=self.pk).update(
+                stock_actual=Coalesce(F('stock_actual'), 0) + cantidad,
+                ultima_actualizacion=timezone.now()
+            )
+            MovimientoInventario.objects.create(
+                inventario_id=self.pk,
+                tipo=tipo,
+                cantidad=cantidad,
+                referencia=referencia
+            )
+            incrementar_al_confirmar('inventario')
+        self.refresh_from_db(fields=['stock_actual', 'stock_reservado'])
         return True
     
+    def _descontar(self, cantidad):
+        """Descuenta stock libre (no reservado) en un solo UPDATE atómico"""
+        return Inventario.objects.filter(
+            pk=self.pk,
+            stock_actual__gte=F('stock_reservado') + cantidad
+        ).update(
+            stock_actual=F('stock_actual') - cantidad,
+            ultima_actualizacion=timezone.now()
+        ) == 1
+    
     def verificar_disponibilidad(self, cantidad):
         """Verifica si hay stock suficiente"""
-        return self.stock_actual >= cantidad
+        return (self.stock_actual or 0) - self.stock_reservado >= cantidad
     
     def necesita_reabastecimiento(self):
         """Verifica si el stock está por debajo del mínimo"""
@@ -155,6 +227,137 @@ class Inventario(models.Model):
     class Meta:
         db_table = 'inventario'
 
+class MovimientoInventario(models.Model):
+    """Libro de movimientos de inventario (solo se agregan filas)"""
+    TIPOS_MOVIMIENTO = (
+        ('entrada', 'Entrada'),
+        ('salida', 'Salida'),
+        ('ajuste', 'Ajuste'),
+        ('devolucion', 'Devolución'),
+    )
+    
+    inventario = models.ForeignKey(Inventario, on_delete=models.CASCADE)
+    tipo = models.CharField(max_length=20, choices=TIPOS_MOVIMIENTO)
+    cantidad = models.IntegerField()  # Positivo para entradas, negativo para salidas
+    referencia = models.CharField(max_length=100, null=True, blank=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'movimientos_inventario'
+
+class _ReservaIncompleta(Exception):
+    """Interrumpe una reserva por lote para revertirla"""
+
+
+class ReservaInventario(models.Model):
+    """Reserva temporal de stock mientras un carrito está en checkout"""
+    ESTADOS_RESERVA = (
+        ('activa', 'Activa'),
+        ('confirmada', 'Confirmada'),
+        ('liberada', 'Liberada'),
+        ('expirada', 'Expirada'),
+    )
+    
+    inventario = models.ForeignKey(Inventario, on_delete=models.CASCADE)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
+    cantidad = models.IntegerField()
+    estado = models.CharField(max_length=20, choices=ESTADOS_RESERVA, default='activa')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    expira_en = models.DateTimeField()
+    
+    @classmethod
+    def reservar_lote(cls, usuario, cantidades, minutos=None):
+        """
+        Reserva stock para varios productos ({producto_id: cantidad}) con un
+        solo UPDATE condicional. Devuelve (reservas, producto_ids_sin_stock);
+        si algún producto no alcanza no se reserva nada.
+        """
+        minutos = minutos or getattr(settings, 'INVENTARIO_RESERVA_MINUTOS', 15)
+        inventarios = dict(
+            Inventario.objects.filter(producto_id__in=cantidades).values_list('producto_id', 'id')
+        )
+        # Las reservas vencidas de estos productos dejan de contar antes de reservar
+        cls.liberar_expiradas(inventario_ids=list(inventarios.values()))
+        cantidad_reservada = Case(
+            *[When(producto_id=producto_id, then=Value(cantidad))
+              for producto_id, cantidad in cantidades.items()],
+            output_field=models.IntegerField()
+        )
+        
+        try:
+            with transaction.atomic():
+                actualizados = Inventario.objects.filter(
+                    producto_id__in=cantidades,
+                    stock_actual__gte=F('stock_reservado') + cantidad_reservada
+                ).update(stock_reservado=F('stock_reservado') + cantidad_reservada)
+                if actualizados != len(cantidades):
+                    # Deshacer las reservas parciales
+                    raise _ReservaIncompleta()
+                
+                expira_en = timezone.now() + timedelta(minutes=minutos)
+                reservas = cls.objects.bulk_create([
+                    cls(
+                        inventario_id=inventarios[producto_id],
+                        usuario=usuario,
+                        cantidad=cantidad,
+                        expira_en=expira_en
+                    )
+                    for producto_id, cantidad in cantidades.items()
+                ])
+        except _ReservaIncompleta:
+            sin_stock = [
+                producto_id for producto_id in cantidades if producto_id not in inventarios
+            ] + list(
+                Inventario.objects.filter(
+                    producto_id__in=cantidades,
+                    stock_actual__lt=F('stock_reservado') + cantidad_reservada
+                ).values_list('producto_id', flat=True)
+            )
+            return [], sin_stock
+        return reservas, []
+    
+    @classmethod
+    def liberar_de_usuario(cls, usuario):
+        """Libera todas las reservas activas de un usuario"""
+        return cls._cerrar(cls.objects.filter(usuario=usuario), 'liberada')
+    
+    @classmethod
+    def liberar_expiradas(cls, inventario_ids=None):
+        """Devuelve al stock libre las reservas cuyo tiempo expiró"""
+        expiradas = cls.objects.filter(expira_en__lt=timezone.now())
+        if inventario_ids is not None:
+            expiradas = expiradas.filter(inventario_id__in=inventario_ids)
+        return cls._cerrar(expiradas, 'expirada')
+    
+    @classmethod
+    def _cerrar(cls, queryset, nuevo_estado):
+        """Cierra reservas activas y descuenta su cantidad de stock_reservado"""
+        with transaction.atomic():
+            reservas = list(
+                queryset.filter(estado='activa')
+                .select_for_update(skip_locked=True)
+                .values_list('id', 'inventario_id', 'cantidad')
+            )
+            if not reservas:
+                return 0
+            
+            totales = defaultdict(int)
+            for _, inventario_id, cantidad in reservas:
+                totales[inventario_id] += cantidad
+            
+            cls.objects.filter(id__in=[reserva[0] for reserva in reservas]).update(estado=nuevo_estado)
+            for inventario_id, total in totales.items():
+                Inventario.objects.filter(pk=inventario_id).update(
+                    stock_reservado=F('stock_reservado') - total
+                )
+        return len(reservas)
+    
+    class Meta:
+        db_table = 'reservas_inventario'
+        indexes = [
+            models.Index(fields=['estado', 'expira_en'], name='reservas_estado_expira_idx'),
+        ]
+
 class Favorito(models.Model):
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
     producto = models.ForeignKey(Producto, on_delete=models.CASCADE)
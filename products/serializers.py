@@ -4,6 +4,7 @@ from rest_framework import serializers
 from .models import Categoria, Marca, Producto, Inventario, Favorito, CategoriaEnvio
 import cloudinary
 import cloudinary.uploader
+from core.optimizacion import ExpandibleMixin
 
 class CategoriaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,6 +31,9 @@ class ProductoSerializer(serializers.ModelSerializer):
     categoria_envio_nombre = serializers.CharField(source='categoria_envio.nombre', read_only=True)
     categoria_envio_tarifa = serializers.DecimalField(source='categoria_envio.tarifa', read_only=True, max_digits=10, decimal_places=2)
 
+    # Relaciones que leen los campos de arriba (ver core.optimizacion)
+    select_related = ('categoria', 'marca', 'inventario', 'categoria_envio')
+
     class Meta:
         model = Producto
         fields = ('id', 'sku', 'nombre', 'slug', 'descripcion', 'precio', 
@@ -41,6 +45,29 @@ class ProductoSerializer(serializers.ModelSerializer):
                   'envio_gratis', 'destacado', 'categoria_envio',  # ← AGREGAR
                   'categoria_envio_nombre', 'categoria_envio_tarifa')  # ← AGREGAR
 
+class ProductoResumenSerializer(serializers.ModelSerializer):
+    """Proyección compacta para anidar en carritos, pedidos, devoluciones y favoritos"""
+    stock_actual = serializers.IntegerField(source='inventario.stock_actual', read_only=True)
+
+    select_related = ('inventario',)
+    # Solo estas columnas se leen de la base de datos (ver core.optimizacion)
+    only = ('id', 'sku', 'nombre', 'slug', 'precio', 'precio_original', 'imagen_url',
+            'estado', 'envio_gratis', 'inventario__stock_actual')
+
+    class Meta:
+        model = Producto
+        fields = ('id', 'sku', 'nombre', 'slug', 'precio', 'precio_original', 'imagen_url',
+                  'estado', 'envio_gratis', 'stock_actual')
+
+class ProductoBusquedaSerializer(ProductoSerializer):
+    """Resultado de búsqueda con relevancia y fragmentos resaltados con <mark>"""
+    relevancia = serializers.FloatField(read_only=True)
+    nombre_resaltado = serializers.CharField(read_only=True)
+    descripcion_resaltada = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta(ProductoSerializer.Meta):
+        fields = ProductoSerializer.Meta.fields + ('relevancia', 'nombre_resaltado', 'descripcion_resaltada')
+
 class ProductoCreateSerializer(serializers.ModelSerializer):
     stock_inicial = serializers.IntegerField(write_only=True, required=False, default=0)
     stock_minimo = serializers.IntegerField(write_only=True, required=False, default=0)
@@ -217,8 +244,10 @@ class InventarioSerializer(serializers.ModelSerializer):
         model = Inventario
         fields = '__all__'
 
-class FavoritoSerializer(serializers.ModelSerializer):
-    producto_detalle = ProductoSerializer(source='producto', read_only=True)
+class FavoritoSerializer(ExpandibleMixin, serializers.ModelSerializer):
+    producto_detalle = ProductoResumenSerializer(source='producto', read_only=True)
+    
+    expandibles = {'producto_detalle': ProductoSerializer}
     
     class Meta:
         model = Favorito
@@ -0,0 +1,15 @@
+# products/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.cache import incrementar_al_confirmar
+from .models import Producto, Inventario, Categoria, Marca, CategoriaEnvio
+
+
+@receiver([post_save, post_delete], sender=Producto)
+@receiver([post_save, post_delete], sender=Inventario)
+@receiver([post_save, post_delete], sender=Categoria)
+@receiver([post_save, post_delete], sender=Marca)
+@receiver([post_save, post_delete], sender=CategoriaEnvio)
+def invalidar_cache_catalogo(sender, **kwargs):
+    """Deja obsoletas las respuestas cacheadas que dependen de la tabla modificada"""
+    incrementar_al_confirmar(sender._meta.db_table)
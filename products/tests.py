@@ -1,3 +1,101 @@
+# products/tests.py
+from datetime import timedelta
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.pruebas import ConsultasConstantesMixin, crear_usuario, crear_productos
+from .models import Favorito, Inventario, MovimientoInventario, ReservaInventario
 
-# Create your tests here.
+
+# =============================================================================
+# INVENTARIO
+# =============================================================================
+
+class AumentarStockTests(TestCase):
+
+    def setUp(self):
+        self.producto = crear_productos(1, stock=10)[0]
+        self.inventario = Inventario.objects.get(producto=self.producto)
+
+    def test_la_entrada_se_aplica_de_inmediato(self):
+        self.inventario.aumentar_stock(5, referencia='prueba')
+
+        self.assertEqual(self.inventario.stock_actual, 15)
+        self.assertEqual(Inventario.objects.get(pk=self.inventario.pk).stock_actual, 15)
+        movimiento = MovimientoInventario.objects.get(inventario=self.inventario, referencia='prueba')
+        self.assertEqual((movimiento.tipo, movimiento.cantidad), ('entrada', 5))
+
+    def test_endpoint_devuelve_stock_efectivo(self):
+        admin = crear_usuario('admin-stock')
+        admin.is_staff = True
+        admin.save(update_fields=['is_staff'])
+        cliente = APIClient(HTTP_HOST='localhost')
+        cliente.force_authenticate(user=admin)
+
+        response = cliente.post(
+            f'/api/products/inventario/{self.producto.id}/aumentar-stock/', {'cantidad': 7}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stock_actual'], 17)
+        self.assertEqual(response.data['stock_disponible'], 17)
+
+
+class ReservasExpiradasTests(TestCase):
+
+    def setUp(self):
+        self.producto = crear_productos(1, stock=5)[0]
+        self.inventario = Inventario.objects.get(producto=self.producto)
+        self.usuario = crear_usuario('reserva')
+
+    def _reserva_vencida(self, cantidad):
+        reservas, sin_stock = ReservaInventario.reservar_lote(crear_usuario('otro'), {self.producto.id: cantidad})
+        self.assertEqual(sin_stock, [])
+        ReservaInventario.objects.filter(id=reservas[0].id).update(expira_en=timezone.now() - timedelta(minutes=1))
+
+    def test_reservar_libera_las_vencidas(self):
+        self._reserva_vencida(5)
+
+        reservas, sin_stock = ReservaInventario.reservar_lote(self.usuario, {self.producto.id: 5})
+
+        self.assertEqual(sin_stock, [])
+        self.assertEqual(len(reservas), 1)
+        self.assertEqual(Inventario.objects.get(pk=self.inventario.pk).stock_reservado, 5)
+        self.assertTrue(ReservaInventario.objects.filter(estado='expirada').exists())
+
+    def test_reducir_stock_libera_las_vencidas(self):
+        self._reserva_vencida(5)
+
+        self.assertTrue(self.inventario.reducir_stock(3, referencia='venta'))
+
+        self.assertEqual(self.inventario.stock_actual, 2)
+        self.assertEqual(self.inventario.stock_reservado, 0)
+
+    def test_carrito_no_cuenta_reservas_vencidas(self):
+        from orders.models import Carrito
+        from orders.services import ServicioCarrito
+        self._reserva_vencida(5)
+        carrito = Carrito.objects.create(usuario=self.usuario)
+
+        resultantes = ServicioCarrito.agregar_lineas(carrito, {self.producto.id: 5})
+
+        self.assertEqual(resultantes, {self.producto.id: 5})
+
+
+# =============================================================================
+# CONSULTAS POR PÁGINA
+# =============================================================================
+
+class ConsultasFavoritosTests(ConsultasConstantesMixin, TestCase):
+    """Las consultas de favoritos no crecen con las filas de la página (N+1)"""
+
+    def setUp(self):
+        self.usuario = crear_usuario('consultas-favoritos')
+
+    def _agregar_favoritos(self, cantidad):
+        Favorito.objects.bulk_create([
+            Favorito(usuario=self.usuario, producto=producto) for producto in crear_productos(cantidad)
+        ])
+
+    def test_favoritos(self):
+        self.assert_consultas_constantes(self.usuario, '/api/products/favoritos/', self._agregar_favoritos)
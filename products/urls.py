@@ -8,6 +8,8 @@ urlpatterns = [
     path('marcas/', views.MarcaListCreateView.as_view(), name='lista_marcas'),
     path('marcas/<int:pk>/', views.MarcaDetailView.as_view(), name='detalle_marca'),
     path('productos/', views.ProductoListCreateView.as_view(), name='lista_productos'),
+    path('productos/buscar/', views.ProductoBusquedaView.as_view(), name='buscar_productos'),
+    path('productos/cache/estadisticas/', views.estadisticas_cache_catalogo, name='estadisticas_cache_catalogo'),
     path('productos/<slug:slug>/', views.ProductoDetailView.as_view(), name='detalle_producto'),
     path('inventario/', views.InventarioListView.as_view(), name='lista_inventario'),
     path('inventario/<int:pk>/', views.InventarioUpdateView.as_view(), name='actualizar_inventario'),
@@ -9,8 +9,11 @@ from .models import Categoria, Marca, Producto, Inventario, Favorito, CategoriaE
 from .serializers import (CategoriaSerializer, MarcaSerializer, 
                         ProductoSerializer, ProductoCreateSerializer,
                         InventarioSerializer, FavoritoSerializer,
-                        CategoriaEnvioSerializer)
-from django.db.models import Max
+                        CategoriaEnvioSerializer, ProductoBusquedaSerializer)
+from core.cache import obtener_generaciones
+from core.optimizacion import ConsultaOptimizadaMixin
+from .cache import CatalogoCacheMixin, estadisticas_catalogo, TABLAS_CATALOGO
+from .busqueda import BuscadorProductos
 
 class CategoriaListCreateView(generics.ListCreateAPIView):
     queryset = Categoria.objects.all()
@@ -48,12 +51,14 @@ class MarcaDetailView(generics.RetrieveUpdateDestroyAPIView):
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
-class ProductoListCreateView(generics.ListCreateAPIView):
+class ProductoListCreateView(CatalogoCacheMixin, generics.ListCreateAPIView):
     queryset = Producto.objects.select_related('categoria', 'marca', 'inventario')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['categoria', 'marca', 'estado']
     search_fields = ['nombre', 'descripcion', 'sku']
     ordering_fields = ['precio', 'fecha_creacion', 'nombre']
+    cache_vista = 'productos'
+    ordering_cursor = ('-fecha_creacion', '-id')
     
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PUT', 'PATCH']:
@@ -73,10 +78,24 @@ class ProductoListCreateView(generics.ListCreateAPIView):
         return queryset
     
 
-class ProductoDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductoBusquedaView(CatalogoCacheMixin, generics.ListAPIView):
+    """Búsqueda de texto completo: /productos/buscar/?q=refrigerador samsung"""
+    queryset = Producto.objects.filter(estado='activo').select_related('categoria', 'marca', 'inventario', 'categoria_envio')
+    serializer_class = ProductoBusquedaSerializer
+    permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['categoria', 'marca']
+    cache_vista = 'busqueda'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return BuscadorProductos.buscar(self.request.query_params.get('q', ''), queryset)
+
+class ProductoDetailView(CatalogoCacheMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Producto.objects.select_related('categoria', 'marca', 'inventario')
     serializer_class = ProductoSerializer
     lookup_field = 'slug'
+    cache_vista = 'producto'
     
     
     def get_serializer_class(self):
@@ -144,7 +163,7 @@ def ajustar_stock(request, producto_id):
             return Response({'error': 'La cantidad es requerida'}, status=status.HTTP_400_BAD_REQUEST)
         
         inventario = Inventario.objects.get(producto_id=producto_id)
-        inventario.ajustar_stock(cantidad)
+        inventario.ajustar_stock(cantidad, referencia=f'admin:{request.user.id}')
         
         return Response({
             'mensaje': 'Stock ajustado correctamente',
@@ -163,11 +182,13 @@ def aumentar_stock(request, producto_id):
             return Response({'error': 'La cantidad es requerida'}, status=status.HTTP_400_BAD_REQUEST)
         
         inventario = Inventario.objects.get(producto_id=producto_id)
-        inventario.aumentar_stock(cantidad)
+        # aumentar_stock aplica la entrada y recarga el stock efectivo
+        inventario.aumentar_stock(cantidad, referencia=f'admin:{request.user.id}')
         
         return Response({
             'mensaje': 'Stock aumentado correctamente',
-            'stock_actual': inventario.stock_actual
+            'stock_actual': inventario.stock_actual,
+            'stock_disponible': inventario.stock_actual - inventario.stock_reservado
         })
     except Inventario.DoesNotExist:
         return Response({'error': 'Inventario no encontrado'}, status=status.HTTP_404_NOT_FOUND)
@@ -179,12 +200,12 @@ def alertas_bajo_stock(request):
     alertas = Inventario.generar_alertas_bajo_stock()  # <- Ahora es un método de clase
     return Response(alertas)
 
-class FavoritoListCreateView(generics.ListCreateAPIView):
+class FavoritoListCreateView(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     serializer_class = FavoritoSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Favorito.objects.filter(usuario=self.request.user).select_related('producto')
+        return Favorito.objects.filter(usuario=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
@@ -233,21 +254,14 @@ class CategoriaEnvioDetailView(generics.RetrieveUpdateDestroyAPIView):
 def calcular_envio_carrito(request):
     """Calcular costo de envío para el carrito del usuario"""
     try:
-        from orders.models import Carrito, DetalleCarrito
+        from orders.models import Carrito
+        from orders.precios import totales_carrito
         
         # Obtener carrito del usuario
         carrito = Carrito.objects.get(usuario=request.user)
-        items_carrito = DetalleCarrito.objects.filter(carrito=carrito)
-        
-        if not items_carrito.exists():
-            return Response({'costo_envio': 0, 'moneda': 'USD'})
         
-        # Calcular envío: tomar la categoría más alta
-        costo_envio = CategoriaEnvio.objects.filter(
-            producto__detallecarrito__carrito=carrito
-        ).aggregate(
-            max_tarifa=Max('tarifa')
-        )['max_tarifa'] or 0
+        # Misma regla que el checkout: gratis si algún producto lo es, si no la tarifa más alta
+        costo_envio = totales_carrito(carrito).costo_envio
         
         return Response({
             'costo_envio': float(costo_envio),
@@ -298,4 +312,13 @@ def actualizar_categorias_envio_masivo(request):
         return Response(
             {'error': 'Las categorías de envío no están configuradas'}, 
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def estadisticas_cache_catalogo(request):
+    """Hits, misses y generaciones vigentes de la caché del catálogo"""
+    return Response({
+        **estadisticas_catalogo(),
+        'generaciones': obtener_generaciones(TABLAS_CATALOGO),
+    })
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bitacorasistema',
+            index=models.Index(fields=['-fecha_accion', '-id_bitacora'], name='bitacora_fecha_id_idx'),
+        ),
+    ]
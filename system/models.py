@@ -21,6 +21,9 @@ class BitacoraSistema(models.Model):
         verbose_name = 'Bitácora del Sistema'
         verbose_name_plural = 'Bitácoras del Sistema'
         ordering = ['-fecha_accion']
+        indexes = [
+            models.Index(fields=['-fecha_accion', '-id_bitacora'], name='bitacora_fecha_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.accion} - {self.estado} - {self.fecha_accion.strftime('%Y-%m-%d %H:%M')}"
@@ -16,6 +16,7 @@ class BitacoraSistemaListView(generics.ListAPIView):
     permission_classes = [permissions.IsAdminUser]
     filter_backends = [DjangoFilterBackend]
     filterset_class = BitacoraSistemaFilter
+    ordering_cursor = ('-fecha_accion', '-id_bitacora')
 
 class BitacoraSistemaCreateView(generics.CreateAPIView):
     """View para que el frontend registre acciones en la bitácora"""
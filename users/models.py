@@ -2,6 +2,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from .permisos import permisos_efectivos, recalcular_permisos
 
 class UsuarioManager(BaseUserManager):
     """Manager personalizado para el modelo Usuario con email como campo principal"""
@@ -115,6 +116,8 @@ class Usuario(AbstractUser):
         if isinstance(rol, int):
             rol = Rol.objects.get(id=rol)
         UsuarioRol.objects.get_or_create(usuario=self, rol=rol)
+        # La caché compartida se invalida en users.signals al confirmar
+        recalcular_permisos(self)
         return True
 
     def revocar_rol(self, rol):
@@ -122,28 +125,25 @@ class Usuario(AbstractUser):
         if isinstance(rol, int):
             rol = Rol.objects.get(id=rol)
         UsuarioRol.objects.filter(usuario=self, rol=rol).delete()
+        # La caché compartida se invalida en users.signals al confirmar
+        recalcular_permisos(self)
         return True
 
     def obtener_roles(self):
         """Devuelve la lista de roles del usuario"""
+        # Listados con prefetch_related('usuariorol_set__rol'): sin consultas extra
+        if 'usuariorol_set' in getattr(self, '_prefetched_objects_cache', {}):
+            return [ur.rol for ur in self.usuariorol_set.all()]
         usuario_roles = UsuarioRol.objects.filter(usuario=self).select_related('rol')
         return [ur.rol for ur in usuario_roles]
 
+    def obtener_permisos(self):
+        """Nombres de los permisos efectivos del usuario (ver users.permisos)"""
+        return permisos_efectivos(self)
+
     def tiene_permiso(self, nombre_permiso):
         """Verifica si el usuario tiene un permiso específico"""
-        # Obtener todos los roles del usuario
-        usuario_roles = UsuarioRol.objects.filter(usuario=self).values_list('rol_id', flat=True)
-        
-        # Buscar el permiso
-        permiso = Permiso.obtener_por_nombre(nombre_permiso)
-        if not permiso:
-            return False
-        
-        # Verificar si algún rol tiene el permiso
-        return RolPermiso.objects.filter(
-            rol_id__in=usuario_roles, 
-            permiso=permiso
-        ).exists()
+        return nombre_permiso in permisos_efectivos(self)
 
 
 class Rol(models.Model):
@@ -174,10 +174,7 @@ class Rol(models.Model):
     
     def tiene_permiso(self, nombre_permiso):
         """Verifica si el rol tiene un permiso específico"""
-        permiso = Permiso.obtener_por_nombre(nombre_permiso)
-        if not permiso:
-            return False
-        return RolPermiso.objects.filter(rol=self, permiso=permiso).exists()
+        return RolPermiso.objects.filter(rol=self, permiso__nombre_permiso=nombre_permiso).exists()
     
     class Meta:
         db_table = 'roles'
@@ -0,0 +1,95 @@
+# users/permisos.py
+"""
+Resolución de permisos RBAC (Usuario -> UsuarioRol -> RolPermiso -> Permiso).
+
+El conjunto de permisos efectivos de un usuario se calcula con una sola
+consulta y se guarda en dos niveles: en la instancia del usuario (dura lo
+que dura la petición, porque request.user es siempre el mismo objeto) y en
+la caché compartida, versionada con los contadores de core.cache:
+'usuario_rol:<id>' cambia cuando cambian los roles de ese usuario y
+'rol_permiso' cuando cambian los permisos de cualquier rol (ver
+users.signals). Después de la primera consulta, verificar un permiso es
+buscar un nombre en un frozenset.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import BasePermission, OperationHolderMixin
+from core.cache import obtener_generaciones, incrementar_al_confirmar
+
+GENERACION_ROLES = 'rol_permiso'
+
+
+def _generacion_usuario(usuario_id):
+    return f'usuario_rol:{usuario_id}'
+
+
+def consultar_permisos(usuario_id):
+    """Nombres de los permisos de todos los roles del usuario (una consulta)"""
+    from .models import Permiso
+    return frozenset(
+        Permiso.objects.filter(rolpermiso__rol__usuariorol__usuario_id=usuario_id)
+        .values_list('nombre_permiso', flat=True)
+        .distinct()
+    )
+
+
+def permisos_efectivos(usuario):
+    """frozenset con los nombres de los permisos del usuario"""
+    permisos = getattr(usuario, '_permisos_efectivos', None)
+    if permisos is not None:
+        return permisos
+
+    generaciones = obtener_generaciones((GENERACION_ROLES, _generacion_usuario(usuario.pk)))
+    clave = 'permisos:{}:{}:{}'.format(
+        usuario.pk, generaciones[GENERACION_ROLES], generaciones[_generacion_usuario(usuario.pk)]
+    )
+    cache = caches['default']
+    permisos = cache.get(clave)
+    if permisos is None:
+        permisos = consultar_permisos(usuario.pk)
+        cache.set(clave, permisos, settings.PERMISOS_CACHE_TIMEOUT)
+    usuario._permisos_efectivos = permisos
+    return permisos
+
+
+def recalcular_permisos(usuario):
+    """
+    Vuelve a leer los permisos de la base de datos para esta instancia. Los
+    contadores se incrementan al confirmar la transacción, así que dentro de
+    ella la caché compartida todavía tiene la versión anterior.
+    """
+    usuario._permisos_efectivos = consultar_permisos(usuario.pk)
+    return usuario._permisos_efectivos
+
+
+def invalidar_usuario(usuario_id):
+    """Deja obsoletos los permisos cacheados de un usuario"""
+    incrementar_al_confirmar(_generacion_usuario(usuario_id))
+
+
+def invalidar_roles():
+    """Deja obsoletos los permisos cacheados de todos los usuarios"""
+    incrementar_al_confirmar(GENERACION_ROLES)
+
+
+class TienePermiso(OperationHolderMixin, BasePermission):
+    """
+    Exige permisos RBAC: permission_classes = [TienePermiso('gestionar_pedidos')].
+    Con varios nombres exige todos. Se puede combinar con &, | y ~ como
+    cualquier permiso de DRF, también entre dos instancias
+    (OperationHolderMixin; DRF solo define los operadores en la metaclase).
+    """
+    message = 'No tienes permiso para realizar esta acción.'
+
+    def __init__(self, *permisos):
+        self.permisos = frozenset(permisos)
+
+    def __call__(self):
+        # DRF instancia cada elemento de permission_classes; ya somos una instancia
+        return self
+
+    def has_permission(self, request, view):
+        usuario = request.user
+        if not (usuario and usuario.is_authenticated):
+            return False
+        return self.permisos <= permisos_efectivos(usuario)
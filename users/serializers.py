@@ -6,6 +6,9 @@ from .models import Usuario, Rol, Permiso, UsuarioRol, RolPermiso
 class UsuarioSerializer(serializers.ModelSerializer):
     roles = serializers.SerializerMethodField()
 
+    # get_roles serializa cada rol con sus permisos (ver core.optimizacion)
+    prefetch_related = ('usuariorol_set__rol__permisos',)
+
     class Meta:
         model = Usuario
         # fields = ('id', 'email', 'nombre', 'apellido', 
@@ -0,0 +1,24 @@
+# users/signals.py
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Permiso, Rol, RolPermiso, UsuarioRol
+from .permisos import invalidar_usuario, invalidar_roles
+
+
+@receiver([post_save, post_delete], sender=UsuarioRol)
+def invalidar_permisos_usuario(sender, instance, **kwargs):
+    """Roles asignados o quitados desde cualquier lugar (vistas, admin, serializers)"""
+    invalidar_usuario(instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=RolPermiso)
+@receiver([post_save, post_delete], sender=Permiso)
+def invalidar_permisos_roles(sender, **kwargs):
+    invalidar_roles()
+
+
+@receiver(m2m_changed, sender=Rol.permisos.through)
+def invalidar_permisos_rol_m2m(sender, action, **kwargs):
+    # rol.permisos.set(...) en RolSerializer no emite post_save de RolPermiso
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidar_roles()
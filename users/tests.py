@@ -1,3 +1,62 @@
+# users/tests.py
 from django.test import TestCase
+from rest_framework.test import APIClient, APIRequestFactory
+from core.pruebas import ConsultasConstantesMixin, crear_usuario, crear_productos, crear_pedidos
+from .models import Permiso, Rol, RolPermiso
+from .permisos import TienePermiso
 
-# Create your tests here.
+
+# =============================================================================
+# CONSULTAS POR PÁGINA
+# =============================================================================
+
+class ConsultasUsuariosTests(ConsultasConstantesMixin, TestCase):
+    """Las consultas del listado de usuarios no crecen con las filas de la página (N+1)"""
+
+    def setUp(self):
+        self.staff = crear_usuario('consultas-staff')
+        self.staff.is_staff = True
+        self.staff.save(update_fields=['is_staff'])
+        self.rol, _ = Rol.objects.get_or_create(nombre_rol='Cliente')
+
+    def _agregar_usuarios(self, cantidad):
+        for _ in range(cantidad):
+            crear_usuario('consultas-extra').asignar_rol(self.rol)
+
+    def test_usuarios(self):
+        self.assert_consultas_constantes(self.staff, '/api/auth/usuarios/', self._agregar_usuarios)
+
+
+# =============================================================================
+# PERMISOS RBAC
+# =============================================================================
+
+class TienePermisoTests(TestCase):
+
+    def setUp(self):
+        self.usuario = crear_usuario('permisos')
+        rol = Rol.objects.create(nombre_rol='Operador de pedidos')
+        RolPermiso.objects.create(rol=rol, permiso=Permiso.objects.create(nombre_permiso='gestionar_pedidos'))
+        self.usuario.asignar_rol(rol)
+        self.request = APIRequestFactory().get('/')
+        self.request.user = self.usuario
+
+    def _permite(self, permiso):
+        # DRF instancia cada elemento de permission_classes antes de evaluarlo
+        return permiso().has_permission(self.request, None)
+
+    def test_combinar_dos_instancias(self):
+        self.assertTrue(self._permite(TienePermiso('gestionar_pedidos') | TienePermiso('ver_reportes')))
+        self.assertFalse(self._permite(TienePermiso('gestionar_pedidos') & TienePermiso('ver_reportes')))
+        self.assertTrue(self._permite(~TienePermiso('ver_reportes')))
+
+    def test_admin_o_permiso_en_actualizar_estado(self):
+        pedido = crear_pedidos(crear_usuario('cliente'), crear_productos(1), 1)[0]
+        cliente_api = APIClient(HTTP_HOST='localhost')
+        url = f'/api/orders/pedidos/{pedido.id}/actualizar-estado/'
+
+        cliente_api.force_authenticate(user=self.usuario)
+        self.assertEqual(cliente_api.post(url, {'estado': 'enviado'}, format='json').status_code, 200)
+
+        cliente_api.force_authenticate(user=crear_usuario('sin-permiso'))
+        self.assertEqual(cliente_api.post(url, {'estado': 'entregado'}, format='json').status_code, 403)
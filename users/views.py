@@ -4,6 +4,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
+from core.optimizacion import ConsultaOptimizadaMixin
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
@@ -237,13 +238,13 @@ def obtener_mis_roles(request):
     return Response(serializer.data)
 
 
-class UsuarioListView(generics.ListAPIView):
+class UsuarioListView(ConsultaOptimizadaMixin, generics.ListAPIView):
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
     permission_classes = [IsAuthenticated]
 
 
-class ClienteListView(generics.ListAPIView):
+class ClienteListView(ConsultaOptimizadaMixin, generics.ListAPIView):
     serializer_class = UsuarioSerializer
     permission_classes = [IsAuthenticated]
 
@@ -251,7 +252,7 @@ class ClienteListView(generics.ListAPIView):
         return Usuario.objects.obtener_por_rol('Cliente')
 
 
-class UsuarioDetailView(generics.RetrieveUpdateAPIView):
+class UsuarioDetailView(ConsultaOptimizadaMixin, generics.RetrieveUpdateAPIView):
     queryset = Usuario.objects.all()
     permission_classes = [IsAuthenticated]
     
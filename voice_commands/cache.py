@@ -0,0 +1,57 @@
+# voice_commands/cache.py
+"""
+Reutilización de reportes pedidos por comandos de voz o texto.
+
+La clave canónica sale de la solicitud de reporte ya validada (tipo, formato
+y rango de fechas en ISO), no del texto ni de la intención: "reporte de
+ventas de octubre" y "reporte de ventas del 01/10/2024 al 31/10/2024" piden
+lo mismo. La clave incluye la generación de cada tabla que lee el reporte
+(analytics.consultas.TABLAS_REPORTE), así que cualquier cambio en esos datos
+la deja obsoleta. La entrada apunta al ReporteGenerado y dura
+COMANDOS_CACHE_TIMEOUT segundos; solo se reutiliza si ese reporte terminó.
+"""
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from analytics.consultas import TABLAS_REPORTE
+from analytics.models import ReporteGenerado
+from core.cache import obtener_generaciones, registrar_evento, obtener_estadisticas
+from .intenciones import INTENCIONES_REPORTE
+
+
+def construir_clave(solicitud):
+    """Clave de la solicitud normalizada, versionada con las tablas del reporte"""
+    canonica = {nombre: valor for nombre, valor in solicitud.items() if valor not in (None, '')}
+    contenido = json.dumps([
+        canonica,
+        obtener_generaciones(TABLAS_REPORTE.get(canonica.get('tipo_reporte'), TABLAS_REPORTE['ventas'])),
+    ], sort_keys=True, default=str)
+    return f'comando_reporte:{hashlib.sha1(contenido.encode()).hexdigest()}'
+
+
+def buscar_reporte(clave, intencion):
+    """ReporteGenerado completado para la clave, o None. Registra hit/miss por intención"""
+    reporte_id = caches['default'].get(clave)
+    reporte = None
+    if reporte_id is not None:
+        reporte = ReporteGenerado.objects.filter(
+            id=reporte_id, estado='completado', url_descarga__isnull=False
+        ).first()
+    registrar_evento(f'comandos:{intencion}', 'hits' if reporte else 'misses')
+    return reporte
+
+
+def guardar_reporte(clave, reporte):
+    caches['default'].set(clave, reporte.id, settings.COMANDOS_CACHE_TIMEOUT)
+
+
+def estadisticas_comandos():
+    """Hits, misses y tasa de aciertos por intención de reporte"""
+    por_intencion = {}
+    for intencion in INTENCIONES_REPORTE:
+        contadores = obtener_estadisticas(f'comandos:{intencion}', ['hits', 'misses'])
+        total = contadores['hits'] + contadores['misses']
+        contadores['hit_rate'] = round(contadores['hits'] / total, 4) if total else 0.0
+        por_intencion[intencion] = contadores
+    return por_intencion
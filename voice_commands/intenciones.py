@@ -0,0 +1,198 @@
+# voice_commands/intenciones.py
+"""
+Motor de intenciones para comandos de voz y texto.
+
+Todas las palabras y patrones que interesan están en una sola expresión
+regular compilada al importar el módulo, con un grupo con nombre por tipo de
+token. Un único recorrido (finditer) sobre el texto normalizado extrae
+fechas, meses, años, formato, tipo de reporte, palabras clave y el término
+entre comillas; después las reglas del contexto deciden la intención a partir
+de esos tokens, sin volver a leer el texto.
+
+Las reglas de cada contexto se registran con @reglas_contexto('nombre').
+Los comandos se repiten mucho, así que el análisis de cada texto normalizado
+se guarda en un LRU por proceso.
+"""
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+MESES = {
+    'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
+    'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
+    'septiembre': '09', 'setiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12',
+}
+FORMATOS = {'pdf': 'pdf', 'excel': 'excel', 'xlsx': 'excel', 'csv': 'csv'}
+TIPOS_REPORTE = {
+    'ventas': 'ventas', 'venta': 'ventas',
+    'clientes': 'clientes', 'cliente': 'clientes',
+    'productos': 'productos', 'producto': 'productos',
+    'inventario': 'inventario',
+}
+PALABRAS_REPORTE = (
+    'reporte', 'reportes', 'informe', 'informes',
+    'estadística', 'estadísticas', 'estadistica', 'estadisticas',
+)
+PALABRAS_BUSQUEDA = ('buscar', 'busca', 'búsqueda', 'busqueda')
+PALABRAS_ACCION = PALABRAS_BUSQUEDA + ('stock',)
+# Intenciones que generan un reporte (las estadísticas de caché se llevan por intención)
+INTENCIONES_REPORTE = (
+    'reporte_ventas_rango', 'reporte_ventas_mes', 'reporte_ventas',
+    *(f'reporte_{tipo}' for tipo in sorted(set(TIPOS_REPORTE.values())) if tipo != 'ventas'),
+    'reporte_generico',
+)
+
+
+def _alternativa(palabras):
+    # Las más largas primero para que 'ventas' gane a 'venta'
+    return '|'.join(sorted(map(re.escape, palabras), key=len, reverse=True))
+
+
+# El orden de los grupos importa: una fecha completa se reconoce antes que su año
+_TOKENS = re.compile(
+    r'(?P<comillas>"(?P<termino>[^"]+)")'
+    r'|(?P<fecha>\b\d{1,2}/\d{1,2}/\d{4}\b)'
+    rf'|\b(?:(?P<mes>{_alternativa(MESES)})'
+    rf'|(?P<formato>{_alternativa(FORMATOS)})'
+    rf'|(?P<tipo>{_alternativa(TIPOS_REPORTE)})'
+    rf'|(?P<reporte>{_alternativa(PALABRAS_REPORTE)})'
+    rf'|(?P<accion>{_alternativa(PALABRAS_ACCION)})'
+    r'|(?P<anio>(?:19|20)\d{2}))\b'
+)
+
+Analisis = namedtuple('Analisis', ['texto', 'intencion', 'tipo_comando', 'parametros'])
+
+
+class Tokens:
+    """Lo que se encontró en el texto, en orden de aparición"""
+
+    __slots__ = ('fechas', 'meses', 'anios', 'formatos', 'tipos', 'palabras', 'terminos')
+
+    def __init__(self, texto):
+        self.fechas, self.meses, self.anios = [], [], []
+        self.formatos, self.tipos, self.palabras, self.terminos = [], [], set(), []
+        for coincidencia in _TOKENS.finditer(texto):
+            grupo = coincidencia.lastgroup
+            valor = coincidencia.group(grupo)
+            if grupo == 'comillas':
+                self.terminos.append(coincidencia.group('termino').strip())
+            elif grupo == 'fecha':
+                self.fechas.append(valor)
+            elif grupo == 'mes':
+                self.meses.append(valor)
+            elif grupo == 'anio':
+                self.anios.append(valor)
+            elif grupo == 'formato':
+                self.formatos.append(FORMATOS[valor])
+            elif grupo == 'tipo':
+                self.tipos.append(TIPOS_REPORTE[valor])
+                self.palabras.add(valor)
+            else:
+                self.palabras.add(valor)
+
+    @property
+    def pide_reporte(self):
+        return any(palabra in self.palabras for palabra in PALABRAS_REPORTE)
+
+    @property
+    def busca(self):
+        return any(palabra in self.palabras for palabra in PALABRAS_BUSQUEDA)
+
+    def parametros(self):
+        """Parámetros con las mismas claves que guarda ComandoVoz.parametros_extraidos"""
+        parametros = {}
+        if self.formatos:
+            parametros['formato'] = self.formatos[0]
+        if self.tipos:
+            parametros['tipo_reporte'] = self.tipos[0]
+        if self.meses:
+            parametros['mes'] = MESES[self.meses[0]]
+            parametros['mes_nombre'] = self.meses[0].capitalize()
+        if self.anios:
+            parametros['anio'] = self.anios[0]
+        if len(self.fechas) >= 2:
+            parametros['fecha_inicio'] = self.fechas[0]
+            parametros['fecha_fin'] = self.fechas[1]
+        elif len(self.fechas) == 1:
+            parametros['fecha'] = self.fechas[0]
+        return parametros
+
+
+def normalizar(texto):
+    """
+    Minúsculas y espacios simples. Las tildes se conservan porque el término
+    entre comillas va a la búsqueda de productos; las palabras clave se
+    reconocen con y sin tilde.
+    """
+    return ' '.join(unicodedata.normalize('NFC', texto).lower().split())
+
+
+# =============================================================================
+# REGLAS POR CONTEXTO
+# =============================================================================
+
+_REGLAS = {}
+
+
+def reglas_contexto(contexto):
+    """Registra la función que decide (intencion, tipo_comando) para un contexto"""
+    def registrar(funcion):
+        _REGLAS[contexto] = funcion
+        return funcion
+    return registrar
+
+
+@reglas_contexto('reports')
+def _reglas_reportes(tokens):
+    if not tokens.pide_reporte:
+        return None, None
+    tipo = tokens.tipos[0] if tokens.tipos else None
+    if tipo == 'ventas':
+        if len(tokens.fechas) >= 2:
+            return 'reporte_ventas_rango', 'reporte'
+        if tokens.meses:
+            return 'reporte_ventas_mes', 'reporte'
+        return 'reporte_ventas', 'reporte'
+    if tipo:
+        return f'reporte_{tipo}', 'reporte'
+    return 'reporte_generico', 'reporte'
+
+
+@reglas_contexto('products')
+def _reglas_productos(tokens):
+    menciona_producto = 'productos' in tokens.tipos
+    if tokens.busca and tokens.terminos:
+        if 'clientes' in tokens.tipos:
+            return 'buscar_cliente', 'busqueda'
+        if menciona_producto:
+            return 'buscar_producto', 'busqueda'
+    if 'stock' in tokens.palabras and menciona_producto:
+        return 'ver_stock', 'busqueda'
+    return None, None
+
+
+def contextos_registrados():
+    return sorted(_REGLAS)
+
+
+def analizar_normalizado(texto, contexto):
+    """Extrae los tokens de un texto ya normalizado y aplica las reglas del contexto"""
+    tokens = Tokens(texto)
+    reglas = _REGLAS.get(contexto)
+    intencion, tipo_comando = reglas(tokens) if reglas else (None, None)
+
+    parametros = tokens.parametros()
+    if intencion in ('buscar_producto', 'buscar_cliente'):
+        parametros['termino'] = tokens.terminos[0]
+    return Analisis(texto, intencion, tipo_comando, parametros)
+
+
+_analizar_cacheado = lru_cache(maxsize=1024)(analizar_normalizado)
+
+
+def analizar(texto, contexto):
+    """Normaliza el texto y lo analiza (o reutiliza el análisis de un texto igual)"""
+    analisis = _analizar_cacheado(normalizar(texto), contexto)
+    # Copia de los parámetros: quien llama puede completarlos
+    return analisis._replace(parametros=dict(analisis.parametros))
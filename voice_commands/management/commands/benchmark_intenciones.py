@@ -0,0 +1,40 @@
+# voice_commands/management/commands/benchmark_intenciones.py
+import json
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from voice_commands.intenciones import analizar, analizar_normalizado, normalizar
+
+CORPUS = Path(__file__).resolve().parents[2] / 'corpus_intenciones.json'
+
+
+class Command(BaseCommand):
+    help = 'Mide comandos por segundo del motor de intenciones sobre el corpus etiquetado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(CORPUS), help='Archivo JSON con los casos etiquetados')
+        parser.add_argument('--repeticiones', type=int, default=2000, help='Veces que se recorre el corpus al medir')
+
+    def handle(self, *args, **options):
+        # Los resultados esperados de cada caso se verifican en voice_commands.tests
+        casos = json.loads(Path(options['corpus']).read_text(encoding='utf-8'))
+
+        # Motor completo (sin caché) y con el LRU de textos repetidos
+        repeticiones = max(1, options['repeticiones'])
+        entradas = [(caso['texto'], caso['contexto']) for caso in casos]
+        total = repeticiones * len(entradas)
+        self.stdout.write(f'Casos: {len(casos)}')
+        for nombre, funcion in (
+            ('sin caché', lambda texto, contexto: analizar_normalizado(normalizar(texto), contexto)),
+            ('con caché', analizar),
+        ):
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                for texto, contexto in entradas:
+                    funcion(texto, contexto)
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(
+                f'{nombre}: {total} comandos en {segundos:.3f} s | '
+                f'{total / segundos:,.0f} comandos/s | {segundos / total * 1e6:.1f} µs por comando'
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark de intenciones completado'))
@@ -1,3 +1,30 @@
-from django.test import TestCase
+# voice_commands/tests.py
+import json
+from pathlib import Path
+from django.test import SimpleTestCase
+from .intenciones import analizar
 
-# Create your tests here.
+CORPUS = Path(__file__).resolve().parent / 'corpus_intenciones.json'
+
+
+# =============================================================================
+# MOTOR DE INTENCIONES
+# =============================================================================
+
+class CorpusIntencionesTests(SimpleTestCase):
+    """Cada caso etiquetado del corpus debe dar su intención y sus parámetros"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.casos = json.loads(CORPUS.read_text(encoding='utf-8'))
+
+    def test_corpus_no_vacio(self):
+        self.assertTrue(self.casos)
+
+    def test_intencion_y_parametros(self):
+        for caso in self.casos:
+            with self.subTest(contexto=caso['contexto'], texto=caso['texto']):
+                analisis = analizar(caso['texto'], caso['contexto'])
+                self.assertEqual(analisis.intencion, caso['intencion'])
+                self.assertEqual(analisis.parametros, caso['parametros'])
@@ -6,5 +6,6 @@ urlpatterns = [
     path('procesar/', views.procesar_comando, name='procesar_comando'),
     path('voz/historial/', views.ComandoVozListView.as_view(), name='historial_voz'),
     path('texto/historial/', views.ComandoTextoListView.as_view(), name='historial_texto'),
+    path('cache/estadisticas/', views.estadisticas_cache_comandos, name='estadisticas_cache_comandos'),
     path('sugerencias/', views.obtener_comandos_frecuentes, name='comandos_frecuentes'),
 ]
\ No newline at end of file
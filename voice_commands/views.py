@@ -1,16 +1,24 @@
 # voice_commands/views.py
-import re
+import calendar
 import json
 from datetime import datetime, timedelta
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
 from .models import ComandoVoz, ComandoTexto
 from .serializers import (ComandoVozSerializer, ComandoTextoSerializer,
                          ProcesarComandoSerializer)
-from analytics.views import generar_reporte
+from analytics.models import ReporteGenerado
+from analytics.consultas import construir_consulta
+from analytics.serializers import ReporteSolicitudSerializer
+from analytics.tareas import encolar_reporte
+from products.busqueda import BuscadorProductos
+from .cache import construir_clave, buscar_reporte, guardar_reporte, estadisticas_comandos
+from .intenciones import analizar
 
 class ComandoVozListView(generics.ListAPIView):
     serializer_class = ComandoVozSerializer
@@ -76,6 +84,24 @@ def procesar_comando(request):
                 )
                 serializer_class = ComandoTextoSerializer
             
+            # El reporte pedido se registra enlazado al comando y se genera en
+            # segundo plano cuando se confirme esta transacción
+            solicitud = resultado.pop('solicitud_reporte', None)
+            if solicitud:
+                reporte, reutilizado = crear_reporte_comando(comando, solicitud, es_voz, resultado['intencion'])
+                resultado['respuesta']['reporte_id'] = reporte.id
+                resultado['reporte'] = {
+                    'id': reporte.id,
+                    'estado': reporte.estado,
+                    'reutilizado': reutilizado,
+                    'url_descarga': reporte.url_descarga,
+                    'url_estado': request.build_absolute_uri(reverse('estado_reporte', args=[reporte.id])),
+                }
+                if reutilizado:
+                    resultado['respuesta']['mensaje'] = f"Reporte de {reporte.tipo_reporte} listo para descargar"
+                comando.respuesta_sistema = json.dumps(resultado['respuesta'])
+                comando.save(update_fields=['respuesta_sistema'])
+            
             # Agregar ID del comando a la respuesta
             resultado['comando_id'] = comando.id
             
@@ -108,64 +134,27 @@ def procesar_comando(request):
 
 def procesar_comando_natural(texto, contexto, usuario):
     """
-    Procesa comandos en lenguaje natural usando expresiones regulares
+    Procesa comandos en lenguaje natural con el motor de intenciones
+    (voice_commands.intenciones) y ejecuta la acción correspondiente
     """
-    texto = texto.lower().strip()
+    analisis = analizar(texto, contexto)
     resultado = {
-        'texto_original': texto,
-        'texto_procesado': texto,
-        'intencion': None,
-        'parametros': {},
+        'texto_original': analisis.texto,
+        'texto_procesado': analisis.texto,
+        'intencion': analisis.intencion,
+        'parametros': analisis.parametros,
         'exito': True,
         'respuesta': {},
         'accion_ejecutada': None
     }
+    if analisis.tipo_comando:
+        resultado['tipo_comando'] = analisis.tipo_comando
     
-    # Patrones para reportes
-    patrones_reportes = {
-        'reporte_ventas_mes': r'reporte.*ventas.*(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)',
-        'reporte_ventas_rango': r'reporte.*ventas.*(\d{1,2}/\d{1,2}/\d{4}).*(\d{1,2}/\d{1,2}/\d{4})',
-        'reporte_clientes': r'reporte.*clientes',
-        'reporte_productos': r'reporte.*productos',
-        'reporte_pdf': r'reporte.*pdf',
-        'reporte_excel': r'reporte.*excel',
-    }
-    
-    # Patrones para búsquedas
-    patrones_busqueda = {
-        'buscar_producto': r'buscar.*producto.*"([^"]+)"',
-        'buscar_cliente': r'buscar.*cliente.*"([^"]+)"',
-        'ver_stock': r'stock.*producto',
-    }
-    
-    # Extraer parámetros comunes
-    parametros = extraer_parametros_comunes(texto)
-    resultado['parametros'] = parametros
-    
-    # Determinar intención basada en patrones
-    if contexto == 'reports':
-        for intencion, patron in patrones_reportes.items():
-            if re.search(patron, texto):
-                resultado['intencion'] = intencion
-                resultado['tipo_comando'] = 'reporte'
-                break
-        
-        # Si no se detectó patrón específico, buscar palabras clave
-        if not resultado['intencion']:
-            if any(palabra in texto for palabra in ['reporte', 'informe', 'estadística']):
-                resultado['intencion'] = 'reporte_generico'
-                resultado['tipo_comando'] = 'reporte'
-        
-        # Ejecutar acción si es un reporte
-        if resultado['intencion'] and 'reporte' in resultado['intencion']:
-            ejecutar_reporte_comando(resultado, usuario)
-    
-    elif contexto == 'products':
-        for intencion, patron in patrones_busqueda.items():
-            if re.search(patron, texto):
-                resultado['intencion'] = intencion
-                resultado['tipo_comando'] = 'busqueda'
-                break
+    # Ejecutar acción según la intención
+    if analisis.tipo_comando == 'reporte':
+        ejecutar_reporte_comando(resultado, usuario)
+    elif analisis.intencion == 'buscar_producto':
+        ejecutar_busqueda_producto(resultado, analisis.parametros['termino'])
     
     # Si no se detectó intención específica
     if not resultado['intencion']:
@@ -175,51 +164,11 @@ def procesar_comando_natural(texto, contexto, usuario):
     
     return resultado
 
-def extraer_parametros_comunes(texto):
-    """Extrae parámetros comunes de los comandos"""
-    parametros = {}
-    
-    # Extraer formato
-    if 'pdf' in texto:
-        parametros['formato'] = 'pdf'
-    elif 'excel' in texto:
-        parametros['formato'] = 'excel'
-    elif 'csv' in texto:
-        parametros['formato'] = 'csv'
-    
-    # Extraer tipo de reporte
-    if 'ventas' in texto:
-        parametros['tipo_reporte'] = 'ventas'
-    elif 'clientes' in texto:
-        parametros['tipo_reporte'] = 'clientes'
-    elif 'productos' in texto:
-        parametros['tipo_reporte'] = 'productos'
-    
-    # Extraer meses
-    meses = {
-        'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
-        'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
-        'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12'
-    }
-    
-    for mes_nombre, mes_numero in meses.items():
-        if mes_nombre in texto:
-            parametros['mes'] = mes_numero
-            parametros['mes_nombre'] = mes_nombre.capitalize()
-            break
-    
-    # Extraer fechas (patrón dd/mm/aaaa)
-    fechas = re.findall(r'(\d{1,2}/\d{1,2}/\d{4})', texto)
-    if len(fechas) >= 2:
-        parametros['fecha_inicio'] = fechas[0]
-        parametros['fecha_fin'] = fechas[1]
-    elif len(fechas) == 1:
-        parametros['fecha'] = fechas[0]
-    
-    return parametros
-
 def ejecutar_reporte_comando(resultado, usuario):
-    """Ejecuta la generación de reporte basado en el comando"""
+    """
+    Arma y valida la solicitud de reporte del comando. El reporte se crea en
+    procesar_comando, una vez guardado el comando al que queda enlazado.
+    """
     parametros = resultado['parametros']
     
     # Mapear parámetros a formato de reporte
@@ -228,37 +177,97 @@ def ejecutar_reporte_comando(resultado, usuario):
         'formato_salida': parametros.get('formato', 'pdf')
     }
     
-    # Procesar fechas
-    if 'fecha_inicio' in parametros and 'fecha_fin' in parametros:
-        datos_reporte['fecha_inicio'] = parametros['fecha_inicio']
-        datos_reporte['fecha_fin'] = parametros['fecha_fin']
-    elif 'mes' in parametros:
-        # Establecer rango del mes
-        from datetime import datetime
-        año_actual = datetime.now().year
-        fecha_inicio = f"{año_actual}-{parametros['mes']}-01"
-        # Calcular último día del mes
-        if parametros['mes'] in ['04', '06', '09', '11']:
-            ultimo_dia = '30'
-        elif parametros['mes'] == '02':
-            # Febrero (simplificado)
-            ultimo_dia = '28'
-        else:
-            ultimo_dia = '31'
-        fecha_fin = f"{año_actual}-{parametros['mes']}-{ultimo_dia}"
-        datos_reporte['fecha_inicio'] = fecha_inicio
-        datos_reporte['fecha_fin'] = fecha_fin
+    # Procesar fechas (los comandos las dicen como dd/mm/aaaa)
+    try:
+        if 'fecha_inicio' in parametros and 'fecha_fin' in parametros:
+            datos_reporte['fecha_inicio'] = datetime.strptime(parametros['fecha_inicio'], '%d/%m/%Y').date()
+            datos_reporte['fecha_fin'] = datetime.strptime(parametros['fecha_fin'], '%d/%m/%Y').date()
+        elif 'fecha' in parametros:
+            datos_reporte['fecha_inicio'] = datos_reporte['fecha_fin'] = \
+                datetime.strptime(parametros['fecha'], '%d/%m/%Y').date()
+        elif 'mes' in parametros:
+            # Rango del mes indicado (del año dicho o del actual)
+            anio = int(parametros.get('anio') or datetime.now().year)
+            mes = int(parametros['mes'])
+            datos_reporte['fecha_inicio'] = f"{anio}-{mes:02d}-01"
+            datos_reporte['fecha_fin'] = f"{anio}-{mes:02d}-{calendar.monthrange(anio, mes)[1]:02d}"
+    except ValueError:
+        resultado['exito'] = False
+        resultado['respuesta'] = {'mensaje': 'No se reconocieron las fechas del comando'}
+        return
+    
+    solicitud = ReporteSolicitudSerializer(data=datos_reporte)
+    if not solicitud.is_valid():
+        resultado['exito'] = False
+        resultado['respuesta'] = {'mensaje': 'No se pudo armar el reporte', 'errores': solicitud.errors}
+        return
     
-    # Aquí se integraría con el sistema de reportes
-    # Por ahora, simulamos la respuesta
+    resultado['solicitud_reporte'] = solicitud.data
     resultado['respuesta'] = {
-        'mensaje': f"Reporte de {datos_reporte['tipo_reporte']} generado exitosamente",
+        'mensaje': f"Reporte de {datos_reporte['tipo_reporte']} en preparación; te avisaremos cuando esté listo",
         'tipo': datos_reporte['tipo_reporte'],
         'formato': datos_reporte['formato_salida'],
-        'parametros': datos_reporte
+        'parametros': solicitud.data
     }
     resultado['accion_ejecutada'] = 'generar_reporte'
 
+def crear_reporte_comando(comando, solicitud, es_voz, intencion):
+    """
+    Registra el reporte enlazado al comando. Si hay uno reciente con la misma
+    solicitud y los datos no cambiaron (voice_commands.cache), se reutiliza su
+    archivo; si no, queda pendiente y se encola. Devuelve (reporte, reutilizado).
+    """
+    clave = construir_clave(solicitud)
+    anterior = buscar_reporte(clave, intencion)
+    reporte = ReporteGenerado(
+        usuario=comando.usuario,
+        comando_voz=comando if es_voz else None,
+        comando_texto=None if es_voz else comando,
+        tipo_comando='voice' if es_voz else 'text',
+        tipo_reporte=solicitud['tipo_reporte'],
+        formato_salida=solicitud['formato_salida'],
+        parametros=solicitud,
+    )
+    if anterior:
+        ahora = timezone.now()
+        reporte.consulta_sql = anterior.consulta_sql
+        reporte.url_descarga = anterior.url_descarga
+        reporte.estado = 'completado'
+        reporte.progreso = 100
+        reporte.fecha_inicio = reporte.fecha_fin = reporte.fecha_actualizacion = ahora
+        reporte.save()
+        return reporte, True
+    
+    reporte.consulta_sql = construir_consulta(solicitud).sql
+    reporte.estado = 'pendiente'
+    reporte.save()
+    encolar_reporte(reporte)
+    guardar_reporte(clave, reporte)
+    return reporte, False
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def estadisticas_cache_comandos(request):
+    """Aciertos de la reutilización de reportes por intención"""
+    return Response(estadisticas_comandos())
+
+def ejecutar_busqueda_producto(resultado, termino, limite=5):
+    """Busca productos con el mismo índice de texto completo del catálogo"""
+    productos = list(
+        BuscadorProductos.buscar(termino, resaltar=False)
+        .values('id', 'nombre', 'slug', 'precio')[:limite]
+    )
+    for producto in productos:
+        producto['precio'] = str(producto['precio'])
+    
+    resultado['parametros']['termino'] = termino
+    resultado['respuesta'] = {
+        'mensaje': f"Se encontraron {len(productos)} productos para \"{termino}\"" if productos
+                   else f"No se encontraron productos para \"{termino}\"",
+        'productos': productos
+    }
+    resultado['accion_ejecutada'] = 'buscar_producto'
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def obtener_comandos_frecuentes(request):